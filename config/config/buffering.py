@@ -0,0 +1,109 @@
+"""
+In-process write-behind buffer for high-volume, low-value writes.
+
+Requests ``add()`` events keyed by whatever makes them unique; repeats of
+a pending key are merged in memory and keys that were written recently
+are skipped outright. The buffer hands its contents to a ``write``
+callable in one batch when it reaches ``flush_size`` events, when
+``flush_interval`` seconds have passed since the last flush (checked on
+``add()``), or when the process exits.
+
+Memory is bounded: at most ``max_pending`` events are held. If writes keep
+failing, new events are dropped (and counted) rather than queued forever.
+Events still pending when a worker is killed hard are lost, which is the
+trade-off for keeping these writes off the request path.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    def __init__(self, write, flush_size=500, flush_interval=30.0, max_pending=10_000,
+                 remember=50_000, name="buffer", flush_on_exit=True):
+        self.write = write
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.remember = remember
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._recent = OrderedDict()
+        self._last_flush = time.monotonic()
+
+        self.flushed = 0
+        self.dropped = 0
+
+        if flush_on_exit:
+            atexit.register(self.flush)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, key, value=None):
+        """
+        Queue ``value`` (default: ``key``) under ``key``. Returns False when
+        the event was a duplicate or had to be dropped.
+        """
+        with self._lock:
+            if key in self._pending or key in self._recent:
+                return False
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending[key] = key if value is None else value
+            due = (
+                len(self._pending) >= self.flush_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+        return True
+
+    def flush(self):
+        """Write everything pending now; returns the number of events handed to ``write``."""
+        # One writer at a time; a request that finds a flush running just
+        # leaves its event for that flush or the next one.
+        if not self._flush_lock.acquire(blocking=False):
+            return 0
+        try:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._last_flush = time.monotonic()
+            if not batch:
+                return 0
+            try:
+                self.write(list(batch.values()))
+            except Exception:
+                logger.exception("%s: flush of %d events failed", self.name, len(batch))
+                with self._lock:
+                    # Put the batch back in front, within the memory bound.
+                    room = max(0, self.max_pending - len(self._pending))
+                    kept = dict(list(batch.items())[:room])
+                    self.dropped += len(batch) - len(kept)
+                    kept.update(self._pending)
+                    self._pending = kept
+                return 0
+            with self._lock:
+                for key in batch:
+                    self._recent[key] = None
+                while len(self._recent) > self.remember:
+                    self._recent.popitem(last=False)
+                self.flushed += len(batch)
+            return len(batch)
+        finally:
+            self._flush_lock.release()
+
+    def clear(self):
+        """Forget pending and recently written events (tests, day rollover)."""
+        with self._lock:
+            self._pending = {}
+            self._recent.clear()
@@ -93,9 +93,13 @@ INSTALLED_APPS = [
     "listings",
     "pages",
     "accounts.apps.AccountsConfig",
+    "mediafiles",
 
     # If you use CORS, keep this (you already installed it)
     "corsheaders",
+
+    # Read-only JSON API (listings/api.py)
+    "rest_framework",
 ]
 
 # ----------------------
@@ -104,6 +108,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    # Answers MEDIA_URL requests before sessions/auth/visit tracking
+    "mediafiles.middleware.MediaFilesMiddleware",
 
     # If using CORS, it should be high in the stack
     "corsheaders.middleware.CorsMiddleware",
@@ -136,6 +142,7 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
                 "pages.context_processors.site_stats",
+                "listings.context_processors.saved_listings",
             ],
         },
     },
@@ -163,6 +170,91 @@ else:
             "NAME": BASE_DIR / "db.sqlite3",
         }
     }
+
+# ----------------------
+# CACHE
+# ----------------------
+# Per-process memory by default. Set REDIS_URL (needs the "redis" package)
+# or CACHE_DIR so that invalidations reach every gunicorn worker.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+elif os.getenv("CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("CACHE_DIR"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "scholarify",
+        }
+    }
+
+# ----------------------
+# REST FRAMEWORK (public, read-only API under /api/v1/)
+# ----------------------
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+    "DEFAULT_PARSER_CLASSES": [],
+    "DEFAULT_AUTHENTICATION_CLASSES": [],
+    "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.AllowAny"],
+}
+
+# ----------------------
+# VIEW TRACKING (write-behind buffers, see config/buffering.py)
+# ----------------------
+VIEW_BUFFER_FLUSH_SIZE = int(os.getenv("VIEW_BUFFER_FLUSH_SIZE", "500"))
+VIEW_BUFFER_FLUSH_INTERVAL = float(os.getenv("VIEW_BUFFER_FLUSH_INTERVAL", "30"))
+VIEW_BUFFER_MAX_PENDING = int(os.getenv("VIEW_BUFFER_MAX_PENDING", "10000"))
+
+# Site-wide visit total (pages/visits.py): cached, bumped as visits are
+# written, recounted when the cache entry expires. The estimate mode reads
+# PostgreSQL's reltuples instead of running COUNT(*).
+SITE_VISIT_TOTAL_TTL = int(os.getenv("SITE_VISIT_TOTAL_TTL", "300"))
+SITE_VISIT_TOTAL_ESTIMATE = os.getenv("SITE_VISIT_TOTAL_ESTIMATE", "False") == "True"
+
+# Seconds between flushes of the cached gallery view counters into
+# GalleryImage.views (pages/viewcounts.py).
+GALLERY_VIEW_FLUSH_INTERVAL = int(os.getenv("GALLERY_VIEW_FLUSH_INTERVAL", "60"))
+
+# "rows": one SiteVisit / ListingView row per visitor per day (exact).
+# "sketch": one HyperLogLog sketch per day (and per listing per day) instead,
+# ~0.8% error and a few KB each (listings/sketches.py). Run
+# build_visitor_sketches after switching to carry the history over.
+VISITOR_ANALYTICS = os.getenv("VISITOR_ANALYTICS", "rows")
+
+# ----------------------
+# STAFF DASHBOARD (pages/dashboard.py)
+# ----------------------
+# Seconds before the cached metrics snapshot is rebuilt in the background;
+# until then (and while it rebuilds) the dashboard shows the cached one.
+DASHBOARD_SNAPSHOT_TTL = int(os.getenv("DASHBOARD_SNAPSHOT_TTL", "300"))
+# Seconds between recomputations of the live metrics streamed to open
+# dashboards (pages/live.py); one computation per interval for all of them.
+DASHBOARD_LIVE_INTERVAL = float(os.getenv("DASHBOARD_LIVE_INTERVAL", "5"))
+
+# ----------------------
+# LISTING EXPIRY (seconds between in-process sweeps; 0 = cron only)
+# ----------------------
+LISTING_EXPIRY_INTERVAL = int(os.getenv("LISTING_EXPIRY_INTERVAL", "3600"))
+
+# ----------------------
+# LISTING CHANGES FEED (/api/v1/listings/changes/)
+# ----------------------
+# Rows newer than this many seconds are held back until in-flight
+# transactions that stamped an earlier updated_at have committed.
+LISTING_CHANGES_SETTLE_SECONDS = float(os.getenv("LISTING_CHANGES_SETTLE_SECONDS", "5"))
+# Deletes are remembered this long; older cursors must resync from scratch.
+LISTING_TOMBSTONE_RETENTION_DAYS = int(os.getenv("LISTING_TOMBSTONE_RETENTION_DAYS", "30"))
+
 # ----------------------
 # EMAIL (ENV BASED â€” no secrets in code)
 # ----------------------
@@ -235,6 +327,27 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Uploads get content-hashed names (mediafiles/storage.py), so their URLs
+# can be cached forever. STATICFILES_STORAGE above is ignored since Django
+# 5.1; "staticfiles" keeps the backend that is actually in effect.
+STORAGES = {
+    "default": {"BACKEND": "mediafiles.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+# Media is served by mediafiles.middleware (ETag, Range, sendfile through the
+# WSGI file wrapper). Behind nginx, point MEDIA_ACCEL_REDIRECT at an
+# internal location aliased to MEDIA_ROOT and nginx sends the bytes.
+MEDIA_ACCEL_REDIRECT = os.getenv("MEDIA_ACCEL_REDIRECT", "")
+MEDIA_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365  # content-hashed names
+MEDIA_MAX_AGE = int(os.getenv("MEDIA_MAX_AGE", "3600"))  # names from before hashing
+
+# ----------------------
+# RESPONSIVE IMAGES (mediafiles app: derivatives of listing/gallery uploads)
+# ----------------------
+IMAGE_VARIANT_WIDTHS = (320, 640, 960, 1280)
+IMAGE_VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", "80"))
+
 # ----------------------
 # AUTH
 # ----------------------
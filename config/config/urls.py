@@ -28,6 +28,9 @@ urlpatterns = [
     
     # Root redirect - redirects to appropriate language version
     path("", root_redirect, name="root-redirect"),
+
+    # Read-only JSON API (no language prefix)
+    path("api/v1/", include(("listings.api_urls", "api_v1"), namespace="api_v1")),
 ]
 
 # Language-specific URL patterns
@@ -52,10 +55,8 @@ urlpatterns += i18n_patterns(
 # Serve static files in development
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    
-# Serve uploaded media files in development only
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+# Uploaded media is served by mediafiles.middleware.MediaFilesMiddleware
 
 
 # ============================================
@@ -0,0 +1,44 @@
+"""
+Site-wide visitor identity.
+
+Every tracker (listing views, site visits, gallery views) keys its events
+on the same anonymous visitor id, carried in a long-lived cookie rather
+than the session so that counting a visitor never costs a session row.
+SiteVisitMiddleware (pages/middleware.py) sends the cookie when a request
+minted a new id.
+"""
+
+import re
+import uuid
+
+from django.conf import settings
+
+VISITOR_COOKIE = "visitor_id"
+VISITOR_COOKIE_AGE = 60 * 60 * 24 * 365  # seconds
+VISITOR_KEY_RE = re.compile(r"[0-9a-f]{32}")
+
+
+def visitor_key(request):
+    """
+    Id of the visitor, from the long-lived ``visitor_id`` cookie. A new id
+    is minted when the cookie is missing (SiteVisitMiddleware sets it on
+    the response). Unlike a session key this needs no session row, so
+    anonymous visitors cost no session reads or writes.
+    """
+    key = getattr(request, "_visitor_key", None)
+    if key is None:
+        key = request.COOKIES.get(VISITOR_COOKIE, "")
+        if not VISITOR_KEY_RE.fullmatch(key):
+            key = uuid.uuid4().hex
+            request._new_visitor = True
+        request._visitor_key = key
+    return key
+
+
+def set_visitor_cookie(request, response):
+    """Send the visitor id minted by ``visitor_key()`` during this request, if any."""
+    if getattr(request, "_new_visitor", False):
+        response.set_cookie(
+            VISITOR_COOKIE, request._visitor_key, max_age=VISITOR_COOKIE_AGE,
+            secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite="Lax",
+        )
@@ -1,10 +1,40 @@
 from django.contrib import admin
-from .models import Listing
+from django.db.models import Count
+from .models import Listing, Tag
+from .tags import sync_listing_tags
 
 
 @admin.register(Listing)
 class ListingAdmin(admin.ModelAdmin):
-    list_display = ("title", "type", "country", "deadline", "status", "is_verified", "is_featured", "created_at")
-    list_filter = ("type", "status", "country", "is_verified", "is_featured", "remote")
+    list_display = ("title", "type", "country", "deadline", "status", "tag_list", "is_verified", "is_featured", "created_at")
+    list_filter = ("type", "status", "country", "is_verified", "is_featured", "remote", "tag_set")
     search_fields = ("title", "organization", "country", "tags")
     ordering = ("-created_at",)
+
+    actions = ["rebuild_tag_index"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related("tag_set")
+
+    def tag_list(self, obj):
+        return ", ".join(tag.name for tag in obj.tag_set.all())
+    tag_list.short_description = "Tags"
+
+    def rebuild_tag_index(self, request, queryset):
+        sync_listing_tags(list(queryset.only("id", "tags")))
+    rebuild_tag_index.short_description = "Re-index tags of selected listings"
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ("name", "slug", "listing_count")
+    search_fields = ("name", "slug")
+    prepopulated_fields = {"slug": ("name",)}
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(listing_count=Count("listing_links"))
+
+    def listing_count(self, obj):
+        return obj.listing_count
+    listing_count.short_description = "Listings"
+    listing_count.admin_order_field = "listing_count"
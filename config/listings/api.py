@@ -0,0 +1,200 @@
+"""
+Read-only JSON API for listings (v1).
+
+List endpoints read ``.values()`` rows for just the requested columns
+(``?fields=``) and shape them with plain functions: no model instances
+and no ModelSerializer field machinery per row. Paging is keyset-based
+(``next``/``previous`` carry a cursor) except for ranked search results,
+which page by number. Every endpoint answers conditional requests with
+the same validators as the HTML pages. ``changes/`` is the delta-sync
+feed for mirrors (see listings/changes.py).
+"""
+
+from django.core.files.storage import default_storage
+from rest_framework.decorators import api_view
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ParseError
+from rest_framework.response import Response
+
+from . import changes as change_feed
+from .caching import home_cache_key, result_state
+from .conditional import add_validators, not_modified, page_etag
+from .facets import cached_facet_counts
+from .filters import filter_listings, listing_filters
+from .models import Listing
+from .pagination import InvalidCursor, KeysetPaginator
+from .tags import parse_tags
+
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+CHANGES_MAX_PAGE_SIZE = 1000
+
+LIST_FIELDS = (
+    "id", "type", "title", "organization", "country", "city", "deadline",
+    "remote", "level", "tags", "image", "apply_url", "source_url",
+    "is_featured", "is_verified", "created_at", "updated_at",
+)
+DETAIL_FIELDS = LIST_FIELDS + ("description",)
+DEFAULT_LIST_FIELDS = (
+    "id", "type", "title", "organization", "country", "city", "deadline",
+    "remote", "level", "tags", "image", "created_at",
+)
+
+
+def _requested_fields(request, allowed, default):
+    raw = request.query_params.get("fields")
+    if not raw:
+        return default
+    fields = tuple(dict.fromkeys(name.strip() for name in raw.split(",") if name.strip()))
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise ParseError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}.")
+    return fields
+
+
+class CursorGone(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Cursor is past the change history window; resync without since."
+    default_code = "cursor_gone"
+
+
+def _page_size(request, maximum=API_MAX_PAGE_SIZE):
+    try:
+        size = int(request.query_params.get("page_size") or API_PAGE_SIZE)
+    except ValueError:
+        raise ParseError("page_size must be an integer.")
+    return max(1, min(size, maximum))
+
+
+def _shape(row, fields):
+    """API dict for a ``.values()`` row, restricted to ``fields``."""
+    data = {}
+    for name in fields:
+        value = row[name]
+        if name == "tags":
+            value = list(parse_tags(value).values())
+        elif name == "image":
+            value = default_storage.url(value) if value else None
+        data[name] = value
+    return data
+
+
+def _page_url(request, **params):
+    query = request.query_params.copy()
+    for key in ("cursor", "page"):
+        query.pop(key, None)
+    for key, value in params.items():
+        query[key] = value
+    return request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+
+def _conditional(request, *parts, last_modified=None):
+    etag = page_etag(request, *parts)
+    return etag, not_modified(request, etag, last_modified)
+
+
+@api_view(["GET"])
+def listing_list(request):
+    filters = listing_filters(request.query_params)
+    qs, ordering = filter_listings(filters)
+    fields = _requested_fields(request, LIST_FIELDS, DEFAULT_LIST_FIELDS)
+    size = _page_size(request)
+
+    state = result_state(qs, filters)
+    etag, response = _conditional(
+        request, home_cache_key(), state["last_modified"], state["total"],
+        last_modified=state["last_modified"],
+    )
+    if response is not None:
+        return response
+
+    # Only the requested columns, plus the keyset keys the cursors need
+    columns = list(dict.fromkeys([*fields, *(name for name, _ in ordering or ())]))
+    paginator = KeysetPaginator(qs.values(*columns), size, ordering, count=state["total"])
+    try:
+        page = paginator.page(request.query_params.get("page"), request.query_params.get("cursor"))
+    except ValueError:
+        raise ParseError("Invalid page or cursor.")
+
+    if ordering:
+        # The page number rides along so the paginator knows what's behind us
+        next_url = page.next_cursor and _page_url(request, cursor=page.next_cursor, page=page.number + 1)
+        previous_url = page.previous_cursor and _page_url(
+            request, cursor=page.previous_cursor, page=page.number - 1
+        )
+    else:
+        next_url = page.has_next() and _page_url(request, page=page.number + 1)
+        previous_url = page.has_previous() and _page_url(request, page=page.number - 1)
+
+    response = Response({
+        "count": state["total"],
+        "next": next_url or None,
+        "previous": previous_url or None,
+        "results": [_shape(row, fields) for row in page.object_list],
+    })
+    return add_validators(request, response, etag, state["last_modified"])
+
+
+@api_view(["GET"])
+def listing_detail(request, pk):
+    fields = _requested_fields(request, DETAIL_FIELDS, DETAIL_FIELDS)
+    columns = list(dict.fromkeys([*fields, "updated_at"]))
+    row = (
+        Listing.objects.filter(pk=pk, status=Listing.Status.ACTIVE)
+        .values(*columns)
+        .first()
+    )
+    if row is None:
+        raise NotFound()
+
+    etag, response = _conditional(request, row["updated_at"].isoformat(), last_modified=row["updated_at"])
+    if response is not None:
+        return response
+    return add_validators(request, Response(_shape(row, fields)), etag, row["updated_at"])
+
+
+@api_view(["GET"])
+def listing_facets(request):
+    filters = listing_filters(request.query_params)
+    qs, _ = filter_listings(filters)
+    etag, response = _conditional(request, home_cache_key())
+    if response is not None:
+        return response
+
+    facets = cached_facet_counts(qs, filters)
+    data = {
+        "total": facets["total"],
+        "type": facets["type"],
+        "remote": facets["remote"],
+        "deadline": facets["deadline"],
+        "country": [{"value": value, "count": count} for value, count in facets["country"]],
+        "level": [{"value": value, "count": count} for value, count in facets["level"]],
+        "tags": [{"slug": tag.slug, "name": tag.name, "count": tag.listing_count} for tag in facets["tags"]],
+    }
+    return add_validators(request, Response(data), etag)
+
+
+@api_view(["GET"])
+def listing_changes(request):
+    """
+    Listings created, updated or removed after ``?since=<cursor>``, oldest
+    first. Store ``cursor`` from each response and pass it back as
+    ``since``; keep going while ``has_more`` is true.
+    """
+    fields = _requested_fields(request, LIST_FIELDS, LIST_FIELDS)
+    try:
+        events, cursor, has_more = change_feed.changes(
+            since=request.query_params.get("since"),
+            limit=_page_size(request, CHANGES_MAX_PAGE_SIZE),
+            fields=fields,
+        )
+    except InvalidCursor:
+        raise ParseError("Invalid since cursor.")
+    except change_feed.CursorExpired:
+        raise CursorGone()
+
+    results = [
+        {"op": op, **(_shape(row, fields) if op == "upsert" else row)}
+        for op, row in events
+    ]
+    return Response({"results": results, "cursor": cursor, "has_more": has_more})
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import api
+
+urlpatterns = [
+    path("listings/", api.listing_list, name="listing_list"),
+    path("listings/changes/", api.listing_changes, name="listing_changes"),
+    path("listings/facets/", api.listing_facets, name="listing_facets"),
+    path("listings/<int:pk>/", api.listing_detail, name="listing_detail"),
+]
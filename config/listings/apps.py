@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ListingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'listings'
+
+    def ready(self):
+        import listings.signals
+        from .search import ensure_sqlite_triggers
+
+        post_migrate.connect(
+            ensure_sqlite_triggers,
+            sender=self,
+            dispatch_uid="listings_ensure_search_triggers",
+        )
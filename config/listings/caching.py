@@ -0,0 +1,57 @@
+"""
+Cache keys and invalidation for rendered listing fragments.
+
+The home page's featured/latest blocks (and the browse pages' validator
+state) are cached under a version token. Any Listing save/delete (or a
+bulk status change) replaces the token, which orphans every cached
+fragment at once.
+"""
+
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+
+HOME_FRAGMENT_TTL = 60 * 10  # seconds; upper bound on staleness
+
+HOME_VERSION_KEY = "listings:home:version"
+
+# Listing writes that skip signals (queryset.update()) are picked up after this
+RESULT_STATE_TTL = 60  # seconds
+
+
+def home_cache_key():
+    """
+    Vary-on value for the home fragments: the current version token plus
+    today's date, so fragments roll over when deadlines do.
+    """
+    version = cache.get(HOME_VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        cache.add(HOME_VERSION_KEY, version, None)
+        version = cache.get(HOME_VERSION_KEY, version)
+    return f"{version}:{timezone.localdate().isoformat()}"
+
+
+def invalidate_listing_caches():
+    """Drop every cached listing fragment (called on Listing changes)."""
+    cache.set(HOME_VERSION_KEY, time.time_ns(), None)
+
+
+def result_state(qs, filters):
+    """
+    ``{"last_modified", "total"}`` of a filtered listing queryset, for
+    conditional GET validators. Cached under the version token, so any
+    Listing save/delete recomputes it.
+    """
+    version = home_cache_key()
+    normalized = json.dumps(filters, sort_keys=True, default=str)
+    key = "listings:state:" + hashlib.sha1(f"{version}|{normalized}".encode()).hexdigest()
+    state = cache.get(key)
+    if state is None:
+        state = qs.order_by().aggregate(last_modified=Max("updated_at"), total=Count("id"))
+        cache.set(key, state, RESULT_STATE_TTL)
+    return state
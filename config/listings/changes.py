@@ -0,0 +1,149 @@
+"""
+Delta-sync feed of listing changes.
+
+Mirrors poll ``changes(since=cursor)`` and get every listing created or
+updated (keyed on ``updated_at``) plus every deletion (from
+ListingTombstone) after the cursor, oldest first, with a cursor to resume
+from. The two sources are merged on ``(timestamp, kind, id)``, which is
+unique and stable, so no change is returned twice or skipped between
+pages.
+
+The cursor also records how far the mirror has checked: the settle time
+of its last complete poll. That, not the last change it received, decides
+whether the cursor has outlived the tombstone window, so a mirror that
+keeps polling a quiet catalogue stays current however old the newest
+change is.
+
+Listings that leave the public catalogue (expired, drafted, deleted) come
+through as deletes; the expiry sweep and the importer both bump
+``updated_at``, so their bulk writes show up here too.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Listing, ListingTombstone
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+
+UPSERT, DELETE = 0, 1  # merge order for rows sharing a timestamp
+
+
+class CursorExpired(Exception):
+    """The cursor is older than the tombstone retention window."""
+
+
+def tombstone_horizon():
+    return timezone.now() - timedelta(days=settings.LISTING_TOMBSTONE_RETENTION_DAYS)
+
+
+def prune_tombstones():
+    """Delete tombstones past the retention window; returns how many."""
+    deleted, _ = ListingTombstone.objects.filter(deleted_at__lt=tombstone_horizon()).delete()
+    return deleted
+
+
+def _parse_cursor(cursor):
+    """``(position or None, checked)`` from a cursor made by ``changes()``."""
+    _, values = decode_cursor(cursor)
+    try:
+        if len(values) == 3:
+            # Cursors from before the checked time was recorded
+            values = [*values, values[0]]
+        stamp, kind, pk, checked = values
+        checked = parse_datetime(checked)
+        if stamp is not None:
+            stamp = parse_datetime(stamp)
+    except (TypeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+    if checked is None:
+        raise InvalidCursor(cursor)
+    if stamp is None and kind is None and pk is None:
+        return None, checked
+    if stamp is None or kind not in (UPSERT, DELETE) or not isinstance(pk, int):
+        raise InvalidCursor(cursor)
+    return (stamp, kind, pk), checked
+
+
+def _expired(checked):
+    """
+    Whether tombstones after ``checked`` may have been pruned. Pruning only
+    removes tombstones past the horizon, and a prune that has not run yet
+    leaves older ones in place, so the feed is complete from whichever is
+    earlier: the horizon or the oldest tombstone still kept.
+    """
+    horizon = tombstone_horizon()
+    if checked >= horizon:
+        return False
+    oldest = ListingTombstone.objects.order_by("deleted_at").values_list("deleted_at", flat=True).first()
+    return oldest is None or checked < oldest
+
+
+def _after(position, kind, stamp_field):
+    """Q for rows of ``kind`` that sort after ``position``."""
+    if position is None:
+        return Q()
+    stamp, cursor_kind, pk = position
+    if kind == cursor_kind:
+        return Q(**{f"{stamp_field}__gt": stamp}) | Q(**{stamp_field: stamp, "id__gt": pk})
+    if kind > cursor_kind:
+        return Q(**{f"{stamp_field}__gte": stamp})
+    return Q(**{f"{stamp_field}__gt": stamp})
+
+
+def changes(since=None, limit=100, fields=("id",)):
+    """
+    Changes after ``since`` (a cursor from a previous call, or None for
+    everything), at most ``limit`` of them.
+
+    Returns ``(events, cursor, has_more)``. Each event is ``(op, row)``:
+    ``("upsert", values-row restricted to fields)`` or ``("delete",
+    {"id", "deleted_at"})``. ``cursor`` is where the next call resumes
+    (the same position with a later checked time when nothing new arrived).
+    Raises InvalidCursor or CursorExpired.
+    """
+    position = None
+    if since:
+        position, checked = _parse_cursor(since)
+        if _expired(checked):
+            raise CursorExpired(since)
+
+    # Hold back the newest rows until concurrent writers have committed.
+    settled = timezone.now() - timedelta(seconds=settings.LISTING_CHANGES_SETTLE_SECONDS)
+    columns = list(dict.fromkeys([*fields, "id", "status", "updated_at"]))
+    listings = (
+        Listing.objects.filter(_after(position, UPSERT, "updated_at"), updated_at__lte=settled)
+        .order_by("updated_at", "id")
+        .values(*columns)[: limit + 1]
+    )
+    tombstones = (
+        ListingTombstone.objects.filter(_after(position, DELETE, "deleted_at"), deleted_at__lte=settled)
+        .order_by("deleted_at", "id")
+        .values("id", "listing_id", "deleted_at")[: limit + 1]
+    )
+
+    merged = sorted(
+        [((row["updated_at"], UPSERT, row["id"]), row) for row in listings]
+        + [((row["deleted_at"], DELETE, row["id"]), row) for row in tombstones],
+        key=lambda item: item[0],
+    )
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+
+    events = []
+    for (stamp, kind, _), row in merged:
+        if kind == UPSERT and row["status"] == Listing.Status.ACTIVE:
+            events.append(("upsert", row))
+        else:
+            listing_id = row["id"] if kind == UPSERT else row["listing_id"]
+            events.append(("delete", {"id": listing_id, "deleted_at": stamp}))
+
+    if merged:
+        position = merged[-1][0]
+    # A partial page has only been checked up to its last row
+    checked = position[0] if has_more else settled
+    cursor = encode_cursor("n", [*(position or (None, None, None)), checked])
+    return events, cursor, has_more
@@ -0,0 +1,64 @@
+"""
+Conditional GET support (ETag / Last-Modified / 304) for listing pages.
+
+Views compute a validator from the data the page depends on, ask
+``not_modified()`` whether the client's copy is still fresh, and only
+render when it is not. ``add_validators()`` stamps the same validators and
+the caching headers on whatever response goes out.
+
+Pages are per language (i18n URL prefix, also folded into the ETag) and
+per user (header, saved state), hence ``Vary: Cookie`` and ``private`` for
+signed-in users.
+"""
+
+import hashlib
+
+from django.contrib.messages import get_messages
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import get_language
+
+
+def page_etag(request, *parts):
+    """Weakly-unique validator for ``request``'s page built from ``parts``."""
+    user = request.user
+    bits = [
+        get_language() or "",
+        timezone.localdate().isoformat(),  # relative dates ("in 3 days") change daily
+        str(user.pk) if user.is_authenticated else "anon",
+        request.get_full_path(),
+        *(str(part) for part in parts),
+    ]
+    return quote_etag(hashlib.md5("|".join(bits).encode()).hexdigest())
+
+
+def _timestamp(last_modified):
+    return int(last_modified.timestamp()) if last_modified else None
+
+
+def not_modified(request, etag, last_modified=None):
+    """A 304 response if the client's copy matches, else None (render)."""
+    if request.method not in ("GET", "HEAD"):
+        return None
+    # A flash message is part of the page; never swallow it with a 304.
+    if len(get_messages(request)):
+        return None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=_timestamp(last_modified)
+    )
+    if response is not None:
+        add_validators(request, response, etag, last_modified)
+    return response
+
+
+def add_validators(request, response, etag, last_modified=None):
+    if request.method in ("GET", "HEAD"):
+        response.headers.setdefault("ETag", etag)
+        if last_modified and not response.has_header("Last-Modified"):
+            response.headers["Last-Modified"] = http_date(_timestamp(last_modified))
+    patch_vary_headers(response, ("Cookie",))
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True)
+    patch_cache_control(response, max_age=0, must_revalidate=True)
+    return response
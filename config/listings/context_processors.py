@@ -0,0 +1,8 @@
+from django.utils.functional import SimpleLazyObject
+
+from .saved import saved_listing_ids
+
+
+def saved_listings(request):
+    """``saved_listing_ids`` for listing cards; loaded only if a template uses it."""
+    return {"saved_listing_ids": SimpleLazyObject(lambda: saved_listing_ids(request))}
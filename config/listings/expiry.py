@@ -0,0 +1,63 @@
+"""
+Deadline expiry sweeper.
+
+``Listing.save()`` only expires the row being saved; ``expire_listings()``
+expires every past-deadline listing in one UPDATE (served by the
+(status, deadline) index) so they drop out of the ACTIVE working set.
+
+It runs from ``manage.py expire_listings`` (cron) and from
+``maybe_expire_listings()``, hooked to ``request_finished``: at most once
+per ``LISTING_EXPIRY_INTERVAL`` seconds per process, and once per interval
+across processes thanks to a cache lock.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .caching import invalidate_listing_caches
+from .models import Listing
+
+logger = logging.getLogger(__name__)
+
+EXPIRY_LOCK_KEY = "listings:expiry:lock"
+
+_next_run = 0.0
+
+
+def expire_listings(today=None):
+    """Mark every non-expired listing whose deadline has passed as EXPIRED; returns the row count."""
+    today = today or timezone.localdate()
+    expired = (
+        Listing.objects.filter(
+            status__in=[Listing.Status.ACTIVE, Listing.Status.DRAFT],
+            deadline__lt=today,
+        )
+        # update() skips auto_now; ETags and Last-Modified read updated_at.
+        .update(status=Listing.Status.EXPIRED, updated_at=timezone.now())
+    )
+    if expired:
+        invalidate_listing_caches()
+    return expired
+
+
+def maybe_expire_listings(**kwargs):
+    """request_finished hook: sweep if this process and the cluster are due."""
+    global _next_run
+    interval = settings.LISTING_EXPIRY_INTERVAL
+    if not interval or time.monotonic() < _next_run:
+        return
+    _next_run = time.monotonic() + interval
+    if not cache.add(EXPIRY_LOCK_KEY, 1, interval):
+        return
+    try:
+        expired = expire_listings()
+    except Exception:
+        logger.exception("Listing expiry sweep failed")
+        cache.delete(EXPIRY_LOCK_KEY)
+        return
+    if expired:
+        logger.info("Expired %d past-deadline listings", expired)
@@ -0,0 +1,92 @@
+"""
+Facet counts for the listings filter sidebar.
+
+All facets are computed in a single query: the filtered queryset is grouped
+by (country, level) and every other facet value is a conditional COUNT
+column on those groups. The per-facet totals are then folded together in
+Python. Results are cached briefly per normalized filter set.
+"""
+
+import hashlib
+import json
+from collections import Counter
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Listing
+from .tags import tag_counts
+
+FACET_CACHE_TTL = 30  # seconds
+
+# Deadline buckets (inclusive upper bound in days from today)
+DEADLINE_BUCKETS = {"week": 7, "month": 30}
+
+
+def deadline_bucket_q(bucket, today=None):
+    """Q() for a deadline bucket name ("week", "month" or "none")."""
+    today = today or timezone.localdate()
+    if bucket == "none":
+        return Q(deadline__isnull=True)
+    days = DEADLINE_BUCKETS[bucket]
+    return Q(deadline__gte=today, deadline__lte=today + timedelta(days=days))
+
+
+def facet_counts(qs, today=None, limit=20):
+    """Counts for type, country, remote, level and deadline buckets over ``qs``."""
+    today = today or timezone.localdate()
+
+    columns = {
+        f"type_{value}": Count("id", filter=Q(type=value))
+        for value in Listing.ListingType.values
+    }
+    columns["remote"] = Count("id", filter=Q(remote=True))
+    for bucket in (*DEADLINE_BUCKETS, "none"):
+        columns[f"deadline_{bucket}"] = Count("id", filter=deadline_bucket_q(bucket, today))
+
+    rows = qs.order_by().values("country", "level").annotate(total=Count("id"), **columns)
+
+    totals = Counter()
+    countries = Counter()
+    levels = Counter()
+    for row in rows:
+        if row["country"]:
+            countries[row["country"]] += row["total"]
+        if row["level"]:
+            levels[row["level"]] += row["total"]
+        totals["total"] += row["total"]
+        for name in columns:
+            totals[name] += row[name]
+
+    return {
+        "total": totals["total"],
+        "type": {value: totals[f"type_{value}"] for value in Listing.ListingType.values},
+        "remote": totals["remote"],
+        "deadline": {bucket: totals[f"deadline_{bucket}"] for bucket in (*DEADLINE_BUCKETS, "none")},
+        "country": countries.most_common(limit),
+        "level": levels.most_common(limit),
+    }
+
+
+def facet_cache_key(filters, today=None):
+    today = today or timezone.localdate()
+    normalized = json.dumps(filters, sort_keys=True, default=str)
+    digest = hashlib.sha1(f"{today.isoformat()}|{normalized}".encode()).hexdigest()
+    return f"listings:facets:{digest}"
+
+
+def cached_facet_counts(qs, filters, ttl=FACET_CACHE_TTL):
+    """
+    facet_counts() for ``qs`` plus the popular tags (``"tags"``), cached
+    under the normalized ``filters``.
+    """
+    today = timezone.localdate()
+    key = facet_cache_key(filters, today)
+    facets = cache.get(key)
+    if facets is None:
+        facets = facet_counts(qs, today)
+        facets["tags"] = tag_counts(qs, limit=15)
+        cache.set(key, facets, ttl)
+    return facets
@@ -0,0 +1,79 @@
+"""
+Browse filters shared by the listings page and the API.
+
+``listing_filters()`` normalizes query parameters into a plain dict (also
+used as the facet cache key); ``filter_listings()`` turns that dict into
+the ACTIVE-listings queryset plus the keyset ordering to page it by.
+"""
+
+from django.utils import timezone
+
+from .facets import deadline_bucket_q
+from .models import Listing
+from .search import search_listings
+from .tags import filter_by_tags, normalize_slugs
+
+TRUTHY = ("1", "true", "True", "yes", "YES")
+
+
+def listing_filters(params):
+    """Normalized filter values from a QueryDict."""
+    remote = (params.get("remote") or "").strip()
+    return {
+        "q": (params.get("q") or "").strip(),
+        "type": (params.get("type") or "").strip(),
+        "country": (params.get("country") or "").strip(),
+        "level": (params.get("level") or "").strip(),
+        "remote": "1" if remote in TRUTHY else "",
+        "deadline": (params.get("deadline") or "").strip(),
+        "tags": normalize_slugs(params.getlist("tag")),
+        # "any" = OR across tags; default is AND
+        "tag_mode": "any" if params.get("tag_mode") == "any" else "",
+    }
+
+
+def filter_listings(filters):
+    """
+    ``(queryset, ordering)`` for ``filters``. ``ordering`` is a
+    KeysetPaginator ordering, or None for ranked search results.
+    """
+    qs = Listing.objects.filter(status=Listing.Status.ACTIVE)
+    # Keyset ordering; the last key must be unique
+    ordering = (("created_at", True), ("id", True))
+
+    q = filters["q"]
+    if q:
+        # Ranked full-text match (best hits first)
+        qs = search_listings(qs, q)
+        ordering = None
+
+    t = filters["type"]
+    if t:
+        qs = qs.filter(type=t)
+
+    country = filters["country"]
+    if country:
+        qs = qs.filter(country__iexact=country)
+
+    level = filters["level"]
+    if level:
+        qs = qs.filter(level__iexact=level)
+
+    if filters["remote"]:
+        qs = qs.filter(remote=True)
+
+    if filters["tags"]:
+        qs = filter_by_tags(qs, filters["tags"], match_all=filters["tag_mode"] != "any")
+
+    deadline = filters["deadline"]
+    if deadline == "soon":
+        today = timezone.localdate()
+        qs = qs.filter(deadline__isnull=False, deadline__gte=today)
+        ordering = (("deadline", False), ("id", False))
+    elif deadline in ("week", "month"):
+        qs = qs.filter(deadline_bucket_q(deadline))
+        ordering = (("deadline", False), ("id", False))
+    elif deadline == "none":
+        qs = qs.filter(deadline_bucket_q(deadline))
+
+    return qs, ordering
@@ -0,0 +1,237 @@
+"""
+Bulk listing import from CSV or JSON Lines.
+
+Rows are streamed from the file, validated field by field and upserted
+on ``source_url`` in batches: one SELECT for the batch's existing rows,
+then ``bulk_create`` for new rows and an INSERT .. ON CONFLICT (id) DO
+UPDATE for rows that changed, inside a transaction. Memory use is bounded
+by the batch size, not the file size. The deadline rule from
+``Listing.save()`` is applied to every row before it is written, tags are
+synced per batch and listing caches are invalidated once at the end.
+"""
+
+import csv
+import json
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import invalidate_listing_caches
+from .models import Listing
+from .tags import sync_listing_tags
+
+IMPORT_FIELDS = (
+    "type", "title", "organization", "country", "city", "deadline", "remote",
+    "level", "description", "apply_url", "source_url", "tags",
+    "is_verified", "is_featured", "status",
+)
+BOOLEAN_FIELDS = ("remote", "is_verified", "is_featured")
+TRUTHY = ("1", "true", "yes", "y", "t")
+FALSY = ("", "0", "false", "no", "n", "f")
+MAX_ERRORS = 1000  # error messages kept; the count keeps going
+
+
+class RowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportStats:
+    read: int = 0
+    created: int = 0
+    updated: int = 0
+    invalid: int = 0
+    errors: list = field(default_factory=list)  # [(line, message)], first MAX_ERRORS
+
+    def error(self, line, message):
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+
+def read_rows(fp, fmt):
+    """Yield ``(line_number, dict)`` from an open text file in ``csv`` or ``jsonl`` format."""
+    if fmt == "csv":
+        reader = csv.DictReader(fp)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(fp, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, RowError(f"invalid JSON: {exc}")
+            continue
+        if not isinstance(row, dict):
+            yield line_number, RowError("expected a JSON object")
+            continue
+        yield line_number, row
+
+
+def _boolean(name, value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUTHY:
+        return True
+    if text in FALSY:
+        return False
+    raise RowError(f"{name}: expected a boolean, got {value!r}")
+
+
+def clean_row(raw, default_status=None):
+    """
+    Validate ``raw`` against the Listing fields it provides. Returns a dict
+    of python values; unknown keys are ignored.
+    """
+    data = {}
+    for name in IMPORT_FIELDS:
+        if name not in raw:
+            continue
+        value = raw[name]
+        if value is None:
+            value = ""
+        if name in BOOLEAN_FIELDS:
+            data[name] = _boolean(name, value)
+            continue
+        if isinstance(value, (list, dict)):
+            # JSON Lines only; CharField.clean() would save their repr
+            raise RowError(f"{name}: expected a single value, got {value!r}")
+        if isinstance(value, str):
+            value = value.strip()
+        if name in ("type", "status"):
+            if not isinstance(value, str):
+                raise RowError(f"{name}: expected a string, got {value!r}")
+            value = value.upper()
+        model_field = Listing._meta.get_field(name)
+        if value == "" and model_field.null:
+            value = None
+        try:
+            data[name] = model_field.clean(value, None)
+        except ValidationError as exc:
+            raise RowError(f"{name}: {' '.join(exc.messages)}") from exc
+        except (TypeError, ValueError) as exc:
+            # Parsers that only take strings, e.g. DateField given a number
+            raise RowError(f"{name}: invalid value {value!r}") from exc
+
+    if not data.get("source_url"):
+        raise RowError("source_url is required")
+    if default_status and not data.get("status"):
+        data["status"] = default_status
+    return data
+
+
+def apply_deadline_status(listing, today):
+    """Listing.save()'s deadline rule, for rows written without save()."""
+    if listing.deadline:
+        if listing.deadline < today:
+            listing.status = Listing.Status.EXPIRED
+        elif listing.status == Listing.Status.EXPIRED:
+            listing.status = Listing.Status.ACTIVE
+
+
+def write_batch(batch, today):
+    """
+    Upsert one batch of cleaned rows; returns ``(created, updated)``.
+    Existing rows whose values don't change are left alone.
+    """
+    # Last row wins for a source_url repeated within the batch.
+    by_url = {}
+    for data in batch:
+        by_url[data["source_url"]] = data
+
+    now = timezone.now()
+    with transaction.atomic():
+        existing = {}
+        for listing in Listing.objects.filter(source_url__in=by_url).order_by("-id"):
+            existing[listing.source_url] = listing
+
+        to_create, to_update, update_fields = [], [], {"status", "updated_at"}
+        for url, data in by_url.items():
+            listing = existing.get(url)
+            if listing is None:
+                listing = Listing(**data)
+                apply_deadline_status(listing, today)
+                listing.updated_at = now
+                to_create.append(listing)
+                continue
+
+            before = {name: getattr(listing, name) for name in (*data, "status")}
+            for name, value in data.items():
+                setattr(listing, name, value)
+            apply_deadline_status(listing, today)
+            changed = [name for name, value in before.items() if getattr(listing, name) != value]
+            if not changed:
+                # Re-importing an unchanged row costs only its share of the SELECT.
+                continue
+            update_fields.update(changed)
+            listing.updated_at = now
+            to_update.append(listing)
+
+        if not all(listing.type and listing.title for listing in to_create):
+            raise RowError("type and title are required for new listings")
+        Listing.objects.bulk_create(to_create)
+        if to_update:
+            # INSERT .. ON CONFLICT (id) DO UPDATE: bulk_update()'s per-row
+            # CASE expressions are several times slower to build.
+            Listing.objects.bulk_create(
+                to_update,
+                update_conflicts=True,
+                unique_fields=["id"],
+                update_fields=sorted(update_fields),
+            )
+        sync_listing_tags(to_create + to_update)
+    return len(to_create), len(to_update)
+
+
+def import_listings(rows, batch_size=1000, default_status=None, on_batch=None):
+    """
+    Import ``(line_number, raw)`` rows (see read_rows()). Invalid rows are
+    recorded in the returned ImportStats and skipped.
+    """
+    stats = ImportStats()
+    today = timezone.localdate()
+    batch, lines = [], []
+
+    def flush():
+        try:
+            created, updated = write_batch(batch, today)
+        except RowError:
+            # A batch-level problem: retry row by row to pin it down.
+            created = updated = 0
+            for line, data in zip(lines, batch):
+                try:
+                    c, u = write_batch([data], today)
+                except RowError as row_exc:
+                    stats.error(line, str(row_exc))
+                else:
+                    created, updated = created + c, updated + u
+        stats.created += created
+        stats.updated += updated
+        batch.clear()
+        lines.clear()
+        if on_batch:
+            on_batch(stats)
+
+    for line, raw in rows:
+        stats.read += 1
+        try:
+            if isinstance(raw, RowError):
+                raise raw
+            batch.append(clean_row(raw, default_status))
+            lines.append(line)
+        except RowError as exc:
+            stats.error(line, str(exc))
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    if stats.created or stats.updated:
+        invalidate_listing_caches()
+    return stats
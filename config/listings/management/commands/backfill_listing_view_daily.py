@@ -0,0 +1,26 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from listings.rollups import backfill_daily_views
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild ListingViewDaily from the raw ListingView rows. Safe to re-run; "
+        "each day is replaced in its own transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="First day to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--until", help="Last day to rebuild (YYYY-MM-DD)")
+
+    def handle(self, *args, **opts):
+        try:
+            start = date.fromisoformat(opts["since"]) if opts["since"] else None
+            end = date.fromisoformat(opts["until"]) if opts["until"] else None
+        except ValueError as exc:
+            raise CommandError(f"Invalid date: {exc}") from exc
+
+        written = backfill_daily_views(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} daily rollup rows."))
@@ -0,0 +1,68 @@
+import random
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+
+from listings.models import Listing
+
+from .bench_search import COUNTRIES, ORGS, WORDS, _percentile
+
+PATHS = {
+    "html": "/en/listings/?page={page}",
+    "api": "/api/v1/listings/?page={page}",
+    "api-sparse": "/api/v1/listings/?fields=id,title,deadline&page={page}",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the listings browse page (HTML) against the v1 JSON API on a "
+        "synthetic dataset. Everything runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20_000)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+        client = Client(HTTP_HOST="localhost")
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {opts['rows']} listings on {connection.vendor}...")
+            Listing.objects.bulk_create(
+                [
+                    Listing(
+                        type=rng.choice(Listing.ListingType.values),
+                        title=" ".join(rng.sample(WORDS, 4)).title(),
+                        organization=rng.choice(ORGS),
+                        country=rng.choice(COUNTRIES),
+                        tags=", ".join(rng.sample(WORDS, 3)),
+                        description=" ".join(rng.choice(WORDS) for _ in range(60)),
+                        status=Listing.Status.ACTIVE,
+                    )
+                    for _ in range(opts["rows"])
+                ],
+                batch_size=2000,
+            )
+            cache.clear()
+
+            pages = [rng.randint(1, 20) for _ in range(opts["requests"])]
+            for label, path in PATHS.items():
+                samples, sizes = [], []
+                for page in pages:
+                    started = time.perf_counter()
+                    response = client.get(path.format(page=page))
+                    samples.append((time.perf_counter() - started) * 1000)
+                    sizes.append(len(response.content))
+                self.stdout.write(
+                    f"{label:>10}: p50={statistics.median(samples):.2f}ms "
+                    f"p95={_percentile(samples, 95):.2f}ms "
+                    f"body={statistics.median(sizes) / 1024:.1f}KiB (n={len(samples)})"
+                )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,78 @@
+import random
+import statistics
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from config.buffering import WriteBehindBuffer
+from listings.models import Listing, ListingView
+from listings.tracking import write_listing_views
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark ListingView ingestion: one get_or_create per hit vs. the "
+        "write-behind buffer. Everything runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=20_000)
+        parser.add_argument("--listings", type=int, default=500)
+        parser.add_argument("--visitors", type=int, default=5_000)
+        parser.add_argument("--flush-size", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+        with transaction.atomic():
+            Listing.objects.bulk_create(
+                [Listing(type=Listing.ListingType.JOB, title=f"Bench {i}") for i in range(opts["listings"])]
+            )
+            ids = list(Listing.objects.values_list("id", flat=True))
+            today = date.today()
+            events = [
+                (rng.choice(ids), f"visitor{rng.randrange(opts['visitors'])}", today)
+                for _ in range(opts["events"])
+            ]
+            self.stdout.write(
+                f"{len(events)} hits, {len(set(events))} unique (listing, visitor, day) on {connection.vendor}"
+            )
+
+            with transaction.atomic():
+                started = time.perf_counter()
+                for listing_id, session_key, day in events:
+                    ListingView.objects.get_or_create(listing_id=listing_id, session_key=session_key, date=day)
+                self._report("per-hit", len(events), time.perf_counter() - started)
+                transaction.set_rollback(True)
+
+            flushes = []
+
+            def timed_write(batch):
+                started = time.perf_counter()
+                write_listing_views(batch)
+                flushes.append((time.perf_counter() - started) * 1000)
+
+            buffer = WriteBehindBuffer(
+                timed_write, flush_size=opts["flush_size"],
+                flush_interval=float("inf"), max_pending=len(events), name="bench",
+                flush_on_exit=False,
+            )
+            with transaction.atomic():
+                started = time.perf_counter()
+                for event in events:
+                    buffer.add(event)
+                buffer.flush()
+                self._report("buffered", len(events), time.perf_counter() - started)
+                if flushes:
+                    self.stdout.write(
+                        f"    {len(flushes)} flushes, median {statistics.median(flushes):.1f}ms, "
+                        f"max {max(flushes):.1f}ms; {ListingView.objects.count()} rows"
+                    )
+                transaction.set_rollback(True)
+
+            transaction.set_rollback(True)
+
+    def _report(self, label, events, seconds):
+        self.stdout.write(f"{label:>10}: {events / seconds:,.0f} hits/s ({seconds * 1000:.0f}ms total)")
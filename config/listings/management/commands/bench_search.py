@@ -0,0 +1,111 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from listings.models import Listing
+from listings.search import search_listings
+
+
+WORDS = (
+    "software engineer data science scholarship master phd bachelor course "
+    "python research fellowship internship health education design marketing "
+    "finance medicine law physics biology remote startup art history climate "
+    "energy policy nursing teacher analyst developer product manager writer"
+).split()
+COUNTRIES = ["Germany", "Canada", "Turkey", "Japan", "Afghanistan", "USA", "France", "Norway"]
+ORGS = ["DAAD", "UNICEF", "Google", "Chevening", "Fulbright", "WHO", "Erasmus", "Coursera"]
+# Long tail so that most terms are selective, like real catalogue text.
+RARE = [f"{w}{n}" for w in ("topic", "skill", "field") for n in range(2000)]
+VOCAB = WORDS + RARE
+QUERIES = ["software", "data sci", "scholarship germany", "phd physics", "remote python",
+           "fulbright", "climate policy", "nurs", "master finance", "art"]
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark listing search latency (ranked full-text vs. the old icontains "
+        "chain) on a synthetic dataset. Everything runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+        with transaction.atomic():
+            self._seed(rng, opts["rows"])
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE listings_listing")
+
+            base = Listing.objects.filter(status=Listing.Status.ACTIVE)
+            size = opts["page_size"]
+            # Half broad queries (worst case: thousands of hits to rank),
+            # half long-tail terms.
+            queries = [
+                rng.choice(QUERIES) if i % 2 else rng.choice(RARE)
+                for i in range(opts["queries"])
+            ]
+
+            self._report("fulltext", queries, lambda q: list(search_listings(base, q)[:size]))
+            self._report("icontains", queries, lambda q: list(self._legacy(base, q)[:size]))
+
+            transaction.set_rollback(True)
+
+    def _seed(self, rng, rows):
+        self.stdout.write(f"Seeding {rows} listings on {connection.vendor}...")
+        started = time.perf_counter()
+        batch = []
+        for i in range(rows):
+            batch.append(Listing(
+                type=rng.choice(Listing.ListingType.values),
+                title=" ".join(rng.sample(WORDS, 3) + [rng.choice(RARE)]).title(),
+                organization=rng.choice(ORGS),
+                country=rng.choice(COUNTRIES),
+                city="",
+                tags=", ".join(rng.sample(WORDS, 3)),
+                description=" ".join(rng.choice(VOCAB) for _ in range(40)),
+                status=Listing.Status.ACTIVE,
+            ))
+            if len(batch) >= 2000:
+                Listing.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Listing.objects.bulk_create(batch)
+        self.stdout.write(f"  seeded in {time.perf_counter() - started:.1f}s")
+
+    @staticmethod
+    def _legacy(qs, q):
+        return qs.filter(
+            Q(title__icontains=q) |
+            Q(organization__icontains=q) |
+            Q(country__icontains=q) |
+            Q(city__icontains=q) |
+            Q(tags__icontains=q)
+        ).order_by("-created_at")
+
+    def _report(self, label, queries, run):
+        samples = []
+        for q in queries:
+            started = time.perf_counter()
+            run(q)
+            samples.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f"{label:>10}: p50={statistics.median(samples):.2f}ms "
+            f"p95={_percentile(samples, 95):.2f}ms "
+            f"p99={_percentile(samples, 99):.2f}ms "
+            f"max={max(samples):.2f}ms (n={len(samples)})"
+        )
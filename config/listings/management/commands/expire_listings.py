@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from listings.expiry import expire_listings
+
+
+class Command(BaseCommand):
+    help = "Mark every listing whose deadline has passed as EXPIRED (one UPDATE). Meant for cron."
+
+    def handle(self, *args, **opts):
+        expired = expire_listings()
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} listing(s)."))
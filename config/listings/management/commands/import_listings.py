@@ -0,0 +1,65 @@
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from listings.importer import import_listings, read_rows
+from listings.models import Listing
+
+
+class Command(BaseCommand):
+    help = (
+        "Import listings from a CSV (with a header row) or JSON Lines file, "
+        "creating or updating rows by source_url."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=("csv", "jsonl"), help="Default: from the file extension")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--status", choices=Listing.Status.values,
+            help="Status for rows that don't set one (default: the model default, DRAFT)",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Validate and write, then roll back")
+        parser.add_argument("--max-errors", type=int, default=20, help="Error lines to print")
+
+    def handle(self, *args, **opts):
+        path = opts["path"]
+        fmt = opts["format"] or ("csv" if path.lower().endswith(".csv") else "jsonl")
+        started = time.perf_counter()
+
+        def progress(stats):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"  {stats.read} rows read ({stats.read / elapsed:,.0f} rows/s)")
+
+        # Each batch commits on its own; only a dry run needs one transaction
+        # around the whole file to roll back.
+        outer = transaction.atomic() if opts["dry_run"] else nullcontext()
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as fp, outer:
+                stats = import_listings(
+                    read_rows(fp, fmt),
+                    batch_size=opts["batch_size"],
+                    default_status=opts["status"],
+                    on_batch=progress if opts["verbosity"] > 1 else None,
+                )
+                if opts["dry_run"]:
+                    transaction.set_rollback(True)
+        except OSError as exc:
+            raise CommandError(exc) from exc
+
+        elapsed = time.perf_counter() - started
+        for line, message in stats.errors[: opts["max_errors"]]:
+            self.stderr.write(f"line {line}: {message}")
+        if stats.invalid > opts["max_errors"]:
+            self.stderr.write(f"... and {stats.invalid - opts['max_errors']} more")
+
+        summary = (
+            f"{stats.read} rows in {elapsed:.1f}s ({stats.read / max(elapsed, 1e-9):,.0f} rows/s): "
+            f"{stats.created} created, {stats.updated} updated, {stats.invalid} invalid"
+        )
+        if opts["dry_run"]:
+            summary += " (dry run, rolled back)"
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from listings.changes import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete listing tombstones older than LISTING_TOMBSTONE_RETENTION_DAYS. "
+        "Changes-feed cursors older than that get 410 and must resync. Meant for cron."
+    )
+
+    def handle(self, *args, **opts):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {deleted} tombstone(s) older than {settings.LISTING_TOMBSTONE_RETENTION_DAYS} day(s)."
+        ))
@@ -0,0 +1,76 @@
+from django.db import migrations
+
+
+PG_FORWARD = (
+    """
+    ALTER TABLE listings_listing ADD COLUMN search_document tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(tags, '')), 'B') ||
+        setweight(to_tsvector('simple'::regconfig,
+            coalesce(organization, '') || ' ' || coalesce(country, '') || ' ' || coalesce(city, '')), 'C') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(description, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX listings_listing_search_gin ON listings_listing USING gin (search_document)",
+)
+
+PG_REVERSE = (
+    "DROP INDEX IF EXISTS listings_listing_search_gin",
+    "ALTER TABLE listings_listing DROP COLUMN IF EXISTS search_document",
+)
+
+# Sync triggers are installed by listings.search.ensure_sqlite_triggers on
+# post_migrate, because SQLite loses them whenever the table is rebuilt.
+SQLITE_FORWARD = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS listings_listing_fts USING fts5(
+        title, tags, organization, place, description,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO listings_listing_fts(rowid, title, tags, organization, place, description)
+    SELECT id, title, tags, organization, trim(country || ' ' || city), description
+    FROM listings_listing
+    """,
+)
+
+SQLITE_REVERSE = (
+    "DROP TRIGGER IF EXISTS listings_listing_fts_ai",
+    "DROP TRIGGER IF EXISTS listings_listing_fts_ad",
+    "DROP TRIGGER IF EXISTS listings_listing_fts_au",
+    "DROP TABLE IF EXISTS listings_listing_fts",
+)
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def forwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _run(schema_editor, PG_FORWARD)
+    elif vendor == "sqlite":
+        _run(schema_editor, SQLITE_FORWARD)
+
+
+def backwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _run(schema_editor, PG_REVERSE)
+    elif vendor == "sqlite":
+        _run(schema_editor, SQLITE_REVERSE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0003_listingview_savedlisting'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
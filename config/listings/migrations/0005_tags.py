@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0004_listing_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=60)),
+                ('slug', models.SlugField(allow_unicode=True, max_length=60, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='listing',
+            name='tags',
+            field=models.CharField(blank=True, help_text='Comma-separated tags (indexed as Tag rows on save)', max_length=255),
+        ),
+        migrations.CreateModel(
+            name='ListingTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='listings.listing')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listing_links', to='listings.tag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, related_name='listings', through='listings.ListingTag', to='listings.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='listingtag',
+            index=models.Index(fields=['tag', 'listing'], name='listing_tag_tag_listing_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='listingtag',
+            unique_together={('listing', 'tag')},
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.utils.text import slugify
+
+
+def split_tags(apps, schema_editor):
+    Listing = apps.get_model("listings", "Listing")
+    Tag = apps.get_model("listings", "Tag")
+    ListingTag = apps.get_model("listings", "ListingTag")
+
+    tag_ids = {}
+    links = []
+    for listing_id, raw in Listing.objects.exclude(tags="").values_list("id", "tags").iterator():
+        seen = set()
+        for part in raw.split(","):
+            name = " ".join(part.split())[:60]
+            slug = slugify(name, allow_unicode=True)[:60]
+            if not slug or slug in seen:
+                continue
+            seen.add(slug)
+            if slug not in tag_ids:
+                tag_ids[slug] = Tag.objects.get_or_create(slug=slug, defaults={"name": name})[0].id
+            links.append(ListingTag(listing_id=listing_id, tag_id=tag_ids[slug]))
+        if len(links) >= 1000:
+            ListingTag.objects.bulk_create(links, ignore_conflicts=True)
+            links = []
+    ListingTag.objects.bulk_create(links, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0005_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_tags, migrations.RunPython.noop),
+    ]
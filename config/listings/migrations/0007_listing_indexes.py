@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0006_split_listing_tags'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='listing_active_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['status', 'is_featured', 'created_at'], name='listing_active_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['status', 'deadline', 'id'], name='listing_active_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['type', 'remote', 'deadline'], name='listing_type_remote_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['remote', 'deadline'], name='listing_remote_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['deadline'], name='listing_deadline_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0007_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='listingview',
+            name='date',
+            field=models.DateField(default=django.utils.timezone.localdate, editable=False),
+        ),
+    ]
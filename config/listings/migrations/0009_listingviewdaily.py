@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0008_listingview_date_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingViewDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='listings.listing')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'listing'], name='listing_view_daily_date_idx')],
+                'unique_together': {('listing', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0009_listingviewdaily'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['source_url'], name='listing_source_url_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:27
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_saves(apps, schema_editor):
+    Listing = apps.get_model("listings", "Listing")
+    SavedListing = apps.get_model("listings", "SavedListing")
+    saves = (
+        SavedListing.objects.filter(listing=OuterRef("pk"))
+        .order_by().values("listing").annotate(c=Count("id")).values("c")
+    )
+    Listing.objects.update(saves_count=Coalesce(Subquery(saves), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0010_listing_source_url_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='saves_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_saves, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0011_listing_saves_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('listing_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['updated_at', 'id'], name='listing_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listingtombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='listing_tombstone_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0012_listingtombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='image_meta',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0013_image_meta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingVisitorSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('sketch', models.BinaryField()),
+                ('visitors', models.PositiveIntegerField(default=0)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visitor_sketches', to='listings.listing')),
+            ],
+            options={
+                'unique_together': {('listing', 'date')},
+            },
+        ),
+    ]
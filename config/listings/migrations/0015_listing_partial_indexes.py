@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0014_listingvisitorsketch'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_active_recent_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_active_featured_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_type_remote_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_remote_deadline_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listing',
+            name='listing_deadline_idx',
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['created_at', 'id'], name='listing_active_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('is_featured', True), ('status', 'ACTIVE')), fields=['created_at'], name='listing_active_featured_idx'),
+        ),
+    ]
@@ -3,6 +3,17 @@ from django.utils import timezone
 from django.conf import settings
 
 
+class Tag(models.Model):
+    name = models.CharField(max_length=60)
+    slug = models.SlugField(max_length=60, unique=True, allow_unicode=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
 class Listing(models.Model):
     class ListingType(models.TextChoices):
         JOB = "JOB", "Job"
@@ -18,6 +29,8 @@ class Listing(models.Model):
     title = models.CharField(max_length=255)
 
     image = models.ImageField(upload_to="listings/images/", blank=True, null=True)
+    # Responsive variants of image (mediafiles/variants.py)
+    image_meta = models.JSONField(default=dict, blank=True, editable=False)
 
     organization = models.CharField(max_length=255, blank=True)
     country = models.CharField(max_length=120, blank=True)
@@ -37,11 +50,25 @@ class Listing(models.Model):
     apply_url = models.URLField(blank=True)
     source_url = models.URLField(blank=True)
 
-    tags = models.CharField(max_length=255, blank=True, help_text="Comma-separated tags")
+    tags = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Comma-separated tags (indexed as Tag rows on save)"
+    )
+    tag_set = models.ManyToManyField(
+        Tag,
+        through="ListingTag",
+        related_name="listings",
+        blank=True,
+    )
 
     is_verified = models.BooleanField(default=False)
     is_featured = models.BooleanField(default=False)
 
+    # Denormalized SavedListing count, kept in step by toggle_save_listing
+    # (reconcile_counters repairs drift)
+    saves_count = models.PositiveIntegerField(default=0, editable=False)
+
     status = models.CharField(
         max_length=20,
         choices=Status.choices,
@@ -51,6 +78,27 @@ class Listing(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # home/listings_list: ACTIVE newest first (+ keyset on id). Partial:
+            # drafts and the growing tail of expired rows stay out of it.
+            models.Index(
+                fields=["created_at", "id"], condition=models.Q(status="ACTIVE"), name="listing_active_recent_idx",
+            ),
+            # home: featured block
+            models.Index(
+                fields=["created_at"], condition=models.Q(status="ACTIVE", is_featured=True),
+                name="listing_active_featured_idx",
+            ),
+            # listings_list: deadline=soon/week/month ordering; also the expiry
+            # sweep (status IN (ACTIVE, DRAFT)), so not partial
+            models.Index(fields=["status", "deadline", "id"], name="listing_active_deadline_idx"),
+            # import_listings: upsert on source_url
+            models.Index(fields=["source_url"], name="listing_source_url_idx"),
+            # Delta-sync feed (listings/changes.py)
+            models.Index(fields=["updated_at", "id"], name="listing_updated_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         # Auto-set status based on deadline (optional logic)
         if self.deadline:
@@ -66,10 +114,28 @@ class Listing(models.Model):
         return self.title
 
 
+class ListingTag(models.Model):
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name="tag_links")
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="listing_links")
+
+    class Meta:
+        unique_together = (("listing", "tag"),)
+        indexes = [
+            # tag -> listings lookups (filtering, per-tag counts)
+            models.Index(fields=["tag", "listing"], name="listing_tag_tag_listing_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.listing_id} #{self.tag_id}"
+
+
 class ListingView(models.Model):
     listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name="views")
+    # Visitor id (config.visitors.visitor_key), formerly the session key
     session_key = models.CharField(max_length=40)
-    date = models.DateField(auto_now_add=True)
+    # Set explicitly by the write-behind buffer (auto_now_add would stamp
+    # the flush date instead of the view date).
+    date = models.DateField(default=timezone.localdate, editable=False)
 
     class Meta:
         unique_together = (("listing", "session_key", "date"),)
@@ -78,6 +144,64 @@ class ListingView(models.Model):
         return f"View: listing={self.listing_id} session={self.session_key} date={self.date}"
 
 
+class ListingViewDaily(models.Model):
+    """
+    Per-day view totals for a listing, rolled up from ListingView when the
+    view buffer flushes (see listings/rollups.py).
+    """
+
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name="daily_views")
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = (("listing", "date"),)
+        indexes = [
+            models.Index(fields=["date", "listing"], name="listing_view_daily_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"Views: listing={self.listing_id} date={self.date} views={self.views}"
+
+
+class ListingTombstone(models.Model):
+    """
+    Record of a deleted listing, so the changes feed can tell mirrors to
+    drop it. Written by a post_delete signal; pruned after
+    LISTING_TOMBSTONE_RETENTION_DAYS.
+    """
+
+    listing_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["deleted_at", "id"], name="listing_tombstone_idx"),
+        ]
+
+    def __str__(self):
+        return f"Deleted listing={self.listing_id} at {self.deleted_at}"
+
+
+class ListingVisitorSketch(models.Model):
+    """
+    HyperLogLog sketch of one listing's distinct visitors on one day, kept
+    instead of ListingView rows when VISITOR_ANALYTICS = "sketch" (see
+    listings/sketches.py). ``visitors`` is the sketch's estimate.
+    """
+
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name="visitor_sketches")
+    date = models.DateField()
+    sketch = models.BinaryField()
+    visitors = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = (("listing", "date"),)
+
+    def __str__(self):
+        return f"Visitors: listing={self.listing_id} date={self.date} ~{self.visitors}"
+
+
 class SavedListing(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -0,0 +1,276 @@
+"""
+Keyset (cursor) pagination with cheap totals.
+
+Next/previous links carry an opaque cursor built from the boundary row's
+ordering keys, so turning a page is an index range scan instead of an
+ever-growing OFFSET. Jumping straight to a page number from the page bar
+falls back to OFFSET. Totals come from the cache (or a planner estimate on
+PostgreSQL) instead of a COUNT(*) on every page turn.
+"""
+
+import base64
+import hashlib
+import json
+import math
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+
+COUNT_CACHE_TTL = 60  # seconds
+
+# Above this many rows a PostgreSQL planner estimate is good enough.
+COUNT_ESTIMATE_THRESHOLD = 10_000
+
+ELLIPSIS = Paginator.ELLIPSIS
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction, [_dump(v) for v in values]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor(cursor) from exc
+    if direction not in ("n", "p") or not isinstance(values, list):
+        raise InvalidCursor(cursor)
+    return direction, values
+
+
+def _dump(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _estimated_count(qs):
+    """PostgreSQL planner row estimate for ``qs`` (None elsewhere)."""
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = qs.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_cache_key(qs):
+    sql, params = qs.order_by().query.sql_with_params()
+    digest = hashlib.sha1(f"{sql}|{params!r}".encode()).hexdigest()
+    return f"listings:count:{digest}"
+
+
+def cached_count(qs, key=None, ttl=COUNT_CACHE_TTL):
+    """
+    Total rows for ``qs``, served from the cache when possible.
+
+    On a miss, large PostgreSQL result sets use the planner estimate; small
+    ones (where the estimate is least reliable) get an exact COUNT(*).
+    """
+    key = key or count_cache_key(qs)
+    total = cache.get(key)
+    if total is None:
+        total = _estimated_count(qs)
+        if total is None or total < COUNT_ESTIMATE_THRESHOLD:
+            total = qs.count()
+        cache.set(key, total, ttl)
+    return total
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` over a unique ordering.
+
+    ``ordering`` is a sequence of ``(field_name, descending)`` pairs whose
+    last field must be unique (normally ``id``). Pass ``ordering=None`` to
+    keep the queryset's own ordering (e.g. search rank); pages are then
+    fetched by OFFSET only and no cursors are emitted.
+
+    ``count`` may be an int or a callable returning one; it is only
+    evaluated when a template asks for the total or the page bar.
+    """
+
+    ELLIPSIS = ELLIPSIS
+
+    def __init__(self, queryset, per_page, ordering=None, count=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering or ())
+        self._count = count
+
+    @property
+    def count(self):
+        if callable(self._count):
+            self._count = self._count()
+        elif self._count is None:
+            self._count = cached_count(self.queryset)
+        return self._count
+
+    @property
+    def num_pages(self):
+        return max(1, math.ceil(self.count / self.per_page))
+
+    def get_elided_page_range(self, number, on_each_side=2, on_ends=1):
+        """Same shape as Django's Paginator.get_elided_page_range()."""
+        num_pages = self.num_pages
+        if num_pages <= (on_each_side + on_ends) * 2:
+            yield from range(1, num_pages + 1)
+            return
+        if number > (1 + on_each_side + on_ends) + 1:
+            yield from range(1, on_ends + 1)
+            yield ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < (num_pages - on_each_side - on_ends) - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield ELLIPSIS
+            yield from range(num_pages - on_ends + 1, num_pages + 1)
+        else:
+            yield from range(number + 1, num_pages + 1)
+
+    def _ordered(self, qs, reverse=False):
+        if not self.ordering:
+            return qs
+        return qs.order_by(*self._order_by(reverse=reverse))
+
+    def _order_by(self, reverse=False):
+        return [
+            f"-{name}" if descending != reverse else name
+            for name, descending in self.ordering
+        ]
+
+    def _seek(self, values, reverse=False):
+        """Q() selecting rows strictly after ``values`` in (possibly reversed) order."""
+        fields = self.queryset.model._meta
+        try:
+            keys = [
+                fields.get_field(name).to_python(raw) if raw is not None else None
+                for (name, _), raw in zip(self.ordering, values)
+            ]
+        except (ValidationError, TypeError, ValueError) as exc:
+            # Well-formed cursor, values that don't fit the fields
+            raise InvalidCursor(values) from exc
+        seek = Q()
+        for i, (name, descending) in enumerate(self.ordering):
+            lookup = "lt" if descending != reverse else "gt"
+            clause = Q(**{f"{name}__{lookup}": keys[i]})
+            for j, (prev_name, _) in enumerate(self.ordering[:i]):
+                clause &= Q(**{prev_name: keys[j]})
+            seek |= clause
+        return seek
+
+    def _keys(self, obj):
+        if isinstance(obj, dict):  # .values() rows
+            return [obj[name] for name, _ in self.ordering]
+        return [getattr(obj, name) for name, _ in self.ordering]
+
+    def page(self, number=1, cursor=None):
+        """
+        Return a KeysetPage.
+
+        With a cursor the page is fetched by seeking past the cursor's keys;
+        without one it is fetched by OFFSET from ``number`` (page bar jumps).
+        """
+        number = max(1, int(number or 1))
+        size = self.per_page
+
+        if cursor and self.ordering:
+            direction, values = decode_cursor(cursor)
+            if len(values) != len(self.ordering):
+                raise InvalidCursor(cursor)
+            reverse = direction == "p"
+            rows = list(
+                self._ordered(self.queryset.filter(self._seek(values, reverse=reverse)), reverse)[: size + 1]
+            )
+            more = len(rows) > size
+            rows = rows[:size]
+            if reverse:
+                rows.reverse()
+                has_previous, has_next = more, True
+            else:
+                has_previous, has_next = number > 1, more
+        else:
+            if number > 1 and number > self.num_pages:
+                number = self.num_pages
+            offset = (number - 1) * size
+            rows = list(self._ordered(self.queryset)[offset: offset + size + 1])
+            has_next = len(rows) > size
+            rows = rows[:size]
+            has_previous = number > 1
+
+        return KeysetPage(self, rows, number, has_previous, has_next)
+
+
+class KeysetPage:
+    """Duck-types django.core.paginator.Page for the listing templates."""
+
+    def __init__(self, paginator, object_list, number, has_previous, has_next):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.number = number
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __repr__(self):
+        return f"<KeysetPage {self.number}>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1 if self.object_list else 0
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list or not self.paginator.ordering:
+            return ""
+        return encode_cursor("n", self.paginator._keys(self.object_list[-1]))
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list or not self.paginator.ordering:
+            return ""
+        return encode_cursor("p", self.paginator._keys(self.object_list[0]))
+
+    @property
+    def page_range(self):
+        return list(self.paginator.get_elided_page_range(self.number))
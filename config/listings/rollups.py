@@ -0,0 +1,104 @@
+"""
+Daily rollup of ListingView rows.
+
+``ListingViewDaily`` holds one row per (listing, date) with the number of
+distinct visitors that day. Rows are refreshed by recounting the raw
+ListingView rows of the pairs a flush touched, so the rollup stays exact
+even when the raw insert ignored duplicates from another worker. Readers
+(dashboard, popular listings) sum the rollup; their cost scales with
+listings x days, not with raw view volume.
+"""
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import Listing, ListingView, ListingViewDaily
+
+UPSERT_BATCH_SIZE = 500
+
+
+def upsert_daily_views(rows):
+    """Insert or overwrite ``(listing_id, date, views)`` rollup rows."""
+    ListingViewDaily.objects.bulk_create(
+        [ListingViewDaily(listing_id=listing_id, date=date, views=views) for listing_id, date, views in rows],
+        batch_size=UPSERT_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["listing", "date"],
+        update_fields=["views"],
+    )
+
+
+def refresh_daily_views(pairs):
+    """Recount and upsert the rollup rows for the given (listing_id, date) pairs."""
+    pairs = set(pairs)
+    if not pairs:
+        return 0
+    counts = (
+        ListingView.objects.filter(
+            listing_id__in={listing_id for listing_id, _ in pairs},
+            date__in={date for _, date in pairs},
+        )
+        .values_list("listing_id", "date")
+        .annotate(views=Count("id"))
+        .order_by()
+    )
+    rows = [row for row in counts if (row[0], row[1]) in pairs]
+    with transaction.atomic():
+        upsert_daily_views(rows)
+    return len(rows)
+
+
+def backfill_daily_views(start=None, end=None):
+    """Rebuild the rollup from raw ListingView rows, one day at a time."""
+    days = ListingView.objects.order_by().values_list("date", flat=True).distinct()
+    if start:
+        days = days.filter(date__gte=start)
+    if end:
+        days = days.filter(date__lte=end)
+
+    written = 0
+    for day in sorted(days):
+        rows = list(
+            ListingView.objects.filter(date=day)
+            .values_list("listing_id", "date")
+            .annotate(views=Count("id"))
+            .order_by()
+        )
+        with transaction.atomic():
+            ListingViewDaily.objects.filter(date=day).delete()
+            upsert_daily_views(rows)
+        written += len(rows)
+    return written
+
+
+def view_totals(since=None):
+    """Total views in the rollup, optionally from ``since`` on."""
+    qs = ListingViewDaily.objects.all()
+    if since:
+        qs = qs.filter(date__gte=since)
+    return qs.aggregate(total=Sum("views"))["total"] or 0
+
+
+def views_by_day(since):
+    """``{date: views}`` from ``since`` on."""
+    rows = (
+        ListingViewDaily.objects.filter(date__gte=since)
+        .values_list("date")
+        .annotate(views=Sum("views"))
+        .order_by()
+    )
+    return dict(rows)
+
+
+def popular_listings(limit=8, since=None):
+    """``[(listing, views)]`` for the most viewed listings, optionally since a date."""
+    qs = ListingViewDaily.objects.all()
+    if since:
+        qs = qs.filter(date__gte=since)
+    top = list(
+        qs.values_list("listing_id")
+        .annotate(views=Sum("views"))
+        .order_by("-views", "listing_id")[:limit]
+    )
+    listings = Listing.objects.in_bulk([listing_id for listing_id, _ in top])
+    return [(listings[listing_id], views) for listing_id, views in top if listing_id in listings]
@@ -0,0 +1,78 @@
+"""
+Saved-listing state for the current user.
+
+``saved_listing_ids(request)`` returns the ids of every listing the user
+has saved: one query per cache miss, then a per-user cached set, memoized
+on the request so any number of cards and templates share it. The cached
+set is dropped whenever ``toggle_saved()`` changes one of the user's rows.
+"""
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import Listing, SavedListing
+
+SAVED_IDS_TTL = 60 * 60 * 24  # seconds
+
+
+def saved_ids_cache_key(user_id):
+    return f"listings:saved:{user_id}"
+
+
+def saved_listing_ids(request):
+    """frozenset of listing ids saved by ``request.user`` (empty for anonymous users)."""
+    if not request.user.is_authenticated:
+        return frozenset()
+    ids = getattr(request, "_saved_listing_ids", None)
+    if ids is None:
+        key = saved_ids_cache_key(request.user.pk)
+        ids = cache.get(key)
+        if ids is None:
+            ids = frozenset(
+                SavedListing.objects.filter(user_id=request.user.pk).values_list("listing_id", flat=True)
+            )
+            cache.set(key, ids, SAVED_IDS_TTL)
+        request._saved_listing_ids = ids
+    return ids
+
+
+def saved_state_token(request):
+    """Stable string for the user's saved set, for ETags of pages that show it."""
+    return ",".join(map(str, sorted(saved_listing_ids(request))))
+
+
+def invalidate_saved_ids(user_id):
+    key = saved_ids_cache_key(user_id)
+    cache.delete(key)
+    # Again after commit, in case a concurrent request re-cached the old set.
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def toggle_saved(user, listing_id):
+    """
+    Save or unsave a listing for ``user``; returns the new saved state.
+
+    Unsaving is two statements: the DELETE (which doubles as the existence
+    check) and an F() update of ``Listing.saves_count`` in the same
+    transaction. Saving adds the INSERT. SavedListing has no delete
+    signals, so Django issues the DELETE directly without a SELECT first.
+    """
+    with transaction.atomic():
+        deleted, _ = SavedListing.objects.filter(user=user, listing_id=listing_id).delete()
+        if deleted:
+            Listing.objects.filter(pk=listing_id).update(saves_count=Greatest(F("saves_count") - 1, 0))
+            saved = False
+        else:
+            try:
+                with transaction.atomic():
+                    SavedListing.objects.create(user=user, listing_id=listing_id)
+            except IntegrityError:
+                # A concurrent request saved it first and counted it.
+                saved = True
+            else:
+                Listing.objects.filter(pk=listing_id).update(saves_count=F("saves_count") + 1)
+                saved = True
+    invalidate_saved_ids(user.pk)
+    return saved
@@ -0,0 +1,167 @@
+"""
+Full-text search for listings.
+
+PostgreSQL keeps a weighted ``tsvector`` (``search_document``) as a stored
+generated column with a GIN index, so it is always in sync with the row.
+SQLite keeps an FTS5 shadow table (``listings_listing_fts``) that is
+maintained by triggers on insert/update/delete.
+
+Weights: title > tags > organization/country/city > description.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "listings_listing_fts"
+
+# bm25() column weights, in FTS5 column order:
+# title, tags, organization, place, description
+FTS_WEIGHTS = (10.0, 5.0, 3.0, 3.0, 1.0)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# SQLite drops triggers whenever Django rebuilds the table (AlterField,
+# AddField with a default, ...), so they are (re)created on post_migrate
+# instead of living only in the migration.
+SQLITE_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS listings_listing_fts_ai
+    AFTER INSERT ON listings_listing BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, tags, organization, place, description)
+        VALUES (new.id, new.title, new.tags, new.organization,
+                trim(new.country || ' ' || new.city), new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS listings_listing_fts_ad
+    AFTER DELETE ON listings_listing BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS listings_listing_fts_au
+    AFTER UPDATE OF title, tags, organization, country, city, description
+    ON listings_listing BEGIN
+        UPDATE {FTS_TABLE}
+        SET title = new.title,
+            tags = new.tags,
+            organization = new.organization,
+            place = trim(new.country || ' ' || new.city),
+            description = new.description
+        WHERE rowid = new.id;
+    END
+    """,
+)
+
+
+def tokenize(query):
+    """Split a raw user query into lower-cased word tokens."""
+    return [t.lower() for t in _TOKEN_RE.findall(query or "")][:16]
+
+
+# Per-database memo of whether the FTS5 table exists (avoids a
+# sqlite_master lookup on every search).
+_fts_available = {}
+
+
+def _has_fts_table():
+    name = str(connection.settings_dict["NAME"])
+    if name not in _fts_available:
+        _fts_available[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_available[name]
+
+
+def ensure_sqlite_triggers(using=None, **kwargs):
+    """post_migrate hook: make sure the FTS5 sync triggers exist."""
+    from django.db import connections
+
+    conn = connections[using or "default"]
+    if conn.vendor != "sqlite":
+        return
+    if FTS_TABLE not in conn.introspection.table_names():
+        return
+    with conn.cursor() as cursor:
+        for sql in SQLITE_TRIGGERS:
+            cursor.execute(sql)
+
+
+def rebuild_index():
+    """Re-populate the SQLite shadow table from scratch (no-op elsewhere)."""
+    if connection.vendor != "sqlite" or not _has_fts_table():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"""
+            INSERT INTO {FTS_TABLE}(rowid, title, tags, organization, place, description)
+            SELECT id, title, tags, organization, trim(country || ' ' || city), description
+            FROM listings_listing
+            """
+        )
+
+
+def _icontains(qs, tokens):
+    for token in tokens:
+        qs = qs.filter(
+            Q(title__icontains=token) |
+            Q(organization__icontains=token) |
+            Q(country__icontains=token) |
+            Q(city__icontains=token) |
+            Q(tags__icontains=token)
+        )
+    return qs.annotate(search_rank=RawSQL("0", (), output_field=FloatField()))
+
+
+def search_listings(qs, query):
+    """
+    Filter ``qs`` down to listings matching ``query``.
+
+    Every token must match (prefix match on the last keystrokes too).
+    The queryset is annotated with ``search_rank`` (higher is better) and
+    ordered by it, newest first on ties.
+
+    On SQLite the shadow table is joined in with ``extra()``, so aggregate
+    over the returned queryset directly instead of nesting it in another
+    query as a subquery.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return qs
+
+    table = qs.model._meta.db_table
+
+    if connection.vendor == "postgresql":
+        tsquery = " & ".join(f"{t}:*" for t in tokens)
+        qs = qs.alias(
+            search_match=RawSQL(
+                f"\"{table}\".\"search_document\" @@ to_tsquery('simple', %s)",
+                (tsquery,),
+                output_field=BooleanField(),
+            )
+        ).filter(search_match=True).annotate(
+            search_rank=RawSQL(
+                f"ts_rank(\"{table}\".\"search_document\", to_tsquery('simple', %s))",
+                (tsquery,),
+                output_field=FloatField(),
+            )
+        )
+    elif connection.vendor == "sqlite" and _has_fts_table():
+        match = " AND ".join(f'"{t}"*' for t in tokens)
+        weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+        # Join the shadow table so SQLite drives the query from the FTS
+        # index and bm25() is computed once per hit. bm25() is negative,
+        # lower is better: flip it so search_rank means the same thing on
+        # every backend.
+        qs = qs.extra(
+            select={"search_rank": f"-bm25({FTS_TABLE}, {weights})"},
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = \"{table}\".\"id\"", f"{FTS_TABLE} MATCH %s"],
+            params=[match],
+        )
+    else:
+        qs = _icontains(qs, tokens)
+
+    return qs.order_by("-search_rank", "-created_at", "-id")
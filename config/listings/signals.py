@@ -0,0 +1,30 @@
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import invalidate_listing_caches
+from .expiry import maybe_expire_listings
+from .models import Listing, ListingTombstone
+from .tags import sync_listing_tags
+
+
+@receiver(post_save, sender=Listing, dispatch_uid="listings_sync_tags")
+def sync_tags_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or (created and not instance.tags):
+        return
+    sync_listing_tags([instance])
+
+
+@receiver(post_save, sender=Listing, dispatch_uid="listings_invalidate_on_save")
+@receiver(post_delete, sender=Listing, dispatch_uid="listings_invalidate_on_delete")
+def invalidate_on_change(sender, **kwargs):
+    invalidate_listing_caches()
+
+
+@receiver(post_delete, sender=Listing, dispatch_uid="listings_tombstone_on_delete")
+def tombstone_on_delete(sender, instance, **kwargs):
+    ListingTombstone.objects.create(listing_id=instance.pk)
+
+
+# Periodic deadline sweep, run after the response has been sent.
+request_finished.connect(maybe_expire_listings, dispatch_uid="listings_expire_after_request")
@@ -0,0 +1,103 @@
+"""
+Per-day HyperLogLog visitor sketches (VISITOR_ANALYTICS = "sketch").
+
+Instead of one row per visitor per day, the write-behind buffers fold
+visitor keys into one sketch per day (VisitorSketch, site-wide) and per
+listing per day (ListingVisitorSketch). A sketch answers "how many
+distinct visitors" within ~0.8% and is a few KB at most (listings/hll.py).
+Because merging is a register-wise max, re-adding a visitor that another
+worker already wrote changes nothing, and the union of any range of days
+(a week, a month) is as accurate as a single day.
+
+Each sketch row also stores its current estimate in ``visitors``, so
+totals and per-day series stay plain SUM/GROUP BY queries; only
+multi-day distinct counts need to read and merge sketches.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+
+from .hll import HyperLogLog
+from .models import ListingVisitorSketch
+from .rollups import upsert_daily_views
+
+PERIODS = ("day", "week", "month")
+
+
+def merge_sketches(model, fields, sketches):
+    """
+    Union ``{key: HyperLogLog}`` into the rows of ``model``, which is
+    unique on ``fields`` (keys are tuples of their values). Returns
+    ``{key: new estimate}``.
+    """
+    if not sketches:
+        return {}
+    attnames = [model._meta.get_field(name).attname for name in fields]
+    with transaction.atomic():
+        # Create missing rows first, then lock them all: concurrent flushes
+        # merge one after the other instead of overwriting each other.
+        model.objects.bulk_create(
+            [model(**dict(zip(attnames, key)), sketch=b"") for key in sketches], ignore_conflicts=True,
+        )
+        lookup = {f"{attname}__in": {key[i] for key in sketches} for i, attname in enumerate(attnames)}
+        current = {
+            tuple(row[:-1]): row[-1]
+            for row in model.objects.select_for_update().filter(**lookup).values_list(*attnames, "sketch")
+        }
+        rows, estimates = [], {}
+        for key, sketch in sketches.items():
+            merged = HyperLogLog.from_bytes(current.get(key)).merge(sketch)
+            estimates[key] = merged.count()
+            rows.append(model(**dict(zip(attnames, key)), sketch=merged.to_bytes(), visitors=estimates[key]))
+        model.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=list(fields), update_fields=["sketch", "visitors"],
+        )
+    return estimates
+
+
+def merge_visitors(model, fields, events):
+    """``merge_sketches`` for raw ``(key, visitor_key)`` events."""
+    sketches = defaultdict(HyperLogLog)
+    for key, visitor in events:
+        sketches[key].add(visitor)
+    return merge_sketches(model, fields, sketches)
+
+
+def write_listing_sketches(events):
+    """
+    Sketch-mode flush of ``(listing_id, visitor_key, date)`` view events.
+    ListingViewDaily gets the new estimates, so dashboards read the same
+    rollup in either mode.
+    """
+    estimates = merge_visitors(
+        ListingVisitorSketch, ("listing", "date"),
+        (((listing_id, date), visitor) for listing_id, visitor, date in events),
+    )
+    upsert_daily_views([(listing_id, date, views) for (listing_id, date), views in estimates.items()])
+
+
+def period_start(day, period):
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+
+def unique_visitors(qs):
+    """Estimated distinct visitors across every sketch in ``qs`` (say, a month of days)."""
+    return HyperLogLog.union(
+        HyperLogLog.from_bytes(sketch) for sketch in qs.values_list("sketch", flat=True).iterator()
+    ).count()
+
+
+def unique_visitors_by_period(qs, period="week"):
+    """``{period start: estimated distinct visitors}`` over the sketches in ``qs``."""
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+    unions = defaultdict(HyperLogLog)
+    for day, sketch in qs.order_by().values_list("date", "sketch").iterator():
+        unions[period_start(day, period)].merge(HyperLogLog.from_bytes(sketch))
+    return {start: unions[start].count() for start in sorted(unions)}
@@ -0,0 +1,117 @@
+"""
+Normalized tag index.
+
+``Listing.tags`` stays the comma-separated text editors type into; it is
+split into ``Tag``/``ListingTag`` rows on save so that tag filters and
+counts are index lookups instead of LIKE scans over the text.
+"""
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils.text import slugify
+
+from .models import ListingTag, Tag
+
+
+def parse_tags(raw):
+    """Return ``{slug: display name}`` for a comma-separated tag string, in order."""
+    parsed = {}
+    for part in (raw or "").split(","):
+        name = " ".join(part.split())[:60]
+        slug = slugify(name, allow_unicode=True)[:60]
+        if slug and slug not in parsed:
+            parsed[slug] = name
+    return parsed
+
+
+def normalize_slugs(values):
+    """Clean tag filter values from a query string into unique slugs."""
+    slugs = []
+    for value in values:
+        slug = slugify(value, allow_unicode=True)[:60]
+        if slug and slug not in slugs:
+            slugs.append(slug)
+    return slugs
+
+
+def sync_listing_tags(listings):
+    """Bring the ListingTag rows of ``listings`` in line with their ``tags`` text."""
+    wanted = {listing.pk: parse_tags(listing.tags) for listing in listings}
+    if not wanted:
+        return
+
+    names = {}
+    for parsed in wanted.values():
+        for slug, name in parsed.items():
+            names.setdefault(slug, name)
+
+    with transaction.atomic():
+        if names:
+            Tag.objects.bulk_create(
+                [Tag(slug=slug, name=name) for slug, name in names.items()],
+                ignore_conflicts=True,
+            )
+        tag_ids = dict(Tag.objects.filter(slug__in=names).values_list("slug", "id"))
+
+        existing = set(
+            ListingTag.objects.filter(listing_id__in=wanted).values_list("listing_id", "tag_id")
+        )
+        desired = {
+            (listing_id, tag_ids[slug])
+            for listing_id, parsed in wanted.items()
+            for slug in parsed
+        }
+
+        stale = existing - desired
+        if stale:
+            for listing_id in {listing_id for listing_id, _ in stale}:
+                ListingTag.objects.filter(
+                    listing_id=listing_id,
+                    tag_id__in=[tag_id for lid, tag_id in stale if lid == listing_id],
+                ).delete()
+        missing = desired - existing
+        if missing:
+            ListingTag.objects.bulk_create(
+                [ListingTag(listing_id=lid, tag_id=tid) for lid, tid in missing],
+                ignore_conflicts=True,
+            )
+
+
+def filter_by_tags(qs, slugs, match_all=True):
+    """
+    Restrict ``qs`` to listings carrying the given tag slugs.
+
+    ``match_all`` requires every tag (AND); otherwise any of them (OR).
+    Each condition is an ``id IN (SELECT listing_id ...)`` resolved through
+    the (tag, listing) index.
+    """
+    if not slugs:
+        return qs
+    if match_all:
+        for slug in slugs:
+            qs = qs.filter(id__in=ListingTag.objects.filter(tag__slug=slug).values("listing_id"))
+        return qs
+    return qs.filter(id__in=ListingTag.objects.filter(tag__slug__in=slugs).values("listing_id"))
+
+
+def tag_counts(qs, limit=20):
+    """
+    Most used tags among the listings in ``qs`` as Tag objects annotated
+    with ``listing_count``.
+
+    Grouped on ``qs`` itself rather than nesting it as a subquery, so it
+    also works on ranked search querysets.
+    """
+    rows = list(
+        qs.order_by()
+        .filter(tag_links__isnull=False)
+        .values("tag_links__tag_id")
+        .annotate(listing_count=Count("id"))
+        .order_by("-listing_count")[:limit]
+    )
+    counts = {row["tag_links__tag_id"]: row["listing_count"] for row in rows}
+    tags = list(Tag.objects.filter(id__in=counts))
+    for tag in tags:
+        tag.listing_count = counts[tag.id]
+    tags.sort(key=lambda tag: (-tag.listing_count, tag.name))
+    return tags
@@ -1,6 +1,44 @@
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.db import connection
+from django.core.management import call_command
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+import io
+import json
+import os
+import random
+import re
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, Client, override_settings
+from django.utils import timezone
 from django.contrib.auth.models import User
-from .models import Listing, SavedListing
+from config.buffering import WriteBehindBuffer
+from pages.visits import site_visit_buffer
+from . import expiry
+from .caching import home_cache_key
+from .expiry import expire_listings
+from .facets import facet_counts
+from .hll import HyperLogLog
+from .models import (
+    Listing, ListingTag, ListingTombstone, ListingView, ListingViewDaily, ListingVisitorSketch, SavedListing,
+)
+from .pagination import InvalidCursor, KeysetPaginator, encode_cursor
+from .rollups import popular_listings, view_totals
+from .search import search_listings
+from .sketches import unique_visitors, unique_visitors_by_period
+from .tags import filter_by_tags, tag_counts
+from .tracking import listing_view_buffer, write_listing_views
+
+
+
+def tearDownModule():
+    # Page hits queue ListingView/SiteVisit events; don't flush them at
+    # exit into a test database that no longer exists.
+    listing_view_buffer.clear()
+    site_visit_buffer.clear()
 
 
 class SaveListingTests(TestCase):
@@ -26,6 +64,879 @@ class SaveListingTests(TestCase):
         self.assertEqual(resp.status_code, 200)
         data = resp.json()
         self.assertIn("saved", data)
+
+
+class ListingSearchTests(TestCase):
+    def setUp(self):
+        self.title_hit = Listing.objects.create(
+            type=Listing.ListingType.JOB,
+            title="Python Developer",
+            description="Backend work",
+            status=Listing.Status.ACTIVE,
+        )
+        self.description_hit = Listing.objects.create(
+            type=Listing.ListingType.COURSE,
+            title="Data Course",
+            description="Learn python in four weeks",
+            status=Listing.Status.ACTIVE,
+        )
+        self.miss = Listing.objects.create(
+            type=Listing.ListingType.SCHOLARSHIP,
+            title="Art History Scholarship",
+            tags="art, history",
+            status=Listing.Status.ACTIVE,
+        )
+
+    def test_title_hits_rank_above_description_hits(self):
+        qs = search_listings(Listing.objects.all(), "python")
+        self.assertEqual(list(qs), [self.title_hit, self.description_hit])
+
+    def test_prefix_and_all_terms_must_match(self):
+        qs = search_listings(Listing.objects.all(), "pyth backend")
+        self.assertEqual(list(qs), [self.title_hit])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.miss.title = "Python Scholarship"
+        self.miss.save()
+        self.assertIn(self.miss, search_listings(Listing.objects.all(), "python"))
+
+        self.title_hit.delete()
+        self.assertNotIn(self.title_hit.pk, search_listings(Listing.objects.all(), "python").values_list("pk", flat=True))
+
+    def test_listings_list_uses_search(self):
+        resp = self.client.get("/en/listings/", {"q": "python"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(list(resp.context["items"]), [self.title_hit, self.description_hit])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Listing.objects.bulk_create([
+            Listing(type=Listing.ListingType.JOB, title=f"Job {i}", status=Listing.Status.ACTIVE)
+            for i in range(30)
+        ])
+        self.qs = Listing.objects.filter(status=Listing.Status.ACTIVE)
+        self.ordering = (("created_at", True), ("id", True))
+        self.expected = list(self.qs.order_by("-created_at", "-id"))
+
+    def test_cursor_walks_forward_and_back(self):
+        paginator = KeysetPaginator(self.qs, 12, self.ordering)
+        first = paginator.page(1)
+        second = paginator.page(2, first.next_cursor)
+        third = paginator.page(3, second.next_cursor)
+
+        self.assertEqual(list(first) + list(second) + list(third), self.expected)
+        self.assertFalse(third.has_next())
+        self.assertEqual(list(paginator.page(2, third.previous_cursor)), list(second))
+        self.assertEqual(list(paginator.page(1, second.previous_cursor)), list(first))
+        self.assertFalse(paginator.page(1, second.previous_cursor).has_previous())
+
+    def test_page_turn_is_one_query_once_count_is_cached(self):
+        paginator = KeysetPaginator(self.qs, 12, self.ordering)
+        first = paginator.page(1)
+        self.assertEqual(paginator.count, 30)
+
+        paginator = KeysetPaginator(self.qs, 12, self.ordering)
+        with self.assertNumQueries(1):
+            page = paginator.page(2, first.next_cursor)
+            self.assertEqual(page.paginator.count, 30)
+            self.assertEqual((page.start_index(), page.end_index()), (13, 24))
+
+    def test_elided_page_range(self):
+        paginator = KeysetPaginator(self.qs, 2, self.ordering)
+        self.assertEqual(
+            list(paginator.get_elided_page_range(8)),
+            [1, paginator.ELLIPSIS, 6, 7, 8, 9, 10, paginator.ELLIPSIS, 15],
+        )
+
+    def test_listings_list_paginates(self):
+        resp = self.client.get("/en/listings/")
+        self.assertEqual(resp.status_code, 200)
+        page_obj = resp.context["page_obj"]
+        self.assertEqual(len(resp.context["items"]), 12)
+        self.assertTrue(page_obj.next_cursor)
+
+        resp = self.client.get("/en/listings/", {"page": 2, "cursor": page_obj.next_cursor})
+        self.assertEqual(list(resp.context["items"]), self.expected[12:24])
+
+        resp = self.client.get("/en/listings/", {"page": 2, "cursor": "not-a-cursor"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(list(resp.context["items"]), self.expected[:12])
+
+
+    def test_tampered_cursor_values(self):
+        paginator = KeysetPaginator(self.qs, 12, self.ordering)
+        bad_values = (["garbage", 1], [{"a": 1}, 1], ["2024-01-01T00:00:00", "x"])
+        pages = {"/en/listings/": 200, "/api/v1/listings/": 400, "/en/gallery/": 200, "/en/gallery/more/": 200}
+        for values in bad_values:
+            cursor = encode_cursor("n", values)
+            with self.assertRaises(InvalidCursor):
+                paginator.page(2, cursor)
+            for url, status in pages.items():
+                resp = self.client.get(url, {"page": 2, "cursor": cursor})
+                self.assertEqual(resp.status_code, status, (url, values))
+
+
+class TagIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.art = Listing.objects.create(
+            type=Listing.ListingType.COURSE, title="Painting", tags="Art, Design, art ",
+            status=Listing.Status.ACTIVE,
+        )
+        self.startup = Listing.objects.create(
+            type=Listing.ListingType.JOB, title="Founder", tags="startup, design",
+            status=Listing.Status.ACTIVE,
+        )
+
+    def test_tags_are_split_into_rows(self):
+        self.assertEqual(
+            sorted(self.art.tag_set.values_list("slug", flat=True)), ["art", "design"]
+        )
+        self.art.tags = "design"
+        self.art.save()
+        self.assertEqual(list(self.art.tag_set.values_list("slug", flat=True)), ["design"])
+
+    def test_exact_and_multi_tag_filtering(self):
+        qs = Listing.objects.all()
+        self.assertEqual(list(filter_by_tags(qs, ["art"])), [self.art])
+        self.assertEqual(list(filter_by_tags(qs, ["art", "design"])), [self.art])
+        self.assertEqual(
+            set(filter_by_tags(qs, ["art", "startup"], match_all=False)), {self.art, self.startup}
+        )
+        self.assertFalse(filter_by_tags(qs, ["art", "startup"]).exists())
+
+    def test_tag_counts(self):
+        counts = {t.slug: t.listing_count for t in tag_counts(Listing.objects.all())}
+        self.assertEqual(counts, {"design": 2, "art": 1, "startup": 1})
+        self.assertEqual(ListingTag.objects.count(), 4)
+
+    def test_listings_list_tag_filter(self):
+        resp = self.client.get("/en/listings/", {"tag": ["design", "startup"]})
+        self.assertEqual(list(resp.context["items"]), [self.startup])
+        resp = self.client.get("/en/listings/", {"tag": ["art", "startup"], "tag_mode": "any"})
+        self.assertEqual(set(resp.context["items"]), {self.art, self.startup})
+
+
+class FacetCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        today = timezone.localdate()
+        make = Listing.objects.create
+        make(type="JOB", title="A", country="Germany", level="Master", remote=True,
+             deadline=today + timedelta(days=3), status=Listing.Status.ACTIVE)
+        make(type="JOB", title="B", country="Germany", level="PhD",
+             deadline=today + timedelta(days=20), status=Listing.Status.ACTIVE)
+        make(type="COURSE", title="C", country="Japan", level="Master", remote=True,
+             status=Listing.Status.ACTIVE)
+        make(type="SCHOLARSHIP", title="D", country="Japan", status=Listing.Status.DRAFT)
+
+    def test_counts_in_one_query(self):
+        qs = Listing.objects.filter(status=Listing.Status.ACTIVE)
+        with self.assertNumQueries(1):
+            facets = facet_counts(qs)
+        self.assertEqual(facets["total"], 3)
+        self.assertEqual(facets["type"], {"JOB": 2, "SCHOLARSHIP": 0, "COURSE": 1})
+        self.assertEqual(facets["remote"], 2)
+        self.assertEqual(facets["deadline"], {"week": 1, "month": 2, "none": 1})
+        self.assertEqual(facets["country"], [("Germany", 2), ("Japan", 1)])
+        self.assertEqual(facets["level"], [("Master", 2), ("PhD", 1)])
+
+    def test_counts_follow_filters_and_are_cached(self):
+        resp = self.client.get("/en/listings/", {"remote": "1"})
+        facets = resp.context["facets"]
+        self.assertEqual(facets["total"], 2)
+        self.assertEqual(facets["type"]["COURSE"], 1)
+        self.assertEqual(resp.context["page_obj"].paginator.count, 2)
+
+        Listing.objects.create(type="COURSE", title="E", remote=True, status=Listing.Status.ACTIVE)
+        resp = self.client.get("/en/listings/", {"remote": "1"})
+        self.assertEqual(resp.context["facets"]["total"], 2)
+
+    def test_deadline_bucket_filter(self):
+        resp = self.client.get("/en/listings/", {"deadline": "week"})
+        self.assertEqual([i.title for i in resp.context["items"]], ["A"])
+        resp = self.client.get("/en/listings/", {"deadline": "none"})
+        self.assertEqual([i.title for i in resp.context["items"]], ["C"])
+
+
+class ListingQueryPlanTests(TestCase):
+    """
+    Guard the Listing indexes: the queries the public views and the expiry
+    sweep run must be answered from an index, never by a sequential scan
+    of listings_listing. The catalogue is seeded the way it ages, mostly
+    expired, so ACTIVE is as selective here as in production and a
+    PostgreSQL plan is as meaningful as a SQLite one. (The dashboard's
+    whole-table aggregates read every row by design and are not checked.)
+    """
+
+    # A bare "SCAN listings_listing" (no "USING ... INDEX") is a table scan
+    SQLITE_TABLE_SCAN = re.compile(r"\bSCAN listings_listing\b(?! USING)")
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(5)
+        today = timezone.localdate()
+        statuses = [Listing.Status.ACTIVE] + [Listing.Status.DRAFT] + [Listing.Status.EXPIRED] * 8
+        Listing.objects.bulk_create([
+            Listing(
+                type=rng.choice(Listing.ListingType.values),
+                title=f"Listing {i}",
+                country=rng.choice(["Germany", "Japan", "Canada", ""]),
+                status=rng.choice(statuses),
+                is_featured=rng.random() < 0.05,
+                remote=rng.random() < 0.3,
+                deadline=today + timedelta(days=rng.randint(-60, 200)) if rng.random() < 0.8 else None,
+            )
+            for i in range(3000)
+        ], batch_size=500)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        cache.clear()
+
+    def explain(self, sql, params=()):
+        prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+
+    def assertIndexed(self, query):
+        if hasattr(query, "query"):
+            plan = self.explain(*query.query.sql_with_params())
+        else:
+            plan = self.explain(query)
+        if connection.vendor == "sqlite":
+            self.assertIsNone(self.SQLITE_TABLE_SCAN.search(plan), plan)
+        else:
+            self.assertNotIn("Seq Scan on listings_listing", plan)
+
+    def assertViewIndexed(self, path, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(path, params or {})
+        self.assertEqual(resp.status_code, 200)
+        listing_queries = [
+            q["sql"] for q in ctx.captured_queries
+            if q["sql"].startswith("SELECT") and 'FROM "listings_listing"' in q["sql"]
+        ]
+        self.assertTrue(listing_queries)
+        for sql in listing_queries:
+            self.assertIndexed(sql)
+
+    def test_home_queries_use_indexes(self):
+        self.assertViewIndexed("/en/")
+
+    def test_listings_list_queries_use_indexes(self):
+        self.assertViewIndexed("/en/listings/")
+        self.assertViewIndexed("/en/listings/", {"deadline": "soon"})
+        self.assertViewIndexed("/en/listings/", {"type": "JOB", "remote": "1"})
+
+    def test_keyset_seek_uses_index(self):
+        active = Listing.objects.filter(status=Listing.Status.ACTIVE)
+        boundary = active.order_by("-created_at", "-id")[20]
+        self.assertIndexed(
+            active.filter(
+                Q(created_at__lt=boundary.created_at) |
+                Q(created_at=boundary.created_at, id__lt=boundary.id)
+            ).order_by("-created_at", "-id")[:13]
+        )
+
+    def test_expiry_sweep_uses_index(self):
+        today = timezone.localdate()
+        self.assertIndexed(
+            Listing.objects.filter(
+                status__in=[Listing.Status.ACTIVE, Listing.Status.DRAFT], deadline__lt=today,
+            ).values_list("id")
+        )
+
+
+class HomeFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.listing = Listing.objects.create(
+            type=Listing.ListingType.JOB, title="Cached Job", is_featured=True,
+            status=Listing.Status.ACTIVE,
+        )
+
+    def listing_queries(self, path):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(path)
+        self.assertEqual(resp.status_code, 200)
+        return resp, [q["sql"] for q in ctx.captured_queries if "listings_listing" in q["sql"]]
+
+    def test_warm_home_does_not_query_listings(self):
+        resp, queries = self.listing_queries("/en/")
+        self.assertTrue(queries)
+        self.assertContains(resp, "Cached Job")
+
+        resp, queries = self.listing_queries("/en/")
+        self.assertEqual(queries, [])
+        self.assertContains(resp, "Cached Job")
+
+    def test_fragments_are_per_language(self):
+        self.listing_queries("/en/")
+        _, queries = self.listing_queries("/ps/")
+        self.assertTrue(queries)
+
+    def test_save_and_delete_invalidate(self):
+        self.listing_queries("/en/")
+        self.listing.title = "Renamed Job"
+        self.listing.save()
+        resp, _ = self.listing_queries("/en/")
+        self.assertContains(resp, "Renamed Job")
+
+        self.listing.delete()
+        resp, _ = self.listing_queries("/en/")
+        self.assertNotContains(resp, "Renamed Job")
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="etag", password="pass12345")
+        self.listing = Listing.objects.create(
+            type=Listing.ListingType.JOB, title="Etag Job", status=Listing.Status.ACTIVE,
+        )
+        self.detail_url = f"/en/listings/{self.listing.pk}/"
+
+    def test_list_revalidates_with_304(self):
+        resp = self.client.get("/en/listings/?q=etag")
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("Cookie", resp["Vary"])
+        self.assertIn("must-revalidate", resp["Cache-Control"])
+
+        with self.assertTemplateNotUsed("listings/list.html"):
+            again = self.client.get("/en/listings/?q=etag", HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], resp["ETag"])
+
+    def test_list_etag_changes_on_listing_save(self):
+        etag = self.client.get("/en/listings/")["ETag"]
+        self.listing.title = "Renamed"
+        self.listing.save()
+        resp = self.client.get("/en/listings/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+
+    def test_detail_last_modified_for_anonymous(self):
+        resp = self.client.get(self.detail_url)
+        self.assertIn("Last-Modified", resp)
+        again = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=resp["Last-Modified"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_detail_etag_tracks_saved_state(self):
+        self.client.login(username="etag", password="pass12345")
+        resp = self.client.get(self.detail_url)
+        self.assertNotIn("Last-Modified", resp)
+        self.assertIn("private", resp["Cache-Control"])
+        self.assertEqual(
+            self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=resp["ETag"]).status_code, 304
+        )
+
+        self.client.post(f"/en/listings/{self.listing.pk}/save/")
+        again = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(again.status_code, 200)
+
+
+class ListingViewBufferTests(TestCase):
+    def setUp(self):
+        listing_view_buffer.clear()
+        self.addCleanup(listing_view_buffer.clear)
+        self.listing = Listing.objects.create(
+            type=Listing.ListingType.JOB, title="Viewed Job", status=Listing.Status.ACTIVE,
+        )
+
+    def test_detail_views_are_buffered_and_deduped(self):
+        url = f"/en/listings/{self.listing.pk}/"
+        for _ in range(3):
+            self.client.get(url)
+        self.assertEqual(ListingView.objects.count(), 0)
+        self.assertEqual(len(listing_view_buffer), 1)
+
+        self.assertEqual(listing_view_buffer.flush(), 1)
+        view = ListingView.objects.get()
+        self.assertEqual(view.listing, self.listing)
+        self.assertEqual(view.date, timezone.localdate())
+
+        # Already written today: not queued again.
+        self.client.get(url)
+        self.assertEqual(len(listing_view_buffer), 0)
+
+    def test_flush_ignores_rows_written_elsewhere(self):
+        today = timezone.localdate()
+        ListingView.objects.create(listing=self.listing, session_key="a", date=today)
+        write_listing_views([(self.listing.pk, "a", today), (self.listing.pk, "b", today)])
+        self.assertEqual(ListingView.objects.count(), 2)
+
+    def test_views_of_deleted_listings_are_dropped(self):
+        gone = Listing.objects.create(type=Listing.ListingType.JOB, title="Gone", status=Listing.Status.ACTIVE)
+        self.client.get(f"/en/listings/{self.listing.pk}/")
+        self.client.get(f"/en/listings/{gone.pk}/")
+        self.assertEqual(len(listing_view_buffer), 2)
+        gone.delete()
+
+        self.assertEqual(listing_view_buffer.flush(), 2)
+        self.assertEqual(len(listing_view_buffer), 0)
+        self.assertEqual(list(ListingView.objects.values_list("listing_id", flat=True)), [self.listing.pk])
+
+        with override_settings(VISITOR_ANALYTICS="sketch"):
+            write_listing_views([(gone.pk, "a", timezone.localdate())])
+        self.assertFalse(ListingVisitorSketch.objects.exists())
+
+    def test_flushes_on_size_and_bounds_memory(self):
+        written = []
+        buffer = WriteBehindBuffer(written.extend, flush_size=3, flush_interval=3600, max_pending=3,
+                                   flush_on_exit=False)
+        for key in "abcd":
+            buffer.add(key)
+        self.assertEqual(written, ["a", "b", "c"])
+
+        def fail(batch):
+            raise RuntimeError("database down")
+
+        buffer = WriteBehindBuffer(fail, flush_size=100, flush_interval=3600, max_pending=2,
+                                   flush_on_exit=False)
+        self.assertTrue(buffer.add("a"))
+        self.assertTrue(buffer.add("b"))
+        self.assertFalse(buffer.add("c"))
+        with self.assertLogs("config.buffering", "ERROR"):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(buffer.dropped, 1)
+
+
+class ListingViewDailyTests(TestCase):
+    def setUp(self):
+        self.a = Listing.objects.create(type=Listing.ListingType.JOB, title="A", status=Listing.Status.ACTIVE)
+        self.b = Listing.objects.create(type=Listing.ListingType.JOB, title="B", status=Listing.Status.ACTIVE)
+        self.today = timezone.localdate()
+
+    def test_flush_maintains_rollup(self):
+        yesterday = self.today - timedelta(days=1)
+        write_listing_views([(self.a.pk, "s1", self.today), (self.a.pk, "s2", self.today),
+                             (self.b.pk, "s1", yesterday)])
+        # A duplicate from another worker must not inflate the count.
+        write_listing_views([(self.a.pk, "s2", self.today), (self.a.pk, "s3", self.today)])
+
+        rollup = {(r.listing_id, r.date): r.views for r in ListingViewDaily.objects.all()}
+        self.assertEqual(rollup, {(self.a.pk, self.today): 3, (self.b.pk, yesterday): 1})
+        self.assertEqual(view_totals(), 4)
+        self.assertEqual(view_totals(since=self.today), 3)
+        self.assertEqual(popular_listings(limit=1), [(self.a, 3)])
+
+    def test_backfill_rebuilds_from_raw_rows(self):
+        for key in ("x", "y"):
+            ListingView.objects.create(listing=self.b, session_key=key, date=self.today)
+        ListingViewDaily.objects.create(listing=self.a, date=self.today, views=99)
+
+        call_command("backfill_listing_view_daily", stdout=io.StringIO())
+        self.assertEqual(
+            list(ListingViewDaily.objects.values_list("listing_id", "views")), [(self.b.pk, 2)]
+        )
+
+    def test_dashboard_reads_rollup(self):
+        cache.clear()
+        staff = User.objects.create_user(username="staff", password="pass12345", is_staff=True)
+        self.client.force_login(staff)
+        write_listing_views([(self.a.pk, "s1", self.today)])
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/en/dashboard/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["total_listing_views"], 1)
+        self.assertEqual(
+            [(row["listing"]["id"], row["views"]) for row in resp.context["top_viewed_listings"]], [(self.a.pk, 1)]
+        )
+        self.assertFalse(any('FROM "listings_listingview"' in q["sql"] for q in ctx.captured_queries))
+
+
+class ExpirySweepTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        today = timezone.localdate()
+        self.past = Listing.objects.create(type=Listing.ListingType.JOB, title="Past", status=Listing.Status.ACTIVE)
+        self.future = Listing.objects.create(
+            type=Listing.ListingType.JOB, title="Future", status=Listing.Status.ACTIVE,
+            deadline=today + timedelta(days=3),
+        )
+        # Deadline passed without the row being saved again.
+        Listing.objects.filter(pk=self.past.pk).update(deadline=today - timedelta(days=1))
+
+    def test_sweep_expires_in_one_update(self):
+        home_key = home_cache_key()
+        with self.assertNumQueries(1):
+            self.assertEqual(expire_listings(), 1)
+        self.past.refresh_from_db()
+        self.future.refresh_from_db()
+        self.assertEqual(self.past.status, Listing.Status.EXPIRED)
+        self.assertEqual(self.future.status, Listing.Status.ACTIVE)
+        self.assertNotEqual(home_cache_key(), home_key)
+        self.assertEqual(expire_listings(), 0)
+
+    def test_command_reports_count(self):
+        out = io.StringIO()
+        call_command("expire_listings", stdout=out)
+        self.assertIn("Expired 1 listing", out.getvalue())
+
+    @override_settings(LISTING_EXPIRY_INTERVAL=3600)
+    def test_request_hook_runs_once_per_interval(self):
+        expiry._next_run = 0.0
+        self.addCleanup(setattr, expiry, "_next_run", 0.0)
+        self.client.get("/en/listings/")
+        self.past.refresh_from_db()
+        self.assertEqual(self.past.status, Listing.Status.EXPIRED)
+
+        Listing.objects.filter(pk=self.future.pk).update(deadline=timezone.localdate() - timedelta(days=1))
+        self.client.get("/en/listings/")
+        self.future.refresh_from_db()
+        self.assertEqual(self.future.status, Listing.Status.ACTIVE)
+
+
+class ImportListingsTests(TestCase):
+    CSV = (
+        "type,title,country,deadline,remote,tags,source_url,status\n"
+        "job,Backend Dev,Germany,,yes,\"python, django\",https://ex.com/1,active\n"
+        "SCHOLARSHIP,Old Grant,Japan,2000-01-01,no,,https://ex.com/2,ACTIVE\n"
+        "job,No Source,Japan,,no,,,active\n"
+        "gig,Bad Type,Japan,,no,,https://ex.com/3,active\n"
+    )
+
+    def run_import(self, content, suffix=".csv", *args):
+        with tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False) as fp:
+            fp.write(content)
+        self.addCleanup(os.remove, fp.name)
+        out, err = io.StringIO(), io.StringIO()
+        call_command("import_listings", fp.name, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_import_validates_and_applies_deadline_rule(self):
+        out, err = self.run_import(self.CSV)
+        self.assertIn("2 created, 0 updated, 2 invalid", out)
+        self.assertIn("line 4: source_url is required", err)
+        self.assertIn("line 5: type:", err)
+
+        dev = Listing.objects.get(source_url="https://ex.com/1")
+        self.assertTrue(dev.remote)
+        self.assertEqual(dev.status, Listing.Status.ACTIVE)
+        self.assertEqual(sorted(dev.tag_set.values_list("slug", flat=True)), ["django", "python"])
+        self.assertEqual(
+            Listing.objects.get(source_url="https://ex.com/2").status, Listing.Status.EXPIRED
+        )
+        self.assertEqual(search_listings(Listing.objects.all(), "backend").get(), dev)
+
+    def test_jsonl_reimport_upserts_by_source_url(self):
+        self.run_import(self.CSV)
+        first = Listing.objects.get(source_url="https://ex.com/1")
+        rows = [
+            {"source_url": "https://ex.com/1", "title": "Backend Engineer", "tags": "python"},
+            {"source_url": "https://ex.com/2", "deadline": None},
+            {"source_url": "https://ex.com/4", "type": "course", "title": "New Course"},
+        ]
+        out, _ = self.run_import("\n".join(json.dumps(r) for r in rows) + "\n", ".jsonl")
+        self.assertIn("1 created, 2 updated, 0 invalid", out)
+
+        first.refresh_from_db()
+        self.assertEqual(first.title, "Backend Engineer")
+        self.assertEqual(first.country, "Germany")  # not in the file: untouched
+        self.assertEqual(list(first.tag_set.values_list("slug", flat=True)), ["python"])
+        self.assertEqual(Listing.objects.get(source_url="https://ex.com/4").status, Listing.Status.DRAFT)
+
+        # Same file again: nothing changes.
+        out, _ = self.run_import("\n".join(json.dumps(r) for r in rows) + "\n", ".jsonl")
+        self.assertIn("0 created, 0 updated", out)
+
+    def test_non_string_choice_is_a_row_error(self):
+        rows = [
+            {"source_url": "https://ex.com/5", "type": 5, "title": "Numeric Type"},
+            {"source_url": "https://ex.com/6", "type": "job", "title": "Fine", "status": ["active"]},
+            {"source_url": "https://ex.com/7", "type": "job", "title": "Good"},
+        ]
+        out, err = self.run_import("\n".join(json.dumps(r) for r in rows) + "\n", ".jsonl")
+        self.assertIn("1 created, 0 updated, 2 invalid", out)
+        self.assertIn("line 1: type: expected a string, got 5", err)
+        self.assertIn("line 2: status: expected a single value", err)
+
+    def test_wrongly_typed_json_values_are_row_errors(self):
+        rows = [
+            {"source_url": "https://ex.com/8", "type": "job", "title": "Numeric deadline", "deadline": 5},
+            {"source_url": "https://ex.com/9", "type": "job", "title": ["a"]},
+            {"source_url": "https://ex.com/10", "type": "job", "title": "Dict tags", "tags": {"a": 1}},
+            {"source_url": "https://ex.com/11", "type": "job", "title": "Good", "deadline": "2099-01-01"},
+        ]
+        out, err = self.run_import("\n".join(json.dumps(r) for r in rows) + "\n", ".jsonl")
+        self.assertIn("1 created, 0 updated, 3 invalid", out)
+        self.assertIn("line 1: deadline: invalid value 5", err)
+        self.assertIn("line 2: title: expected a single value", err)
+        self.assertIn("line 3: tags: expected a single value", err)
+        self.assertEqual(list(Listing.objects.values_list("source_url", flat=True)), ["https://ex.com/11"])
+
+    def test_dry_run_rolls_back(self):
+        out, _ = self.run_import(self.CSV, ".csv", "--dry-run")
+        self.assertIn("dry run", out)
+        self.assertFalse(Listing.objects.exists())
+
+
+class SavedStateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="cards", password="pass12345")
+        self.listings = [
+            Listing.objects.create(type=Listing.ListingType.JOB, title=f"Card {i}", status=Listing.Status.ACTIVE)
+            for i in range(5)
+        ]
+        for listing in self.listings[:3]:
+            SavedListing.objects.create(user=self.user, listing=listing)
+        self.client.force_login(self.user)
+
+    def saved_queries(self, path):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(path)
+        self.assertEqual(resp.status_code, 200)
+        return resp, [q for q in ctx.captured_queries if "listings_savedlisting" in q["sql"]]
+
+    def test_cards_cost_one_query_then_none(self):
+        resp, queries = self.saved_queries("/en/listings/")
+        self.assertEqual(len(queries), 1)
+        self.assertContains(resp, "fa-bookmark", count=3)
+
+        _, queries = self.saved_queries(f"/en/listings/{self.listings[0].pk}/")
+        self.assertEqual(queries, [])
+
+    def test_toggle_invalidates_cached_set(self):
+        self.saved_queries("/en/listings/")
+        target = self.listings[4]
+        self.client.post(f"/en/listings/{target.pk}/save/")
+        resp, queries = self.saved_queries(f"/en/listings/{target.pk}/")
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(resp.context["saved"])
+
+    def test_home_exposes_ids_for_cached_cards(self):
+        resp = self.client.get("/en/")
+        self.assertEqual(resp.context["saved_ids"], sorted(l.pk for l in self.listings[:3]))
+        self.assertContains(resp, 'id="saved-listing-ids"')
+
+    def test_anonymous_users_never_query(self):
+        self.client.logout()
+        _, queries = self.saved_queries("/en/listings/")
+        self.assertEqual(queries, [])
+class ListingApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        base = timezone.now()
+        self.listings = []
+        for i in range(5):
+            listing = Listing.objects.create(
+                type=Listing.ListingType.JOB, title=f"Api Job {i}", country="Mongolia",
+                tags="Python, Data", status=Listing.Status.ACTIVE,
+            )
+            Listing.objects.filter(pk=listing.pk).update(created_at=base - timedelta(hours=i))
+            self.listings.append(listing)
+        self.draft = Listing.objects.create(
+            type=Listing.ListingType.JOB, title="Draft Job", status=Listing.Status.DRAFT,
+        )
+
+    def test_list_follows_cursors_both_ways(self):
+        first = self.client.get("/api/v1/listings/?page_size=2").json()
+        self.assertEqual(first["count"], 5)
+        self.assertIsNone(first["previous"])
+        self.assertEqual([r["title"] for r in first["results"]], ["Api Job 0", "Api Job 1"])
+        self.assertEqual(first["results"][0]["tags"], ["Python", "Data"])
+
+        second = self.client.get(first["next"]).json()
+        self.assertEqual([r["title"] for r in second["results"]], ["Api Job 2", "Api Job 3"])
+        back = self.client.get(second["previous"]).json()
+        self.assertEqual(back["results"], first["results"])
+
+    def test_sparse_fields(self):
+        resp = self.client.get("/api/v1/listings/?fields=id,title")
+        self.assertEqual(set(resp.json()["results"][0]), {"id", "title"})
+
+        bad = self.client.get("/api/v1/listings/?fields=id,password")
+        self.assertEqual(bad.status_code, 400)
+
+    def test_conditional_requests(self):
+        resp = self.client.get("/api/v1/listings/")
+        again = self.client.get("/api/v1/listings/", HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+        url = f"/api/v1/listings/{self.listings[0].pk}/"
+        resp = self.client.get(url)
+        self.assertIn("description", resp.json())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=resp["ETag"]).status_code, 304)
+
+    def test_detail_hides_inactive(self):
+        self.assertEqual(self.client.get(f"/api/v1/listings/{self.draft.pk}/").status_code, 404)
+
+    def test_facets(self):
+        data = self.client.get("/api/v1/listings/facets/").json()
+        self.assertEqual(data["total"], 5)
+        self.assertIn({"value": "Mongolia", "count": 5}, data["country"])
+
+    def test_api_skips_visit_tracking(self):
+        site_visit_buffer.clear()
+        resp = self.client.get("/api/v1/listings/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(site_visit_buffer), 0)
+        self.assertNotIn("sessionid", resp.cookies)
+        self.assertNotIn("visitor_id", resp.cookies)
+
+
+@override_settings(LISTING_CHANGES_SETTLE_SECONDS=0)
+class ListingChangesFeedTests(TestCase):
+    url = "/api/v1/listings/changes/"
+
+    def setUp(self):
+        self.listings = [
+            Listing.objects.create(
+                type=Listing.ListingType.JOB, title=f"Sync {i}", status=Listing.Status.ACTIVE,
+            )
+            for i in range(4)
+        ]
+
+    def sync(self, since=None, **params):
+        """Follow the feed to the end; returns (events, cursor)."""
+        events = []
+        while True:
+            query = dict(params, **({"since": since} if since else {}))
+            data = self.client.get(self.url, query).json()
+            events += data["results"]
+            since = data["cursor"]
+            if not data["has_more"]:
+                return events, since
+
+    def test_full_then_incremental_sync(self):
+        events, cursor = self.sync(page_size=3)
+        self.assertEqual([e["id"] for e in events], [l.pk for l in self.listings])
+        self.assertEqual({e["op"] for e in events}, {"upsert"})
+
+        # Nothing new: nothing transferred
+        events, cursor = self.sync(cursor)
+        self.assertEqual(events, [])
+
+        updated, deleted, expired = self.listings[:3]
+        updated.title = "Renamed"
+        updated.save()
+        deleted_pk = deleted.pk
+        deleted.delete()
+        Listing.objects.filter(pk=expired.pk).update(status=Listing.Status.EXPIRED, updated_at=timezone.now())
+
+        events, _ = self.sync(cursor, fields="id,title")
+        self.assertEqual(
+            [(e["op"], e["id"]) for e in events],
+            [("upsert", updated.pk), ("delete", deleted_pk), ("delete", expired.pk)],
+        )
+        self.assertEqual(events[0], {"op": "upsert", "id": updated.pk, "title": "Renamed"})
+
+    def test_rows_sharing_a_timestamp_are_paged_exactly_once(self):
+        Listing.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+        events, _ = self.sync(page_size=1)
+        self.assertEqual(sorted(e["id"] for e in events), sorted(l.pk for l in self.listings))
+
+    @override_settings(LISTING_CHANGES_SETTLE_SECONDS=60)
+    def test_recent_writes_are_held_back(self):
+        self.assertEqual(self.client.get(self.url).json()["results"], [])
+
+    def test_bad_and_expired_cursors(self):
+        self.assertEqual(self.client.get(self.url, {"since": "nope"}).status_code, 400)
+
+        old = timezone.now() - timedelta(days=365)
+        for values in ([old, 0, 1, old], [old, 0, 1], [None, None, None, old]):
+            cursor = encode_cursor("n", values)
+            self.assertEqual(self.client.get(self.url, {"since": cursor}).status_code, 410, values)
+        # Still complete back to the oldest kept tombstone (prune has not run)
+        self.listings[0].delete()
+        ListingTombstone.objects.update(deleted_at=old - timedelta(days=1))
+        cursor = encode_cursor("n", [old, 0, 1, old])
+        self.assertEqual(self.client.get(self.url, {"since": cursor}).status_code, 200)
+
+    def test_quiet_catalogue_keeps_cursors_valid(self):
+        # Nothing edited or deleted for longer than the tombstone window
+        Listing.objects.update(updated_at=timezone.now() - timedelta(days=31))
+        events, cursor = self.sync()
+        self.assertEqual(len(events), 4)
+        with mock.patch("listings.changes.timezone.now", return_value=timezone.now() + timedelta(days=20)):
+            events, cursor = self.sync(cursor)
+        self.assertEqual(events, [])
+        with mock.patch("listings.changes.timezone.now", return_value=timezone.now() + timedelta(days=40)):
+            self.assertEqual(self.sync(cursor), ([], mock.ANY))
+
+        # An empty catalogue hands out a resumable cursor too
+        Listing.objects.all().delete()
+        ListingTombstone.objects.all().delete()
+        events, cursor = self.sync()
+        self.assertEqual(events, [])
+        self.assertEqual(self.client.get(self.url, {"since": cursor}).status_code, 200)
+
+    def test_prune_tombstones(self):
+        old_pk, recent_pk = self.listings[0].pk, self.listings[1].pk
+        Listing.objects.filter(pk__in=[old_pk, recent_pk]).delete()
+        ListingTombstone.objects.filter(listing_id=old_pk).update(
+            deleted_at=timezone.now() - timedelta(days=365)
+        )
+        call_command("prune_listing_tombstones", stdout=io.StringIO())
+        self.assertEqual(list(ListingTombstone.objects.values_list("listing_id", flat=True)), [recent_pk])
+
+
+class HyperLogLogTests(TestCase):
+    def test_estimates_within_two_percent(self):
+        for n in (100, 5_000, 50_000):
+            estimate = HyperLogLog().update(f"visitor{i}" for i in range(n)).count()
+            self.assertLessEqual(abs(estimate - n) / n, 0.02, n)
+        self.assertEqual(HyperLogLog().count(), 0)
+
+    def test_repeats_and_merges(self):
+        a = HyperLogLog().update(f"v{i}" for i in range(3000))
+        same = HyperLogLog().update(f"v{i}" for i in range(3000)).update(f"v{i}" for i in range(1000))
+        self.assertEqual(same.registers, a.registers)
+
+        b = HyperLogLog().update(f"v{i}" for i in range(2000, 6000))
+        both = HyperLogLog().update(f"v{i}" for i in range(6000))
+        self.assertEqual(HyperLogLog.union([a, b]).registers, both.registers)
+
+    def test_serialization(self):
+        small = HyperLogLog().update(["a", "b", "c"])
+        data = small.to_bytes()
+        self.assertLess(len(data), 200)
+        self.assertEqual(HyperLogLog.from_bytes(data).registers, small.registers)
+        self.assertEqual(HyperLogLog.from_bytes(b"").count(), 0)
+
+
+@override_settings(VISITOR_ANALYTICS="sketch")
+class ListingVisitorSketchTests(TestCase):
+    def setUp(self):
+        listing_view_buffer.clear()
+        self.addCleanup(listing_view_buffer.clear)
+        self.listing = Listing.objects.create(
+            type=Listing.ListingType.JOB, title="Sketched", status=Listing.Status.ACTIVE,
+        )
+
+    def test_views_go_to_sketches_and_the_rollup(self):
+        today = timezone.localdate()
+        write_listing_views([(self.listing.pk, "a", today), (self.listing.pk, "b", today)])
+        # Another worker flushing a visitor we already have changes nothing
+        write_listing_views([(self.listing.pk, "b", today), (self.listing.pk, "c", today)])
+
+        self.assertFalse(ListingView.objects.exists())
+        sketch = ListingVisitorSketch.objects.get()
+        self.assertEqual((sketch.listing, sketch.date, sketch.visitors), (self.listing, today, 3))
+        self.assertEqual(ListingViewDaily.objects.get().views, 3)
+        self.assertEqual(popular_listings(), [(self.listing, 3)])
+
+    def test_unions_over_days(self):
+        today = timezone.localdate()
+        write_listing_views(
+            [(self.listing.pk, f"v{i}", today - timedelta(days=i % 3)) for i in range(30)]
+            + [(self.listing.pk, "v0", today - timedelta(days=1))]
+        )
+        sketches = ListingVisitorSketch.objects.filter(listing=self.listing)
+        self.assertEqual(sum(sketches.values_list("visitors", flat=True)), 31)
+        self.assertEqual(unique_visitors(sketches), 30)
+        self.assertEqual(unique_visitors_by_period(sketches, "day")[today], 10)
+        with self.assertRaises(ValueError):
+            unique_visitors_by_period(sketches, "year")
+
+
 from django.test import TestCase
 
 # Create your tests here.
@@ -0,0 +1,66 @@
+"""
+ListingView recording.
+
+Detail page hits are queued in a per-process WriteBehindBuffer, deduped
+per (listing, visitor, day), and written in batches with
+``bulk_create(ignore_conflicts=True)`` so the unique constraint absorbs
+duplicates coming from other workers. Each flush also refreshes the
+ListingViewDaily rows it touched. Views of listings deleted since they
+were queued are dropped first; their rows would fail the foreign key and
+keep the whole batch from ever being written. With VISITOR_ANALYTICS =
+"sketch" the events go into per-day HyperLogLog sketches instead
+(listings/sketches.py). Visitors are identified by config/visitors.py.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from config.buffering import WriteBehindBuffer
+from config.visitors import visitor_key
+
+from .models import Listing, ListingView
+from .rollups import refresh_daily_views
+from .sketches import write_listing_sketches
+
+WRITE_BATCH_SIZE = 500
+
+
+def _existing_listings(events):
+    """``events`` without those whose listing has been deleted."""
+    ids = set(Listing.objects.filter(pk__in={event[0] for event in events}).values_list("pk", flat=True))
+    return [event for event in events if event[0] in ids]
+
+
+def write_listing_views(events):
+    """Insert buffered ``(listing_id, visitor_key, date)`` events and refresh their daily rollup."""
+    events = _existing_listings(events)
+    if not events:
+        return
+    if settings.VISITOR_ANALYTICS == "sketch":
+        write_listing_sketches(events)
+        return
+    with transaction.atomic():
+        ListingView.objects.bulk_create(
+            [
+                ListingView(listing_id=listing_id, session_key=session_key, date=date)
+                for listing_id, session_key, date in events
+            ],
+            batch_size=WRITE_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        refresh_daily_views((listing_id, date) for listing_id, _, date in events)
+
+
+listing_view_buffer = WriteBehindBuffer(
+    write_listing_views,
+    flush_size=settings.VIEW_BUFFER_FLUSH_SIZE,
+    flush_interval=settings.VIEW_BUFFER_FLUSH_INTERVAL,
+    max_pending=settings.VIEW_BUFFER_MAX_PENDING,
+    name="listing views",
+)
+
+
+def record_listing_view(request, listing):
+    """Queue one view of ``listing`` by the requesting visitor."""
+    listing_view_buffer.add((listing.pk, visitor_key(request), timezone.localdate()))
@@ -1,11 +1,16 @@
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404
-from django.utils import timezone
-from django.db.models import Q
 from django.views.decorators.http import require_POST
 
-from .models import Listing, SavedListing
+from .conditional import add_validators, not_modified, page_etag
+from .caching import HOME_FRAGMENT_TTL, home_cache_key, result_state
+from .facets import cached_facet_counts
+from .filters import filter_listings, listing_filters
+from .models import Listing
+from .pagination import KeysetPaginator
+from .saved import saved_listing_ids, saved_state_token, toggle_saved
+from .tracking import record_listing_view
 
 
 def home(request):
@@ -17,58 +22,88 @@ def home(request):
         Listing.objects.filter(status=Listing.Status.ACTIVE)
         .order_by("-created_at")[:9]
     )
-    return render(request, "listings/home.html", {"featured": featured, "latest": latest})
+    # Querysets are lazy: on a fragment cache hit they are never evaluated
+    context = {
+        "featured": featured,
+        "latest": latest,
+        "home_cache_key": home_cache_key(),
+        "home_cache_ttl": HOME_FRAGMENT_TTL,
+        # Cards are cached for everyone; saved markers are applied client-side
+        "saved_ids": sorted(saved_listing_ids(request)),
+    }
+    return render(request, "listings/home.html", context)
 
-def listings_list(request):
-    qs = Listing.objects.filter(status=Listing.Status.ACTIVE).order_by("-created_at")
-
-    q = (request.GET.get("q") or "").strip()
-    if q:
-        qs = qs.filter(
-            Q(title__icontains=q) |
-            Q(organization__icontains=q) |
-            Q(country__icontains=q) |
-            Q(city__icontains=q) |
-            Q(tags__icontains=q)
-        )
-
-    t = (request.GET.get("type") or "").strip()
-    if t:
-        qs = qs.filter(type=t)
+PAGE_SIZE = 12
 
-    remote = (request.GET.get("remote") or "").strip()
-    if remote in ("1", "true", "True", "yes", "YES"):
-        qs = qs.filter(remote=True)
 
-    deadline = (request.GET.get("deadline") or "").strip()
-    if deadline == "soon":
-        today = timezone.localdate()
-        qs = qs.filter(deadline__isnull=False, deadline__gte=today).order_by("deadline")
-
-    return render(request, "listings/list.html", {"items": qs})
+def listings_list(request):
+    filters = listing_filters(request.GET)
+    qs, ordering = filter_listings(filters)
+
+    # Validators: newest change and size of the result set, the version
+    # token that every Listing save/delete replaces, and the user's saved
+    # set (cards show saved state; Last-Modified can't, so anonymous only).
+    state = result_state(qs, filters)
+    etag = page_etag(
+        request, home_cache_key(), state["last_modified"], state["total"], saved_state_token(request)
+    )
+    last_modified = None if request.user.is_authenticated else state["last_modified"]
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
+
+    facets = cached_facet_counts(qs, filters)
+
+    # The facet query already counted the whole result set
+    paginator = KeysetPaginator(qs, PAGE_SIZE, ordering, count=facets["total"])
+    try:
+        page_obj = paginator.page(request.GET.get("page"), request.GET.get("cursor"))
+    except ValueError:
+        # Garbage page number or tampered cursor: start over
+        page_obj = paginator.page(1)
+
+    # Query string without paging params, for page links
+    params = request.GET.copy()
+    params.pop("page", None)
+    params.pop("cursor", None)
+    querystring = params.urlencode()
+
+    context = {
+        "items": page_obj.object_list,
+        "page_obj": page_obj,
+        "page_range": page_obj.page_range if page_obj.has_other_pages() else [],
+        "filters": filters,
+        "filters_active": sum(1 for k, v in filters.items() if v and k != "tag_mode"),
+        "tag_counts": facets["tags"],
+        "facets": facets,
+        "querystring": f"{querystring}&" if querystring else "",
+    }
+    response = render(request, "listings/list.html", context)
+    return add_validators(request, response, etag, last_modified)
 
 
 def listing_detail(request, pk):
     item = get_object_or_404(Listing, pk=pk, status=Listing.Status.ACTIVE)
 
-    saved = False
-    if request.user.is_authenticated:
-        saved = SavedListing.objects.filter(user=request.user, listing=item).exists()
+    if request.method == "GET":
+        record_listing_view(request, item)
+
+    saved = item.pk in saved_listing_ids(request)
+
+    etag = page_etag(request, item.updated_at.isoformat(), saved)
+    # Last-Modified can't see the saved flag, so only offer it to anonymous users
+    last_modified = None if request.user.is_authenticated else item.updated_at
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
 
-    return render(request, "listings/detail.html", {"item": item, "saved": saved})
+    response = render(request, "listings/detail.html", {"item": item, "saved": saved})
+    return add_validators(request, response, etag, last_modified)
 
 
 @login_required
 @require_POST
 def toggle_save_listing(request, pk):
-    listing = get_object_or_404(Listing, pk=pk)
-
-    obj = SavedListing.objects.filter(user=request.user, listing=listing).first()
-    if obj:
-        obj.delete()
-        saved = False
-    else:
-        SavedListing.objects.create(user=request.user, listing=listing)
-        saved = True
-
+    listing = get_object_or_404(Listing.objects.only("pk"), pk=pk)
+    saved = toggle_saved(request.user, listing.pk)
     return JsonResponse({"saved": saved})
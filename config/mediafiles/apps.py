@@ -0,0 +1,17 @@
+from django.apps import AppConfig, apps
+from django.db.models.signals import post_save
+
+
+class MediafilesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'mediafiles'
+
+    def ready(self):
+        from .variants import IMAGE_FIELDS, refresh_on_save
+
+        for app_label, model_name, _ in IMAGE_FIELDS:
+            post_save.connect(
+                refresh_on_save,
+                sender=apps.get_model(app_label, model_name),
+                dispatch_uid=f"mediafiles_variants_{app_label}_{model_name}",
+            )
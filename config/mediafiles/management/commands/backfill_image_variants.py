@@ -0,0 +1,28 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from mediafiles.variants import IMAGE_FIELDS, meta_field, refresh_image_meta
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate responsive WebP/JPEG variants and placeholders for existing "
+        "listing and gallery images that don't have them yet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenerate variants that already exist")
+
+    def handle(self, *args, **opts):
+        for app_label, model_name, field_name in IMAGE_FIELDS:
+            model = apps.get_model(app_label, model_name)
+            qs = model._default_manager.exclude(**{field_name: ""}).exclude(**{f"{field_name}__isnull": True})
+            built = failed = 0
+            for instance in qs.only("pk", field_name, meta_field(field_name)).iterator(chunk_size=200):
+                try:
+                    built += refresh_image_meta(instance, field_name, force=opts["force"])
+                except (OSError, ValueError, Image.DecompressionBombError) as exc:
+                    failed += 1
+                    self.stderr.write(f"{model._meta.label} pk={instance.pk}: {exc}")
+            self.stdout.write(f"{model._meta.label}.{field_name}: {built} built, {failed} failed")
@@ -0,0 +1,156 @@
+"""
+Serve uploaded media (MEDIA_URL) straight from MEDIA_ROOT.
+
+Sits right after WhiteNoise and answers media requests itself, so image
+requests skip sessions, auth, locale and visit tracking. Files go out as
+a FileResponse, which the WSGI server's file wrapper (gunicorn) sends with
+``os.sendfile``; single byte ranges are honoured (206/416) and keep the
+zero-copy path. Content-hashed names (mediafiles/storage.py) are cached
+as ``immutable``; older names get a short max-age and revalidate on their
+ETag.
+
+With ``MEDIA_ACCEL_REDIRECT`` set (an internal nginx location aliased to
+MEDIA_ROOT), the response is an empty ``X-Accel-Redirect`` and the proxy
+sends the bytes, ranges included.
+"""
+
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse, HttpResponseNotAllowed, HttpResponseNotFound
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .storage import is_hashed_name
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeFile:
+    """
+    File object cut off after ``length`` bytes from its current position.
+    Keeps ``fileno()`` so ``sendfile`` still works (gunicorn sends exactly
+    Content-Length bytes from the current offset).
+    """
+
+    def __init__(self, fp, length):
+        self.fp = fp
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fp.read(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.fp.fileno()
+
+    def close(self):
+        self.fp.close()
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` (inclusive) for a single byte range, or None to send
+    the whole file (no header, multiple ranges or a malformed one). Raises
+    ValueError when the range can't be satisfied.
+    """
+    match = RANGE_RE.match(header or "")
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError(header)
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise ValueError(header)
+    if end < start:
+        return None
+    return start, end
+
+
+def _range_applies(request, etag, last_modified):
+    """If-Range: only honour Range when the client's copy is current."""
+    if_range = request.META.get("HTTP_IF_RANGE")
+    return not if_range or if_range in (etag, last_modified)
+
+
+def _cache_headers(response, path, etag, last_modified):
+    if is_hashed_name(path):
+        cache_control = f"public, max-age={settings.MEDIA_IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        cache_control = f"public, max-age={settings.MEDIA_MAX_AGE}"
+    response["Cache-Control"] = cache_control
+    response["ETag"] = etag
+    response["Last-Modified"] = last_modified
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def serve_media(request, path):
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseNotAllowed(["GET", "HEAD"])
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        st = os.stat(fullpath)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        return HttpResponseNotFound()
+    if not stat.S_ISREG(st.st_mode):
+        return HttpResponseNotFound()
+
+    etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    last_modified = http_date(st.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=int(st.st_mtime))
+    if response is not None:
+        return _cache_headers(response, path, etag, last_modified)
+
+    content_type = mimetypes.guess_type(fullpath)[0] or "application/octet-stream"
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT.rstrip("/") + "/" + quote(path)
+        return _cache_headers(response, path, etag, last_modified)
+
+    try:
+        byte_range = parse_range(request.META.get("HTTP_RANGE"), st.st_size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{st.st_size}"
+        return _cache_headers(response, path, etag, last_modified)
+    if byte_range and not _range_applies(request, etag, last_modified):
+        byte_range = None
+
+    fp = open(fullpath, "rb")
+    if byte_range:
+        start, end = byte_range
+        fp.seek(start)
+        response = FileResponse(RangeFile(fp, end - start + 1), status=206, content_type=content_type)
+        response["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+        response["Content-Length"] = end - start + 1
+    else:
+        response = FileResponse(fp, content_type=content_type)
+        response["Content-Length"] = st.st_size
+    return _cache_headers(response, path, etag, last_modified)
+
+
+class MediaFilesMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        prefix = settings.MEDIA_URL
+        # An absolute MEDIA_URL (CDN, bucket) is served elsewhere.
+        if prefix.startswith("/") and request.path_info.startswith(prefix):
+            return serve_media(request, request.path_info[len(prefix):])
+        return self.get_response(request)
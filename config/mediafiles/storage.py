@@ -0,0 +1,42 @@
+import hashlib
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASH_LENGTH = 12
+HASHED_NAME_RE = re.compile(rf"\.[0-9a-f]{{{HASH_LENGTH}}}\.[A-Za-z0-9]+$")
+
+
+def is_hashed_name(name):
+    """True for names written by ContentAddressedStorage (safe to cache forever)."""
+    return bool(HASHED_NAME_RE.search(name))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that puts a hash of the content in every name it
+    saves (``gallery/sunset.3f2a9c1b7d4e.jpg``). A URL then always means the
+    same bytes, so media can be served with ``Cache-Control: immutable``
+    (see mediafiles/middleware.py); replacing a file yields a new URL.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        root, ext = posixpath.splitext(name)
+        suffix = f".{digest.hexdigest()[:HASH_LENGTH]}{ext.lower()}"
+        if max_length is not None and len(root) + len(suffix) > max_length:
+            # Trim the readable part, never the hash.
+            head, stem = posixpath.split(root)
+            stem = stem[: max(1, len(stem) - (len(root) + len(suffix) - max_length))]
+            root = posixpath.join(head, stem)
+        return super().save(root + suffix, content, max_length)
@@ -0,0 +1,41 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+
+def _srcset(storage, variants):
+    return format_html_join(", ", "{} {}w", ((storage.url(name), width) for width, _, name in variants))
+
+
+@register.simple_tag
+def responsive_image(fieldfile, meta, sizes="100vw", alt="", css_class="", loading="lazy"):
+    """
+    ``<picture>`` for an image field with WebP/JPEG ``srcset``s, intrinsic
+    ``width``/``height`` and a blurred placeholder, from the field's
+    ``*_meta`` (see mediafiles/variants.py). Falls back to a plain ``<img>``
+    of the original when no variants exist yet.
+
+        {% responsive_image g.image g.image_meta sizes="(min-width: 1024px) 33vw, 100vw" alt=g.title %}
+    """
+    if not fieldfile:
+        return ""
+    if not meta or not meta.get("jpeg"):
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async">',
+            fieldfile.url, alt, css_class, loading,
+        )
+
+    storage = fieldfile.storage
+    largest = meta["jpeg"][-1]
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" '
+        'loading="{}" decoding="async" '
+        "style=\"background-size:cover;background-position:center;background-image:url('{}')\">"
+        "</picture>",
+        _srcset(storage, meta["webp"]), sizes,
+        storage.url(largest[2]), _srcset(storage, meta["jpeg"]), sizes,
+        meta["width"], meta["height"], alt, css_class,
+        loading, meta["placeholder"],
+    )
@@ -0,0 +1,177 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from listings.models import Listing
+from pages.models import GalleryImage
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def upload(name="photo.jpg", size=(1000, 500), fmt="JPEG", mode="RGB"):
+    buf = io.BytesIO()
+    Image.new(mode, size, "teal").save(buf, fmt)
+    return SimpleUploadedFile(name, buf.getvalue())
+
+
+def media_path(name):
+    return os.path.join(MEDIA_ROOT, name)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_VARIANT_WIDTHS=(320, 640, 1280))
+class ImageVariantTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def test_upload_builds_variants_without_upscaling(self):
+        g = GalleryImage.objects.create(title="Sunset", image=upload())
+        meta = GalleryImage.objects.get(pk=g.pk).image_meta
+
+        self.assertEqual(meta["source"], g.image.name)
+        self.assertEqual([v[:2] for v in meta["jpeg"]], [[320, 160], [640, 320], [1000, 500]])
+        self.assertEqual([v[0] for v in meta["webp"]], [320, 640, 1000])
+        self.assertEqual((meta["width"], meta["height"]), (1000, 500))
+        self.assertTrue(meta["placeholder"].startswith("data:image/jpeg;base64,"))
+        for _, _, name in meta["jpeg"] + meta["webp"]:
+            self.assertTrue(name.startswith("gallery/variants/"))
+            self.assertTrue(os.path.exists(media_path(name)))
+        with Image.open(media_path(meta["webp"][0][2])) as img:
+            self.assertEqual((img.format, img.size), ("WEBP", (320, 160)))
+
+    def test_transparent_png_flattens_for_jpeg(self):
+        listing = Listing.objects.create(
+            type=Listing.ListingType.JOB, title="Logo", image=upload("logo.png", (400, 400), "PNG", "RGBA"),
+        )
+        meta = listing.image_meta
+        self.assertEqual([v[0] for v in meta["jpeg"]], [320, 400])
+        self.assertTrue(meta["source"].startswith("listings/images/"))
+
+    def test_unrelated_saves_skip_and_replacing_cleans_up(self):
+        g = GalleryImage.objects.create(image=upload())
+        old = [name for _, _, name in g.image_meta["jpeg"]]
+
+        g.save(update_fields=["views"])
+        g.title = "Renamed"
+        g.save()
+        self.assertEqual([name for _, _, name in g.image_meta["jpeg"]], old)
+
+        g.image = upload("other.jpg", (300, 300))
+        g.save()
+        self.assertEqual([v[0] for v in g.image_meta["jpeg"]], [300])
+        self.assertFalse(any(os.path.exists(media_path(name)) for name in old))
+
+    def test_broken_upload_keeps_the_save(self):
+        with self.assertLogs("mediafiles.variants", "WARNING"):
+            g = GalleryImage.objects.create(image=SimpleUploadedFile("broken.jpg", b"not an image"))
+        self.assertEqual(GalleryImage.objects.get(pk=g.pk).image_meta, {})
+
+    def test_template_tag(self):
+        g = GalleryImage.objects.create(title="A <b>", image=upload())
+        template = Template(
+            '{% load responsive_images %}{% responsive_image g.image g.image_meta sizes="50vw" alt=g.title css_class="cover" %}'
+        )
+        html = template.render(Context({"g": g}))
+        self.assertIn('<source type="image/webp" srcset="/media/gallery/variants/', html)
+        self.assertRegex(html, r"-640w\.[0-9a-f]{12}\.webp 640w")
+        self.assertIn('width="1000" height="500"', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertIn('sizes="50vw"', html)
+        self.assertIn('alt="A &lt;b&gt;"', html)
+
+        g.image_meta = {}
+        html = template.render(Context({"g": g}))
+        self.assertIn(f'<img src="{g.image.url}"', html)
+        self.assertNotIn("srcset", html)
+
+    def test_backfill_command(self):
+        g = GalleryImage.objects.create(image=upload())
+        GalleryImage.objects.filter(pk=g.pk).update(image_meta={})
+        Listing.objects.create(type=Listing.ListingType.JOB, title="No image")
+
+        out = io.StringIO()
+        call_command("backfill_image_variants", stdout=out)
+        self.assertIn("pages.GalleryImage.image: 1 built, 0 failed", out.getvalue())
+        self.assertIn("listings.Listing.image: 0 built, 0 failed", out.getvalue())
+        self.assertEqual(len(GalleryImage.objects.get(pk=g.pk).image_meta["jpeg"]), 3)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, MEDIA_ACCEL_REDIRECT="")
+class MediaServingTests(TestCase):
+    body = bytes(range(256)) * 40
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.name = default_storage.save("gallery/clip.bin", ContentFile(self.body))
+        self.url = default_storage.url(self.name)
+
+    def test_upload_names_are_content_addressed(self):
+        digest = hashlib.sha256(self.body).hexdigest()[:12]
+        self.assertRegex(self.name, rf"^gallery/clip(_\w+)?\.{digest}\.bin$")
+        self.assertNotEqual(default_storage.save("gallery/clip.bin", ContentFile(b"other")), self.name)
+
+    def test_full_response_is_immutable_and_skips_the_stack(self):
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(b"".join(resp.streaming_content), self.body)
+        self.assertEqual(resp["Content-Length"], str(len(self.body)))
+        self.assertEqual(resp["Accept-Ranges"], "bytes")
+        self.assertIn("immutable", resp["Cache-Control"])
+        self.assertNotIn("sessionid", resp.cookies)
+
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_unhashed_names_revalidate(self):
+        os.makedirs(media_path("legacy"), exist_ok=True)
+        with open(media_path("legacy/old.jpg"), "wb") as fp:
+            fp.write(b"jpeg")
+        resp = self.client.get("/media/legacy/old.jpg")
+        self.assertEqual(resp["Content-Type"], "image/jpeg")
+        self.assertNotIn("immutable", resp["Cache-Control"])
+
+    def test_ranges(self):
+        resp = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(b"".join(resp.streaming_content), self.body[10:20])
+        self.assertEqual(resp["Content-Range"], f"bytes 10-19/{len(self.body)}")
+        self.assertEqual(resp["Content-Length"], "10")
+
+        resp = self.client.get(self.url, HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(resp.streaming_content), self.body[-5:])
+
+        resp = self.client.get(self.url, HTTP_RANGE=f"bytes={len(self.body)}-")
+        self.assertEqual(resp.status_code, 416)
+        self.assertEqual(resp["Content-Range"], f"bytes */{len(self.body)}")
+
+        # Stale If-Range: whole file
+        resp = self.client.get(self.url, HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(resp.status_code, 200)
+
+    def test_missing_and_traversal(self):
+        self.assertEqual(self.client.get("/media/gallery/nope.jpg").status_code, 404)
+        self.assertEqual(self.client.get("/media/../settings.py").status_code, 404)
+        self.assertEqual(self.client.get("/media/gallery/").status_code, 404)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT="/protected-media/")
+    def test_accel_redirect(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp["X-Accel-Redirect"], f"/protected-media/{self.name}")
+        self.assertEqual(resp.content, b"")
+        self.assertIn("immutable", resp["Cache-Control"])
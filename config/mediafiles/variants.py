@@ -0,0 +1,162 @@
+"""
+Responsive derivatives for uploaded images.
+
+Every image field listed in IMAGE_FIELDS gets fixed-width WebP and JPEG
+copies (never wider than the original), written next to the upload under
+``variants/``, plus a tiny blurred placeholder inlined as a data URI. What
+was generated is stored on the row itself in ``<field>_meta`` (a
+JSONField), so rendering ``{% responsive_image %}`` needs no extra query:
+
+    {"source": "gallery/a.jpg", "width": 1280, "height": 853,
+     "placeholder": "data:image/jpeg;base64,...",
+     "webp": [[320, 213, "gallery/variants/a-320w.webp"], ...],
+     "jpeg": [[320, 213, "gallery/variants/a-320w.jpg"], ...]}
+
+``width``/``height`` are those of the largest variant. An empty dict means
+"not generated yet" and templates fall back to the original file.
+"""
+
+import base64
+import io
+import logging
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# (app label, model, image field); the meta lives in "<field>_meta"
+IMAGE_FIELDS = (
+    ("listings", "Listing", "image"),
+    ("pages", "GalleryImage", "image"),
+)
+
+FORMATS = (
+    ("webp", "WEBP", "webp"),
+    ("jpeg", "JPEG", "jpg"),
+)
+PLACEHOLDER_WIDTH = 16
+
+
+def meta_field(field_name):
+    return f"{field_name}_meta"
+
+
+def variant_name(source, width, ext):
+    head, tail = posixpath.split(source)
+    stem = posixpath.splitext(tail)[0]
+    return posixpath.join(head, "variants", f"{stem}-{width}w.{ext}")
+
+
+def target_widths(width):
+    """Configured widths below ``width``, plus the original (capped at the largest)."""
+    widths = sorted(settings.IMAGE_VARIANT_WIDTHS)
+    return sorted({w for w in widths if w < width} | {min(width, widths[-1])})
+
+
+def _flatten(img):
+    """RGB copy of ``img`` for JPEG, with transparency over white."""
+    if img.mode == "RGB":
+        return img
+    rgba = img.convert("RGBA")
+    background = Image.new("RGB", rgba.size, (255, 255, 255))
+    background.paste(rgba, mask=rgba.getchannel("A"))
+    return background
+
+
+def _encode(img, fmt):
+    buf = io.BytesIO()
+    quality = settings.IMAGE_VARIANT_QUALITY
+    if fmt == "JPEG":
+        _flatten(img).save(buf, "JPEG", quality=quality, optimize=True, progressive=True)
+    else:
+        img.save(buf, "WEBP", quality=quality, method=4)
+    return buf.getvalue()
+
+
+def _load(fieldfile):
+    fieldfile.open("rb")
+    try:
+        img = Image.open(fieldfile)
+        # JPEGs decode at a reduced scale straight away when that is still
+        # at least as large as the biggest variant (either orientation).
+        largest = max(settings.IMAGE_VARIANT_WIDTHS)
+        img.draft("RGB", (largest, largest))
+        img = ImageOps.exif_transpose(img)
+        img.load()
+    finally:
+        fieldfile.close()
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+    return img
+
+
+def generate_variants(fieldfile):
+    """Write the derivatives of ``fieldfile`` to its storage; returns the meta dict."""
+    storage = fieldfile.storage
+    img = _load(fieldfile)
+    width, height = img.size
+
+    meta = {"source": fieldfile.name, "placeholder": "", **{key: [] for key, _, _ in FORMATS}}
+    for target in reversed(target_widths(width)):
+        size = (target, max(1, round(height * target / width)))
+        # Each step shrinks the previous one: cheaper than going from the original every time.
+        img = img.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0) if size != img.size else img
+        for key, fmt, ext in FORMATS:
+            name = variant_name(fieldfile.name, target, ext)
+            if storage.exists(name):
+                storage.delete(name)
+            name = storage.save(name, ContentFile(_encode(img, fmt)))
+            meta[key].insert(0, [size[0], size[1], name])
+    meta["width"], meta["height"] = meta["jpeg"][-1][:2]
+
+    tiny = img.resize((PLACEHOLDER_WIDTH, max(1, round(height * PLACEHOLDER_WIDTH / width))))
+    buf = io.BytesIO()
+    _flatten(tiny).save(buf, "JPEG", quality=40)
+    meta["placeholder"] = "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode()
+    return meta
+
+
+def variant_names(meta):
+    return {name for key, _, _ in FORMATS for _, _, name in meta.get(key, ())}
+
+
+def refresh_image_meta(instance, field_name, force=False):
+    """
+    Regenerate the variants of ``instance.<field_name>`` if the file changed
+    since they were made (or ``force``). Saves the meta with a queryset
+    update (no signals) and removes variant files that are no longer
+    used. Returns True if the meta changed. Image errors propagate.
+    """
+    fieldfile = getattr(instance, field_name)
+    meta_attr = meta_field(field_name)
+    old = getattr(instance, meta_attr) or {}
+    if not force and old.get("source") == (fieldfile.name or None):
+        return False
+
+    new = generate_variants(fieldfile) if fieldfile else {}
+    storage = fieldfile.storage
+    for name in variant_names(old) - variant_names(new):
+        storage.delete(name)
+
+    type(instance)._default_manager.filter(pk=instance.pk).update(**{meta_attr: new})
+    setattr(instance, meta_attr, new)
+    return True
+
+
+def refresh_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """post_save receiver for the models in IMAGE_FIELDS."""
+    if raw:
+        return
+    for app_label, model_name, field_name in IMAGE_FIELDS:
+        if sender._meta.label != f"{app_label}.{model_name}":
+            continue
+        if update_fields is not None and field_name not in update_fields:
+            continue
+        try:
+            refresh_image_meta(instance, field_name)
+        except (OSError, ValueError, Image.DecompressionBombError) as exc:
+            # Keep the save; templates fall back to the original file.
+            logger.warning("Could not build image variants for %s pk=%s: %s", sender._meta.label, instance.pk, exc)
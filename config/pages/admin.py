@@ -53,7 +53,7 @@ class GalleryImageAdmin(admin.ModelAdmin):
         }),
     )
     
-    readonly_fields = ('views', 'created_at')
+    readonly_fields = ('views', 'likes_count', 'created_at')
     
     def image_preview(self, obj):
         if obj.image:
@@ -62,10 +62,6 @@ class GalleryImageAdmin(admin.ModelAdmin):
     image_preview.allow_tags = True
     image_preview.short_description = "Preview"
     
-    def likes_count(self, obj):
-        return obj.likes.count()
-    likes_count.short_description = "Likes"
-    
     actions = ['publish_images', 'unpublish_images']
     
     def publish_images(self, request, queryset):
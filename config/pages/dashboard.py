@@ -0,0 +1,158 @@
+"""
+Staff dashboard metrics.
+
+``build_snapshot()`` computes every number on the dashboard in about ten
+queries: one conditional-aggregation pass each over Listing, Profile and
+ContactMessage, the view rollup (listings/rollups.py), the gallery totals
+and the short top-N lists. The result is cached as a DashboardSnapshot
+stamped with the time it was taken. It holds only plain values (listings
+as dicts of the fields the template shows), never model instances, so an
+entry cached before a deploy still unpickles after a model change. Each
+rebuild also brings the recent days of the charts' DailyMetric rollup up
+to date (pages/metrics.py).
+
+``dashboard_snapshot()`` serves the cached snapshot. Once it is older than
+DASHBOARD_SNAPSHOT_TTL it is still served, while a background thread
+rebuilds it (one per cluster, thanks to a cache lock). Only a cold cache
+makes a request wait for the queries; ``manage.py refresh_dashboard``
+warms it from cron or after a deploy.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from accounts.models import Profile
+from listings.models import Listing
+from listings.rollups import popular_listings, view_totals, views_by_day
+
+from .gallery import gallery_stats
+from .metrics import refresh_recent_metrics
+from .models import ContactMessage, GalleryLike
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = "pages:dashboard:snapshot"
+SNAPSHOT_MAX_AGE = 60 * 60 * 24  # seconds a snapshot is kept when refreshes keep failing
+REFRESH_LOCK_KEY = "pages:dashboard:refreshing"
+REFRESH_LOCK_TTL = 120  # seconds; frees the lock if a refreshing worker dies
+
+# Listing fields the dashboard's listing tables show
+LISTING_FIELDS = ("id", "title", "type", "organization", "country", "deadline", "created_at", "is_featured")
+
+
+@dataclass
+class DashboardSnapshot:
+    taken_at: datetime
+    metrics: dict = field(default_factory=dict)
+
+    @property
+    def age(self):
+        return (timezone.now() - self.taken_at).total_seconds()
+
+
+def _listing_metrics(today, soon):
+    listings = Listing.objects.aggregate(
+        total_listings=Count("id"),
+        jobs=Count("id", filter=Q(type=Listing.ListingType.JOB)),
+        scholarships=Count("id", filter=Q(type=Listing.ListingType.SCHOLARSHIP)),
+        courses=Count("id", filter=Q(type=Listing.ListingType.COURSE)),
+        featured=Count("id", filter=Q(is_featured=True)),
+        remote=Count("id", filter=Q(remote=True)),
+        closing_soon=Count("id", filter=Q(deadline__range=(today, soon))),
+        expired=Count("id", filter=Q(deadline__lt=today)),
+    )
+    total = listings["total_listings"]
+    listings["remote_pct"] = round((listings["remote"] / total) * 100, 1) if total else 0
+    return listings
+
+
+def build_snapshot():
+    """Compute every dashboard metric now."""
+    today = timezone.localdate()
+    start_7 = today - timedelta(days=6)
+    soon = today + timedelta(days=7)
+
+    metrics = {"today": today, "soon": soon}
+    metrics.update(_listing_metrics(today, soon))
+
+    # View stats (from the daily rollup, not the raw ListingView rows)
+    views_map = views_by_day(start_7)
+    last7_dates = [start_7 + timedelta(days=i) for i in range(7)]
+    metrics.update(
+        total_listing_views=view_totals(),
+        views_last_7_days=sum(views_map.values()),
+        views_labels=[d.strftime("%Y-%m-%d") for d in last7_dates],
+        views_data=[views_map.get(d, 0) for d in last7_dates],
+    )
+
+    metrics.update(Profile.objects.aggregate(
+        male=Count("id", filter=Q(gender=Profile.Gender.MALE)),
+        female=Count("id", filter=Q(gender=Profile.Gender.FEMALE)),
+        na=Count("id", filter=Q(gender=Profile.Gender.NA)),
+    ))
+
+    metrics["top_countries"] = list(
+        Listing.objects.exclude(country__isnull=True)
+        .exclude(country__exact="")
+        .values("country")
+        .annotate(c=Count("id"))
+        .order_by("-c")[:8]
+    )
+    metrics["top_viewed_listings"] = [
+        {"listing": {name: getattr(listing, name) for name in LISTING_FIELDS}, "views": views}
+        for listing, views in popular_listings(limit=8)
+    ]
+    metrics["latest_listings"] = list(Listing.objects.order_by("-created_at").values(*LISTING_FIELDS)[:8])
+
+    gallery = gallery_stats()
+    metrics.update(
+        gallery_images=gallery["images"],
+        gallery_likes=GalleryLike.objects.count(),  # all likes, unpublished images included
+        gallery_views=gallery["views"],
+    )
+    metrics.update(ContactMessage.objects.aggregate(
+        contact_messages=Count("id"),
+        unread_messages=Count("id", filter=Q(is_read=False)),
+    ))
+    return DashboardSnapshot(taken_at=timezone.now(), metrics=metrics)
+
+
+def refresh_snapshot():
+    """Bring recent DailyMetric rows up to date, then rebuild and cache the snapshot; returns it."""
+    refresh_recent_metrics()
+    snapshot = build_snapshot()
+    cache.set(SNAPSHOT_KEY, snapshot, SNAPSHOT_MAX_AGE)
+    return snapshot
+
+
+def _refresh_in_background():
+    try:
+        refresh_snapshot()
+    except Exception:
+        logger.exception("Dashboard snapshot refresh failed")
+    finally:
+        cache.delete(REFRESH_LOCK_KEY)
+        # This thread's own connections; the request's are untouched
+        connections.close_all()
+
+
+def start_refresh():
+    threading.Thread(target=_refresh_in_background, name="dashboard-refresh", daemon=True).start()
+
+
+def dashboard_snapshot():
+    """The cached snapshot, refreshed in the background once it is stale."""
+    snapshot = cache.get(SNAPSHOT_KEY)
+    if snapshot is None:
+        return refresh_snapshot()
+    if snapshot.age >= settings.DASHBOARD_SNAPSHOT_TTL and cache.add(REFRESH_LOCK_KEY, True, REFRESH_LOCK_TTL):
+        start_refresh()
+    return snapshot
@@ -0,0 +1,89 @@
+"""
+Gallery pages.
+
+The gallery is keyset-paginated newest first (listings/pagination.py), so
+a page costs the same however many images there are. The HTML page
+renders the first page; the gallery_more JSON endpoint (pages/views.py)
+returns each following page's cards plus the lightbox data for them, for
+infinite scroll; both get their page from ``gallery_page()``. Liked
+state is looked up for the images on the page only, and the header
+totals come from one cached aggregate.
+"""
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+
+from listings.pagination import KeysetPaginator
+
+from .models import GalleryImage, GalleryLike
+
+GALLERY_PAGE_SIZE = 24
+GALLERY_ORDERING = (("created_at", True), ("id", True))
+
+GALLERY_STATS_KEY = "pages:gallery:stats"
+GALLERY_STATS_TTL = 60  # seconds
+
+
+def published_images():
+    return GalleryImage.objects.filter(is_published=True)
+
+
+def gallery_stats():
+    """``{"images", "likes", "views"}`` totals over published images, cached briefly."""
+    stats = cache.get(GALLERY_STATS_KEY)
+    if stats is None:
+        stats = published_images().aggregate(
+            images=Count("id"), likes=Coalesce(Sum("likes_count"), 0), views=Coalesce(Sum("views"), 0),
+        )
+        cache.set(GALLERY_STATS_KEY, stats, GALLERY_STATS_TTL)
+    return stats
+
+
+def gallery_page(request):
+    """The page of published images selected by ``?page=&cursor=``."""
+    paginator = KeysetPaginator(
+        published_images(), GALLERY_PAGE_SIZE, GALLERY_ORDERING, count=lambda: gallery_stats()["images"],
+    )
+    try:
+        return paginator.page(request.GET.get("page"), request.GET.get("cursor"))
+    except ValueError:
+        # Garbage page number or tampered cursor: start over
+        return paginator.page(1)
+
+
+def liked_image_ids(request, image_ids):
+    """Which of ``image_ids`` the user (or, anonymously, the session) has liked."""
+    likes = GalleryLike.objects.filter(image_id__in=image_ids)
+    if request.user.is_authenticated:
+        likes = likes.filter(user=request.user)
+    elif request.session.session_key:
+        likes = likes.filter(session_key=request.session.session_key)
+    else:
+        # No session yet, so no likes (gallery_like creates one when needed)
+        return set()
+    return set(likes.values_list("image_id", flat=True))
+
+
+def next_page_url(page, url_name):
+    if not page.next_cursor:
+        return ""
+    return f"{reverse(url_name)}?page={page.number + 1}&cursor={page.next_cursor}"
+
+
+def lightbox_data(page, liked_ids):
+    """What the lightbox needs for each image on ``page``."""
+    return [
+        {
+            "id": g.pk,
+            "url": g.image.url,
+            "title": g.title,
+            "caption": g.caption,
+            "likes": g.likes_count,
+            "liked": g.pk in liked_ids,
+            "like_url": reverse("pages:gallery-like", args=[g.pk]),
+            "view_url": reverse("pages:gallery-view", args=[g.pk]),
+        }
+        for g in page
+    ]
@@ -0,0 +1,119 @@
+"""
+Live dashboard metrics over Server-Sent Events.
+
+``live_state()`` is the single shared producer: today's visits, views,
+likes, signups and messages (the pages/metrics.py sources for one day)
+plus the unread message count, kept in the cache with a sequence number.
+It is recomputed at most once per DASHBOARD_LIVE_INTERVAL across the whole
+cluster, whoever asks first taking a cache lock, so any number of open
+dashboards cost one set of small queries per interval. Each stream only
+reads the cached state and sends the values that changed since its last
+event.
+
+Under ASGI (config/asgi.py, e.g. gunicorn with uvicorn workers) a stream
+is a coroutine that stays open for LIVE_STREAM_MAX_AGE; EventSource then
+reconnects on its own, which keeps connections from piling up on one
+worker. Under WSGI a stream would hold a whole worker, so the response
+carries the current values only and the browser's reconnects (every
+interval) turn it into polling of the same cached state.
+"""
+
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .metrics import METRICS
+from .models import ContactMessage
+
+LIVE_STATE_KEY = "pages:live:state"
+LIVE_LOCK_KEY = "pages:live:producing"
+LIVE_STREAM_MAX_AGE = 15 * 60  # seconds
+HEARTBEAT_INTERVAL = 15  # seconds; keeps proxies from closing an idle stream
+
+
+def compute_live_metrics():
+    today = timezone.localdate()
+    metrics = {name: sum(value for _, value in source(today, today)) for name, source in METRICS.items()}
+    metrics["unread_messages"] = ContactMessage.objects.filter(is_read=False).count()
+    return metrics
+
+
+def live_state():
+    """``{"seq", "at", "metrics"}``, recomputed when it is older than DASHBOARD_LIVE_INTERVAL."""
+    state = cache.get(LIVE_STATE_KEY)
+    interval = settings.DASHBOARD_LIVE_INTERVAL
+    if state is not None and time.time() - state["at"] < interval:
+        return state
+    # One producer per interval; everyone else serves the previous state
+    if not cache.add(LIVE_LOCK_KEY, True, interval):
+        return state
+    state = {
+        "seq": (state["seq"] + 1) if state else 1,
+        "at": time.time(),
+        "metrics": compute_live_metrics(),
+    }
+    cache.set(LIVE_STATE_KEY, state, interval * 10)
+    return state
+
+
+def format_event(data, event=None, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class LiveStream:
+    """
+    One client's view of the shared state: a ``metrics`` event with every
+    value first, then only the values that changed, and a heartbeat
+    comment when nothing did for a while.
+    """
+
+    def __init__(self, max_age=None):
+        if max_age is None:
+            max_age = LIVE_STREAM_MAX_AGE
+        self.sent = {}
+        self.seq = None
+        self.ends = time.monotonic() + max_age
+        self.quiet_since = time.monotonic()
+
+    @property
+    def expired(self):
+        return time.monotonic() >= self.ends
+
+    def opening(self):
+        return f"retry: {int(settings.DASHBOARD_LIVE_INTERVAL * 1000)}\n\n"
+
+    def chunks(self, state):
+        if state is not None and state["seq"] != self.seq:
+            self.seq = state["seq"]
+            delta = {name: value for name, value in state["metrics"].items() if self.sent.get(name) != value}
+            if delta:
+                self.sent.update(delta)
+                self.quiet_since = time.monotonic()
+                yield format_event(delta, "metrics", self.seq)
+        if time.monotonic() - self.quiet_since >= HEARTBEAT_INTERVAL:
+            self.quiet_since = time.monotonic()
+            yield ": ping\n\n"
+
+
+async def live_events(max_age=None):
+    """The SSE stream for ASGI: polls the shared state once per interval until ``max_age``."""
+    get_state = sync_to_async(live_state)
+    stream = LiveStream(max_age)
+    yield stream.opening()
+    while True:
+        for chunk in stream.chunks(await get_state()):
+            yield chunk
+        if stream.expired:
+            return
+        await asyncio.sleep(settings.DASHBOARD_LIVE_INTERVAL)
@@ -0,0 +1,105 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncWeek
+
+from listings.sketches import merge_visitors, unique_visitors, unique_visitors_by_period
+from pages.models import SiteVisit, VisitorSketch
+
+
+def table_bytes(model):
+    """On-disk size of ``model``'s table and its indexes."""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+        elif connection.vendor == "sqlite":
+            cursor.execute(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+                "(SELECT name FROM sqlite_master WHERE tbl_name = %s)",
+                [table],
+            )
+        else:
+            return None
+        return cursor.fetchone()[0] or 0
+
+
+def timed(fn, runs=5):
+    samples, result = [], None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare one SiteVisit row per visitor per day with daily HyperLogLog "
+        "sketches: storage, distinct-visitor queries and their error. Everything "
+        "runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30)
+        parser.add_argument("--daily", type=int, default=5_000, help="Visitors per day")
+        parser.add_argument("--pool", type=int, default=40_000, help="Distinct visitors overall")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+        # Far-future dates keep the synthetic days apart from real data.
+        start = date(2100, 1, 4)
+        days = [start + timedelta(days=i) for i in range(opts["days"])]
+        pool = [f"{rng.getrandbits(128):032x}" for _ in range(opts["pool"])]
+        visits = [(key, day) for day in days for key in rng.sample(pool, opts["daily"])]
+
+        with transaction.atomic():
+            rows_before, sketches_before = table_bytes(SiteVisit), table_bytes(VisitorSketch)
+
+            started = time.perf_counter()
+            SiteVisit.objects.bulk_create(
+                [SiteVisit(session_key=key, date=day) for key, day in visits], batch_size=5000,
+            )
+            rows_write = time.perf_counter() - started
+            started = time.perf_counter()
+            merge_visitors(VisitorSketch, ("date",), (((day,), key) for key, day in visits))
+            sketch_write = time.perf_counter() - started
+
+            self.stdout.write(
+                f"{len(visits)} visits ({opts['daily']}/day over {opts['days']} days) on {connection.vendor}"
+            )
+            rows_size, sketch_size = table_bytes(SiteVisit), table_bytes(VisitorSketch)
+            if rows_size is not None:
+                self.stdout.write(
+                    f"  storage: rows {(rows_size - rows_before) / 1024:,.0f} KiB, "
+                    f"sketches {(sketch_size - sketches_before) / 1024:,.0f} KiB"
+                )
+            self.stdout.write(f"  write:   rows {rows_write * 1000:,.0f} ms, sketches {sketch_write * 1000:,.0f} ms")
+
+            site_rows = SiteVisit.objects.filter(date__gte=start)
+            sketches = VisitorSketch.objects.filter(date__gte=start)
+            exact, rows_ms = timed(lambda: site_rows.values("session_key").distinct().count())
+            estimate, sketch_ms = timed(lambda: unique_visitors(sketches))
+            self.stdout.write(
+                f"  distinct over {opts['days']} days: rows {exact} in {rows_ms:.1f} ms, "
+                f"sketches {estimate} in {sketch_ms:.1f} ms ({(estimate - exact) / exact:+.2%})"
+            )
+
+            exact_weeks, rows_ms = timed(lambda: dict(
+                site_rows.annotate(week=TruncWeek("date")).values_list("week")
+                .annotate(n=Count("session_key", distinct=True)).order_by()
+            ))
+            weeks, sketch_ms = timed(lambda: unique_visitors_by_period(sketches, "week"))
+            worst = max(abs(weeks[week] - n) / n for week, n in exact_weeks.items())
+            self.stdout.write(
+                f"  weekly distinct: rows {rows_ms:.1f} ms, sketches {sketch_ms:.1f} ms "
+                f"(worst week {worst:.2%} off)"
+            )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from pages.metrics import CATCHUP_DAYS, METRICS, recent_start, rollup_daily_metrics
+
+CHUNK_DAYS = 90
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the DailyMetric rollup behind the dashboard charts from the source "
+        f"tables (default: from the last rolled-up day, at most {CATCHUP_DAYS} days back, "
+        "and at least the last two days). Safe to re-run; schedule it daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="First day (YYYY-MM-DD)")
+        parser.add_argument("--until", help="Last day (YYYY-MM-DD), default today")
+        parser.add_argument("--metric", action="append", choices=sorted(METRICS), help="Only this metric (repeatable)")
+
+    def _date(self, opts, option, default):
+        if not opts[option]:
+            return default
+        day = parse_date(opts[option])
+        if day is None:
+            raise CommandError(f"--{option} must be a date (YYYY-MM-DD)")
+        return day
+
+    def handle(self, *args, **opts):
+        until = self._date(opts, "until", timezone.localdate())
+        since = self._date(opts, "since", None) or recent_start(until)
+        if since > until:
+            raise CommandError("--since is after --until")
+
+        written = 0
+        start = since
+        # A quarter at a time keeps each transaction short
+        while start <= until:
+            end = min(start + timedelta(days=CHUNK_DAYS - 1), until)
+            written += rollup_daily_metrics(start, end, opts["metric"])
+            start = end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"{written} daily metric row(s) written for {since} to {until}."))
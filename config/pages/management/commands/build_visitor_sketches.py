@@ -0,0 +1,66 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from listings.hll import HyperLogLog
+from listings.models import ListingView, ListingVisitorSketch
+from listings.sketches import merge_sketches
+from pages.models import SiteVisit, VisitorSketch
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold SiteVisit and ListingView rows into per-day HyperLogLog sketches "
+        "(VisitorSketch, ListingVisitorSketch), one day at a time. Safe to re-run: "
+        "merging the same visitors again changes nothing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="First day (YYYY-MM-DD)")
+        parser.add_argument("--until", help="Last day (YYYY-MM-DD)")
+        parser.add_argument(
+            "--delete-rows", action="store_true",
+            help="Delete the raw rows of each day once its sketches are written",
+        )
+
+    def _day_range(self, qs, opts):
+        for option, lookup in (("since", "date__gte"), ("until", "date__lte")):
+            if opts[option]:
+                day = parse_date(opts[option])
+                if day is None:
+                    raise CommandError(f"--{option} must be a date (YYYY-MM-DD)")
+                qs = qs.filter(**{lookup: day})
+        return sorted(qs.order_by().values_list("date", flat=True).distinct())
+
+    def handle(self, *args, **opts):
+        site_rows = listing_rows = 0
+        for day in self._day_range(SiteVisit.objects.all(), opts):
+            rows = SiteVisit.objects.filter(date=day)
+            sketch = HyperLogLog()
+            for key in rows.values_list("session_key", flat=True).iterator(chunk_size=5000):
+                sketch.add(key)
+                site_rows += 1
+            with transaction.atomic():
+                merge_sketches(VisitorSketch, ("date",), {(day,): sketch})
+                if opts["delete_rows"]:
+                    rows.delete()
+
+        for day in self._day_range(ListingView.objects.all(), opts):
+            rows = ListingView.objects.filter(date=day)
+            sketches = defaultdict(HyperLogLog)
+            for listing_id, key in rows.values_list("listing_id", "session_key").iterator(chunk_size=5000):
+                sketches[(listing_id, day)].add(key)
+                listing_rows += 1
+            with transaction.atomic():
+                merge_sketches(ListingVisitorSketch, ("listing", "date"), sketches)
+                if opts["delete_rows"]:
+                    rows.delete()
+
+        verb = "converted and deleted" if opts["delete_rows"] else "converted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{site_rows} SiteVisit and {listing_rows} ListingView rows {verb}; "
+            f"{VisitorSketch.objects.count()} daily and "
+            f"{ListingVisitorSketch.objects.count()} listing-day sketches."
+        ))
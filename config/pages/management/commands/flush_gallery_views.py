@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from pages.viewcounts import flush_gallery_views
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the gallery view counts pending in the cache to GalleryImage.views "
+        "(one UPDATE). Needs a cache shared with the web workers, such as Redis."
+    )
+
+    def handle(self, *args, **opts):
+        written = flush_gallery_views()
+        self.stdout.write(self.style.SUCCESS(f"{written} gallery view(s) written."))
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from listings.models import Listing, SavedListing
+from pages.models import GalleryImage, GalleryLike
+
+# (model, counter field, related model, foreign key on the related model)
+COUNTERS = (
+    (GalleryImage, "likes_count", GalleryLike, "image"),
+    (Listing, "saves_count", SavedListing, "listing"),
+)
+
+
+def actual_count(related, fk):
+    return Coalesce(
+        Subquery(
+            related.objects.filter(**{fk: OuterRef("pk")})
+            .order_by().values(fk).annotate(c=Count("id")).values("c")
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the denormalized like/save counters (GalleryImage.likes_count, "
+        "Listing.saves_count) and repair the rows that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it")
+
+    def handle(self, *args, **opts):
+        for model, counter, related, fk in COUNTERS:
+            label = f"{model.__name__}.{counter}"
+            with transaction.atomic():
+                drifted = list(
+                    model.objects.annotate(actual=actual_count(related, fk))
+                    .exclude(**{counter: F("actual")})
+                    .values_list("pk", flat=True)
+                )
+                if drifted and not opts["dry_run"]:
+                    # update() skips save() signals: no cache invalidation or
+                    # updated_at bump for a counter repair.
+                    model.objects.filter(pk__in=drifted).update(**{counter: actual_count(related, fk)})
+            verb = "would fix" if opts["dry_run"] else "fixed"
+            self.stdout.write(f"{label}: {verb} {len(drifted)} row(s)")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from pages.dashboard import refresh_snapshot
+
+
+class Command(BaseCommand):
+    help = "Rebuild the cached staff dashboard snapshot now (cron, or to warm the cache after a deploy)."
+
+    def handle(self, *args, **opts):
+        snapshot = refresh_snapshot()
+        self.stdout.write(self.style.SUCCESS(f"Dashboard snapshot taken at {snapshot.taken_at:%Y-%m-%d %H:%M:%S}."))
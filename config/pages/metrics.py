@@ -0,0 +1,167 @@
+"""
+Daily metric rollup and the dashboard's time series.
+
+``rollup_daily_metrics()`` recounts each metric per day from its source
+table over a date range and rewrites the matching DailyMetric rows, so it
+is exact and safe to re-run. The dashboard snapshot refresh
+(pages/dashboard.py) and ``manage.py build_daily_metrics`` keep it current
+from the last rolled-up day on, so days when nobody opened the dashboard
+are filled in later (up to CATCHUP_DAYS back; run the command from cron
+to never depend on that). ``build_daily_metrics --since`` backfills
+history.
+
+``time_series()`` answers any range, from a week to years, from those rows
+alone: one GROUP BY over at most a few thousand small rows, bucketed by
+day, week or month so a chart never gets more than a few hundred points.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import Trunc, TruncDate
+from django.utils import timezone
+
+from listings.models import ListingViewDaily
+from listings.sketches import PERIODS, period_start
+
+from .models import ContactMessage, DailyMetric, GalleryLike, SiteVisit, VisitorSketch
+
+RECENT_DAYS = 2  # today and yesterday
+CATCHUP_DAYS = 31  # furthest back a refresh goes to fill days nobody rolled up
+
+MAX_SPAN_DAYS = 366 * 10
+
+# Widest range (in days) each bucket is picked for when ``bucket="auto"``
+AUTO_BUCKETS = ((92, "day"), (366 * 2, "week"))
+
+
+def _day_bounds(start, end):
+    """Aware datetimes spanning ``start`` to the end of ``end`` (for indexable range filters)."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def _per_day(qs, stamp, start, end):
+    since, until = _day_bounds(start, end)
+    return (
+        qs.filter(**{f"{stamp}__gte": since, f"{stamp}__lt": until})
+        .annotate(day=TruncDate(stamp))
+        .values_list("day")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+
+
+def _listing_views(start, end):
+    return (
+        ListingViewDaily.objects.filter(date__range=(start, end))
+        .values_list("date").annotate(n=Sum("views")).order_by()
+    )
+
+
+def _site_visits(start, end):
+    if settings.VISITOR_ANALYTICS == "sketch":
+        return VisitorSketch.objects.filter(date__range=(start, end)).values_list("date", "visitors")
+    return SiteVisit.objects.filter(date__range=(start, end)).values_list("date").annotate(n=Count("id")).order_by()
+
+
+# metric name -> callable(start, end) returning (date, value) pairs
+METRICS = {
+    "listing_views": _listing_views,
+    "site_visits": _site_visits,
+    "signups": lambda start, end: _per_day(User.objects.all(), "date_joined", start, end),
+    "likes": lambda start, end: _per_day(GalleryLike.objects.all(), "created_at", start, end),
+    "contact_messages": lambda start, end: _per_day(ContactMessage.objects.all(), "created_at", start, end),
+}
+
+
+def rollup_daily_metrics(start, end, metrics=None):
+    """Recount ``metrics`` (default: all) for every day from ``start`` to ``end``; returns rows written."""
+    written = 0
+    for metric in metrics or METRICS:
+        rows = [
+            DailyMetric(metric=metric, date=day, value=value)
+            for day, value in METRICS[metric](start, end) if value
+        ]
+        with transaction.atomic():
+            # Days that dropped to zero lose their row
+            DailyMetric.objects.filter(metric=metric, date__range=(start, end)).delete()
+            DailyMetric.objects.bulk_create(rows)
+        written += len(rows)
+    return written
+
+
+def recent_start(today):
+    """First day a refresh recounts: the last rolled-up day, within RECENT_DAYS..CATCHUP_DAYS of ``today``."""
+    start = today - timedelta(days=RECENT_DAYS - 1)
+    last = DailyMetric.objects.aggregate(last=Max("date"))["last"]
+    if last is not None and last < start:
+        start = max(last, today - timedelta(days=CATCHUP_DAYS - 1))
+    return start
+
+
+def refresh_recent_metrics():
+    today = timezone.localdate()
+    return rollup_daily_metrics(recent_start(today), today)
+
+
+def auto_bucket(start, end):
+    span = (end - start).days + 1
+    for widest, bucket in AUTO_BUCKETS:
+        if span <= widest:
+            return bucket
+    return "month"
+
+
+def bucket_starts(start, end, bucket):
+    """Every bucket from the one holding ``start`` to the one holding ``end``."""
+    current = period_start(start, bucket)
+    while current <= end:
+        yield current
+        if bucket == "day":
+            current += timedelta(days=1)
+        elif bucket == "week":
+            current += timedelta(days=7)
+        else:
+            current = (current + timedelta(days=32)).replace(day=1)
+
+
+def time_series(metrics, start, end, bucket="auto"):
+    """
+    Columnar series for ``metrics`` between two dates:
+    ``{"bucket", "labels": [bucket start, ...], "series": {metric: [value, ...]}}``.
+    Edge buckets only count the days inside the range.
+    """
+    unknown = set(metrics) - set(METRICS)
+    if unknown:
+        raise ValueError(f"unknown metric: {', '.join(sorted(unknown))}")
+    if end < start:
+        raise ValueError("end is before start")
+    if (end - start).days >= MAX_SPAN_DAYS:
+        raise ValueError(f"ranges are limited to {MAX_SPAN_DAYS} days")
+    if bucket == "auto":
+        bucket = auto_bucket(start, end)
+    elif bucket not in PERIODS:
+        raise ValueError(f"bucket must be auto or one of {', '.join(PERIODS)}")
+
+    period = F("date") if bucket == "day" else Trunc("date", bucket)
+    rows = (
+        DailyMetric.objects.filter(metric__in=metrics, date__range=(start, end))
+        .annotate(period=period)
+        .values_list("metric", "period")
+        .annotate(total=Sum("value"))
+        .order_by()
+    )
+    totals = {(metric, day): total for metric, day, total in rows}
+    labels = list(bucket_starts(start, end, bucket))
+    return {
+        "bucket": bucket,
+        "labels": [day.isoformat() for day in labels],
+        "series": {metric: [totals.get((metric, day), 0) for day in labels] for metric in metrics},
+    }
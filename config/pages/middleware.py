@@ -1,5 +1,6 @@
-from django.utils import timezone
-from .models import SiteVisit
+from config.visitors import set_visitor_cookie
+
+from .visits import record_site_visit
 
 
 class SiteVisitMiddleware:
@@ -9,16 +10,10 @@ class SiteVisitMiddleware:
     def __call__(self, request):
         response = self.get_response(request)
 
-        # Ignore admin pages
-        if request.path.startswith("/admin"):
-            return response
-
-        if not request.session.session_key:
-            request.session.save()
-
-        SiteVisit.objects.get_or_create(
-            session_key=request.session.session_key,
-            date=timezone.localdate()
-        )
+        # Ignore admin pages and API clients (no cookies: every call would
+        # look like a new visitor)
+        if not request.path.startswith(("/admin", "/api/")):
+            record_site_visit(request)
 
+        set_visitor_cookie(request, response)
         return response
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:27
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_likes(apps, schema_editor):
+    GalleryImage = apps.get_model("pages", "GalleryImage")
+    GalleryLike = apps.get_model("pages", "GalleryLike")
+    likes = (
+        GalleryLike.objects.filter(image=OuterRef("pk"))
+        .order_by().values("image").annotate(c=Count("id")).values("c")
+    )
+    GalleryImage.objects.update(likes_count=Coalesce(Subquery(likes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0007_contactmessage_replied_contactmessage_replied_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='galleryimage',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_likes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0009_image_meta'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sitevisit',
+            name='date',
+            field=models.DateField(default=django.utils.timezone.localdate, editable=False),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0010_sitevisit_date_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VisitorSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('sketch', models.BinaryField()),
+                ('visitors', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
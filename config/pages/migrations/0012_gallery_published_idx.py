@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0011_visitorsketch'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='galleryimage',
+            index=models.Index(fields=['is_published', '-created_at', '-id'], name='gallery_published_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0012_gallery_published_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=32)),
+                ('date', models.DateField()),
+                ('value', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('metric', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0013_dailymetric'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='galleryimage',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -8,22 +8,27 @@ class GalleryImage(models.Model):
     title = models.CharField(max_length=200, blank=True)
     caption = models.TextField(blank=True)
     image = models.ImageField(upload_to="gallery/")
+    # Responsive variants of image (mediafiles/variants.py)
+    image_meta = models.JSONField(default=dict, blank=True, editable=False)
     is_published = models.BooleanField(default=True)
     order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
-    views = models.PositiveIntegerField(default=0)  # ADDED THIS FIELD
+    # Bumped in set-based batches by pages/viewcounts.py
+    views = models.PositiveIntegerField(default=0)
+    # Denormalized GalleryLike count, kept in step by gallery_like
+    # (reconcile_counters repairs drift)
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
     
     class Meta:
         ordering = ["order", "-created_at"]
+        indexes = [
+            # Keyset pages of the public gallery (pages/gallery.py)
+            models.Index(fields=["is_published", "-created_at", "-id"], name="gallery_published_idx"),
+        ]
 
     def __str__(self):
         return self.title or f"Gallery Image {self.id}"
 
-    def increment_views(self):
-        """Increment the view count for this image."""
-        self.views += 1
-        self.save(update_fields=['views'])
-
 
 class GalleryLike(models.Model):
     image = models.ForeignKey(GalleryImage, on_delete=models.CASCADE, related_name="likes")
@@ -52,8 +57,11 @@ class GalleryLike(models.Model):
 
 
 class SiteVisit(models.Model):
+    # Visitor id (config.visitors.visitor_key), formerly the session key
     session_key = models.CharField(max_length=40)
-    date = models.DateField(auto_now_add=True)
+    # Set explicitly by the write-behind buffer (auto_now_add would stamp
+    # the flush date instead of the visit date).
+    date = models.DateField(default=timezone.localdate, editable=False)
 
     class Meta:
         unique_together = (("session_key", "date"),)
@@ -62,6 +70,39 @@ class SiteVisit(models.Model):
         return f"{self.session_key} - {self.date}"
 
 
+class VisitorSketch(models.Model):
+    """
+    HyperLogLog sketch of the site's distinct visitors on one day, kept
+    instead of SiteVisit rows when VISITOR_ANALYTICS = "sketch" (see
+    listings/sketches.py). ``visitors`` is the sketch's estimate.
+    """
+
+    date = models.DateField(unique=True)
+    sketch = models.BinaryField()
+    visitors = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.date} - ~{self.visitors} visitors"
+
+
+class DailyMetric(models.Model):
+    """
+    One dashboard metric's total for one day (listing views, site visits,
+    signups, ...), rolled up from the source tables by pages/metrics.py so
+    the dashboard's time series never scan raw events.
+    """
+
+    metric = models.CharField(max_length=32)
+    date = models.DateField()
+    value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = (("metric", "date"),)
+
+    def __str__(self):
+        return f"{self.metric} {self.date}: {self.value}"
+
+
 class ContactMessage(models.Model):
     name = models.CharField(max_length=120)
     email = models.EmailField()
@@ -1,8 +1,40 @@
-from django.test import TestCase, Client
+import io
+import shutil
+import tempfile
+import threading
+from datetime import date, datetime, time, timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.core.cache import cache
+from django.template import RequestContext, Template
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.core.files.uploadedfile import SimpleUploadedFile
-from .models import GalleryImage
+from django.utils import timezone
+from listings.models import Listing, ListingView, ListingViewDaily, ListingVisitorSketch, SavedListing
+from listings.sketches import unique_visitors
+from .models import ContactMessage, DailyMetric, GalleryImage, GalleryLike, SiteVisit, VisitorSketch
+from . import dashboard, live, viewcounts
+from .gallery import GALLERY_PAGE_SIZE
+from .metrics import refresh_recent_metrics, rollup_daily_metrics, time_series
+from .visits import site_visit_buffer, visit_total
+
+
+# Uploads made by these tests go here, not into the real MEDIA_ROOT
+MEDIA_ROOT = tempfile.mkdtemp()
+
 
+def tearDownModule():
+    # Don't flush queued visits at exit into the destroyed test database.
+    site_visit_buffer.clear()
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
 
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
 class GalleryLikeTests(TestCase):
     def setUp(self):
         self.client = Client()
@@ -15,6 +47,569 @@ class GalleryLikeTests(TestCase):
         self.assertEqual(resp.status_code, 200)
         data = resp.json()
         self.assertIn("likes", data)
+
+
+def write_statements(ctx, *tables):
+    """Verbs of the INSERT/UPDATE/DELETE statements touching ``tables``, in order."""
+    return [
+        q["sql"].split()[0] for q in ctx.captured_queries
+        if q["sql"].split()[0] in ("INSERT", "UPDATE", "DELETE") and any(t in q["sql"] for t in tables)
+    ]
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class CounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        img_file = SimpleUploadedFile("img.jpg", b"\x47\x49\x46\x38", content_type="image/jpeg")
+        self.img = GalleryImage.objects.create(title="G", caption="c", image=img_file)
+        self.listing = Listing.objects.create(type=Listing.ListingType.JOB, title="Counted", status=Listing.Status.ACTIVE)
+        self.user = User.objects.create_user(username="counter", password="pass12345")
+
+    def test_like_toggle_statements(self):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.post(f"/en/gallery/{self.img.pk}/like/").json()
+        self.assertEqual(data, {"liked": True, "likes": 1})
+        # The DELETE is the existence probe (no rows), then INSERT + counter UPDATE
+        self.assertEqual(
+            write_statements(ctx, "pages_gallerylike", "pages_galleryimage"), ["DELETE", "INSERT", "UPDATE"]
+        )
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.post(f"/en/gallery/{self.img.pk}/like/").json()
+        self.assertEqual(data, {"liked": False, "likes": 0})
+        self.assertEqual(write_statements(ctx, "pages_gallerylike", "pages_galleryimage"), ["DELETE", "UPDATE"])
+
+    def test_save_toggle_maintains_saves_count(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(f"/en/listings/{self.listing.pk}/save/")
+        self.assertEqual(
+            write_statements(ctx, "listings_savedlisting", "listings_listing"), ["DELETE", "INSERT", "UPDATE"]
+        )
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.saves_count, 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(f"/en/listings/{self.listing.pk}/save/")
+        self.assertEqual(write_statements(ctx, "listings_savedlisting", "listings_listing"), ["DELETE", "UPDATE"])
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.saves_count, 0)
+
+    def test_gallery_page_does_not_aggregate_likes(self):
+        GalleryLike.objects.create(image=self.img, session_key="s")
+        GalleryImage.objects.filter(pk=self.img.pk).update(likes_count=1)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/en/gallery/")
+        self.assertEqual(resp.context["total_likes"], 1)
+        self.assertFalse(any("COUNT" in q["sql"] and "pages_gallerylike" in q["sql"] for q in ctx.captured_queries))
+
+    def test_reconcile_repairs_drift(self):
+        GalleryLike.objects.create(image=self.img, session_key="s")
+        SavedListing.objects.create(user=self.user, listing=self.listing)
+        Listing.objects.filter(pk=self.listing.pk).update(saves_count=5)
+
+        out = io.StringIO()
+        call_command("reconcile_counters", stdout=out)
+        self.assertIn("GalleryImage.likes_count: fixed 1 row(s)", out.getvalue())
+        self.assertIn("Listing.saves_count: fixed 1 row(s)", out.getvalue())
+        self.img.refresh_from_db()
+        self.listing.refresh_from_db()
+        self.assertEqual((self.img.likes_count, self.listing.saves_count), (1, 1))
+class SiteVisitTests(TestCase):
+    def setUp(self):
+        site_visit_buffer.clear()
+        self.addCleanup(site_visit_buffer.clear)
+
+    def test_first_visit_sets_cookie_without_a_session(self):
+        resp = self.client.get("/en/contact/")
+        visitor = resp.cookies["visitor_id"].value
+        self.assertNotIn("sessionid", resp.cookies)
+        self.assertEqual(SiteVisit.objects.count(), 0)
+
+        self.assertEqual(site_visit_buffer.flush(), 1)
+        visit = SiteVisit.objects.get()
+        self.assertEqual((visit.session_key, visit.date), (visitor, timezone.localdate()))
+
+    def test_repeat_visits_cost_no_visit_or_session_queries(self):
+        self.client.get("/en/contact/")
+        site_visit_buffer.flush()
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/en/contact/")
+            self.client.get("/en/contact/")
+        self.assertNotIn("visitor_id", resp.cookies)
+        touched = [q["sql"] for q in ctx.captured_queries if "pages_sitevisit" in q["sql"] or "django_session" in q["sql"]]
+        self.assertEqual(touched, [])
+        self.assertEqual(len(site_visit_buffer), 0)
+
+    def test_new_day_is_a_new_visit(self):
+        self.client.get("/en/contact/")
+        site_visit_buffer.flush()
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        with mock.patch("pages.visits.timezone.localdate", return_value=tomorrow):
+            self.client.get("/en/contact/")
+        site_visit_buffer.flush()
+        self.assertEqual(SiteVisit.objects.count(), 2)
+
+    def test_flush_ignores_rows_written_elsewhere(self):
+        self.client.get("/en/contact/")
+        SiteVisit.objects.create(session_key=self.client.cookies["visitor_id"].value)
+        self.assertEqual(site_visit_buffer.flush(), 1)
+        self.assertEqual(SiteVisit.objects.count(), 1)
+
+
+class VisitTotalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        site_visit_buffer.clear()
+        self.addCleanup(site_visit_buffer.clear)
+        SiteVisit.objects.create(session_key="a")
+        SiteVisit.objects.create(session_key="b")
+
+    def test_total_is_cached(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(visit_total(), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(visit_total(), 2)
+
+    def test_flush_bumps_the_cached_total_by_new_rows_only(self):
+        visit_total()
+        today = timezone.localdate()
+        site_visit_buffer.add(("a", today))  # written by another worker
+        site_visit_buffer.add(("c", today))
+        site_visit_buffer.flush()
+        with self.assertNumQueries(0):
+            self.assertEqual(visit_total(), 3)
+        self.assertEqual(SiteVisit.objects.count(), 3)
+
+    @override_settings(SITE_VISIT_TOTAL_ESTIMATE=True)
+    def test_estimate_mode_falls_back_to_count_off_postgres(self):
+        self.assertEqual(visit_total(), 2)
+
+    def test_context_processor_is_lazy(self):
+        template = Template("{{ total_site_visits }}")
+        request = RequestFactory().get("/")
+        with self.assertNumQueries(0):
+            Template("no stats here").render(RequestContext(request, {}))
+        with self.assertNumQueries(1):
+            self.assertEqual(template.render(RequestContext(request, {})), "2")
+
+
+@override_settings(VISITOR_ANALYTICS="sketch")
+class VisitorSketchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        site_visit_buffer.clear()
+        self.addCleanup(site_visit_buffer.clear)
+
+    def test_visits_go_to_the_daily_sketch(self):
+        for _ in range(3):
+            Client().get("/en/contact/")
+        site_visit_buffer.flush()
+
+        self.assertFalse(SiteVisit.objects.exists())
+        sketch = VisitorSketch.objects.get()
+        self.assertEqual((sketch.date, sketch.visitors), (timezone.localdate(), 3))
+        self.assertEqual(visit_total(), 3)
+
+    def test_build_visitor_sketches(self):
+        today = timezone.localdate()
+        listing = Listing.objects.create(type=Listing.ListingType.JOB, title="Old views")
+        for i in range(12):
+            SiteVisit.objects.create(session_key=f"v{i}", date=today - timedelta(days=i % 2))
+            ListingView.objects.create(listing=listing, session_key=f"v{i}", date=today)
+
+        out = io.StringIO()
+        call_command("build_visitor_sketches", stdout=out)
+        call_command("build_visitor_sketches", stdout=out)  # re-running is harmless
+        self.assertEqual(
+            dict(VisitorSketch.objects.values_list("date", "visitors")),
+            {today: 6, today - timedelta(days=1): 6},
+        )
+        self.assertEqual(ListingVisitorSketch.objects.get().visitors, 12)
+        self.assertEqual(SiteVisit.objects.count(), 12)
+
+        call_command("build_visitor_sketches", "--since", today.isoformat(), "--delete-rows", stdout=out)
+        self.assertEqual(list(SiteVisit.objects.values_list("date", flat=True).distinct()), [today - timedelta(days=1)])
+        self.assertFalse(ListingView.objects.exists())
+        self.assertEqual(unique_visitors(VisitorSketch.objects.all()), 12)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class GalleryViewCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        viewcounts.clear()
+        self.addCleanup(viewcounts.clear)
+        self.image = GalleryImage.objects.create(
+            title="Counted", image=SimpleUploadedFile("c.gif", b"GIF89a", content_type="image/gif")
+        )
+        self.url = f"/en/gallery/{self.image.pk}/view/"
+
+    def test_one_view_per_visitor_per_day(self):
+        first, second = Client(), Client()
+        for client in (first, first, second):
+            self.assertEqual(client.post(self.url).status_code, 204)
+        # The first view ran the flush; the rest wait for the next one
+        self.assertEqual(GalleryImage.objects.get(pk=self.image.pk).views, 1)
+        self.assertEqual(viewcounts.pending_views([self.image.pk]), {self.image.pk: 1})
+
+        out = io.StringIO()
+        call_command("flush_gallery_views", stdout=out)
+        self.assertIn("1 gallery view(s) written", out.getvalue())
+        self.assertEqual(GalleryImage.objects.get(pk=self.image.pk).views, 2)
+        self.assertEqual(viewcounts.pending_views([self.image.pk]), {})
+
+        GalleryImage.objects.filter(pk=self.image.pk).update(is_published=False)
+        self.assertEqual(Client().post(self.url).status_code, 404)
+
+    def test_flush_is_one_update(self):
+        other = GalleryImage.objects.create(image=SimpleUploadedFile("d.gif", b"GIF89a"))
+        cache.add(viewcounts.FLUSH_DUE_KEY, True)
+        factory = RequestFactory()
+        for image, n in ((self.image, 3), (other, 5)):
+            for _ in range(n):
+                viewcounts.record_gallery_view(factory.post("/"), image.pk)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(viewcounts.flush_gallery_views(), 8)
+        self.assertEqual(len(write_statements(ctx, "pages_galleryimage")), 1)
+        self.assertEqual(
+            dict(GalleryImage.objects.values_list("pk", "views")), {self.image.pk: 3, other.pk: 5},
+        )
+
+    def test_failed_flush_keeps_the_counts(self):
+        cache.add(viewcounts.FLUSH_DUE_KEY, True)
+        viewcounts.record_gallery_view(RequestFactory().post("/"), self.image.pk)
+        with mock.patch.object(GalleryImage.objects, "filter", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                viewcounts.flush_gallery_views()
+        self.assertEqual(viewcounts.flush_gallery_views(), 1)
+        self.assertEqual(GalleryImage.objects.get(pk=self.image.pk).views, 1)
+
+    def test_evicted_counter_is_skipped(self):
+        other = GalleryImage.objects.create(image=SimpleUploadedFile("d.gif", b"GIF89a"))
+        cache.add(viewcounts.FLUSH_DUE_KEY, True)
+        for image in (self.image, other):
+            viewcounts.record_gallery_view(RequestFactory().post("/"), image.pk)
+        decr = cache.decr
+
+        def evict_other(key, n):
+            if key == viewcounts.COUNTER_KEY.format(other.pk):
+                cache.delete(key)
+            return decr(key, n)
+
+        with mock.patch.object(viewcounts.cache, "decr", side_effect=evict_other):
+            self.assertEqual(viewcounts.flush_gallery_views(), 1)
+        self.assertEqual(GalleryImage.objects.get(pk=self.image.pk).views, 1)
+        self.assertEqual(viewcounts.pending_views([self.image.pk, other.pk]), {})
+
+        # A failed UPDATE restores what was taken, and only that
+        for image in (self.image, other):
+            viewcounts.clear()
+            viewcounts.record_gallery_view(RequestFactory().post("/"), image.pk)
+        with mock.patch.object(viewcounts.cache, "decr", side_effect=evict_other), \
+                mock.patch.object(GalleryImage.objects, "filter", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                viewcounts.flush_gallery_views()
+        self.assertEqual(viewcounts.pending_views([self.image.pk, other.pk]), {self.image.pk: 1})
+
+    def test_no_lost_increments_under_parallel_load(self):
+        cache.add(viewcounts.FLUSH_DUE_KEY, True)
+        workers, per_worker = 8, 250
+        factory = RequestFactory()
+        start = threading.Barrier(workers + 1)
+
+        def visit():
+            start.wait()
+            for _ in range(per_worker):
+                viewcounts.record_gallery_view(factory.post("/"), self.image.pk)
+
+        threads = [threading.Thread(target=visit) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        # Flush over and over while the views pour in
+        written = 0
+        while any(thread.is_alive() for thread in threads):
+            written += viewcounts.flush_gallery_views()
+        for thread in threads:
+            thread.join()
+        written += viewcounts.flush_gallery_views()
+
+        self.assertEqual(written, workers * per_worker)
+        self.assertEqual(GalleryImage.objects.get(pk=self.image.pk).views, workers * per_worker)
+
+
+class GalleryPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # bulk_create skips the post_save hook that builds image variants
+        GalleryImage.objects.bulk_create(
+            [GalleryImage(title=f"Image {i}", image=f"gallery/{i}.jpg") for i in range(30)]
+        )
+        GalleryImage.objects.create(title="Hidden", image="gallery/hidden.jpg", is_published=False)
+        self.newest_first = list(
+            GalleryImage.objects.filter(is_published=True).order_by("-created_at", "-id").values_list("pk", flat=True)
+        )
+
+    def test_pages_and_json(self):
+        resp = self.client.get("/en/gallery/")
+        self.assertEqual([g.pk for g in resp.context["images"]], self.newest_first[:GALLERY_PAGE_SIZE])
+        self.assertEqual(resp.context["total_images"], 30)
+        self.assertEqual(len(resp.context["lightbox"]), GALLERY_PAGE_SIZE)
+        self.assertContains(resp, 'id="gallery-lightbox"')
+        self.assertNotIn("sessionid", resp.cookies)
+
+        data = self.client.get(resp.context["next_url"]).json()
+        self.assertEqual([g["id"] for g in data["images"]], self.newest_first[GALLERY_PAGE_SIZE:])
+        self.assertEqual(data["images"][0]["view_url"], f"/en/gallery/{data['images'][0]['id']}/view/")
+        self.assertEqual(data["html"].count("<article"), 30 - GALLERY_PAGE_SIZE)
+        self.assertEqual(data["next"], "")
+
+        # Without JavaScript the "Load more" link is a plain page
+        page2 = self.client.get(f"/en/gallery/?page=2&cursor={resp.context['page_obj'].next_cursor}")
+        self.assertEqual(len(page2.context["images"]), 30 - GALLERY_PAGE_SIZE)
+        self.assertEqual(self.client.get("/en/gallery/?cursor=garbage").status_code, 200)
+
+    def test_liked_state_for_the_page_only(self):
+        last = self.newest_first[-1]
+        self.client.post(f"/en/gallery/{last}/like/")
+        session_key = self.client.session.session_key
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/en/gallery/")
+        self.assertEqual(resp.context["liked_ids"], set())
+        like_queries = [q["sql"] for q in ctx.captured_queries if "pages_gallerylike" in q["sql"]]
+        self.assertEqual(len(like_queries), 1)
+        self.assertIn(session_key, like_queries[0])
+
+        data = self.client.get(resp.context["next_url"]).json()
+        self.assertEqual([g["id"] for g in data["images"] if g["liked"]], [last])
+        self.assertEqual(data["html"].count('fa-heart text-rose-500"'), 1)
+
+
+class DashboardSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        today = timezone.localdate()
+        Listing.objects.create(type=Listing.ListingType.JOB, title="Remote job", remote=True, is_featured=True)
+        Listing.objects.create(
+            type=Listing.ListingType.SCHOLARSHIP, title="Soon", country="AF", deadline=today + timedelta(days=3),
+        )
+        Listing.objects.create(type=Listing.ListingType.COURSE, title="Old", deadline=today - timedelta(days=3))
+        ContactMessage.objects.create(name="A", email="a@example.com", message="Hi")
+        ContactMessage.objects.create(name="B", email="b@example.com", message="Hi", is_read=True)
+        self.staff = User.objects.create_user(username="staff", password="pass12345", is_staff=True)
+        self.staff.profile.gender = "F"
+        self.staff.profile.save()
+        self.client.force_login(self.staff)
+
+    def test_metrics(self):
+        ctx = self.client.get("/en/dashboard/").context
+        self.assertEqual(
+            [ctx[k] for k in ("total_listings", "jobs", "scholarships", "courses", "featured", "remote")],
+            [3, 1, 1, 1, 1, 1],
+        )
+        self.assertEqual((ctx["remote_pct"], ctx["closing_soon"], ctx["expired"]), (33.3, 1, 1))
+        self.assertEqual((ctx["male"], ctx["female"], ctx["na"]), (0, 1, 0))
+        self.assertEqual((ctx["contact_messages"], ctx["unread_messages"]), (2, 1))
+        self.assertEqual(ctx["top_countries"], [{"country": "AF", "c": 1}])
+        self.assertEqual(len(ctx["latest_listings"]), 3)
+        self.assertIsNotNone(ctx["snapshot_taken_at"])
+
+    def test_snapshot_holds_no_model_instances(self):
+        listing = Listing.objects.get(title="Soon")
+        ListingViewDaily.objects.create(listing=listing, date=timezone.localdate(), views=4)
+        resp = self.client.get("/en/dashboard/")
+        (top,) = resp.context["top_viewed_listings"]
+        self.assertEqual((top["listing"]["id"], top["listing"]["title"], top["views"]), (listing.pk, "Soon", 4))
+        self.assertTrue(all(isinstance(row, dict) for row in resp.context["latest_listings"]))
+        self.assertContains(resp, "Scholarship")
+
+    def test_warm_dashboard_reads_only_the_cache(self):
+        self.client.get("/en/dashboard/")
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/en/dashboard/")
+        self.assertContains(resp, "As of")
+        tables = ("listings_", "accounts_profile", "pages_")
+        self.assertFalse([q["sql"] for q in ctx.captured_queries if any(t in q["sql"] for t in tables)])
+
+    def test_stale_snapshot_is_served_while_it_refreshes(self):
+        call_command("refresh_dashboard", stdout=io.StringIO())
+        snapshot = cache.get(dashboard.SNAPSHOT_KEY)
+        snapshot.taken_at -= timedelta(seconds=settings.DASHBOARD_SNAPSHOT_TTL + 1)
+        cache.set(dashboard.SNAPSHOT_KEY, snapshot)
+        Listing.objects.create(type=Listing.ListingType.JOB, title="New")
+
+        with mock.patch.object(dashboard, "start_refresh") as start_refresh:
+            self.assertEqual(self.client.get("/en/dashboard/").context["total_listings"], 3)
+            self.assertEqual(self.client.get("/en/dashboard/").context["total_listings"], 3)
+        # One refresh, however many stale reads
+        start_refresh.assert_called_once()
+
+        dashboard.refresh_snapshot()
+        cache.delete(dashboard.REFRESH_LOCK_KEY)
+        self.assertEqual(self.client.get("/en/dashboard/").context["total_listings"], 4)
+
+
+class DailyMetricTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = date(2026, 3, 18)  # a Wednesday
+        listing = Listing.objects.create(type=Listing.ListingType.JOB, title="Charted")
+        other = Listing.objects.create(type=Listing.ListingType.JOB, title="Also charted")
+        for days_ago, views in ((0, 3), (1, 2), (40, 7)):
+            ListingViewDaily.objects.create(listing=listing, date=self.today - timedelta(days=days_ago), views=views)
+        ListingViewDaily.objects.create(listing=other, date=self.today, views=1)
+        for key in ("a", "b"):
+            SiteVisit.objects.create(session_key=key, date=self.today)
+        message = ContactMessage.objects.create(name="A", email="a@example.com", message="Hi")
+        noon = timezone.make_aware(datetime.combine(self.today - timedelta(days=1), time(12)))
+        ContactMessage.objects.filter(pk=message.pk).update(created_at=noon)
+
+    def metric(self, name):
+        return dict(DailyMetric.objects.filter(metric=name).values_list("date", "value"))
+
+    def test_rollup_is_exact_and_rerunnable(self):
+        out = io.StringIO()
+        call_command("build_daily_metrics", "--since", "2026-01-01", "--until", self.today.isoformat(), stdout=out)
+        self.assertIn("for 2026-01-01 to 2026-03-18", out.getvalue())
+        yesterday = self.today - timedelta(days=1)
+        self.assertEqual(
+            self.metric("listing_views"),
+            {self.today: 4, yesterday: 2, self.today - timedelta(days=40): 7},
+        )
+        self.assertEqual(self.metric("site_visits"), {self.today: 2})
+        self.assertEqual(self.metric("contact_messages"), {yesterday: 1})
+
+        ListingViewDaily.objects.filter(date=yesterday).delete()
+        rollup_daily_metrics(yesterday, self.today)
+        self.assertEqual(self.metric("listing_views")[self.today], 4)
+        self.assertNotIn(yesterday, self.metric("listing_views"))
+
+    def test_refresh_fills_days_nobody_rolled_up(self):
+        for days_ago, views in ((3, 5), (5, 1)):
+            ListingViewDaily.objects.create(
+                listing=Listing.objects.first(), date=self.today - timedelta(days=days_ago), views=views,
+            )
+        # Last rolled up five days ago, then a long weekend
+        rollup_daily_metrics(self.today - timedelta(days=60), self.today - timedelta(days=5))
+        with mock.patch("pages.metrics.timezone.localdate", return_value=self.today):
+            refresh_recent_metrics()
+        views = self.metric("listing_views")
+        self.assertEqual(views[self.today - timedelta(days=3)], 5)
+        self.assertEqual(views[self.today], 4)
+
+        # A gap longer than CATCHUP_DAYS is left to build_daily_metrics --since
+        DailyMetric.objects.all().delete()
+        DailyMetric.objects.create(metric="likes", date=self.today - timedelta(days=100), value=1)
+        with mock.patch("pages.metrics.timezone.localdate", return_value=self.today):
+            refresh_recent_metrics()
+        self.assertNotIn(self.today - timedelta(days=40), self.metric("listing_views"))
+        self.assertIn(self.today - timedelta(days=3), self.metric("listing_views"))
+
+    def test_buckets(self):
+        rollup_daily_metrics(self.today - timedelta(days=60), self.today)
+
+        week = time_series(["listing_views", "site_visits"], self.today - timedelta(days=6), self.today)
+        self.assertEqual(week["bucket"], "day")
+        self.assertEqual(len(week["labels"]), 7)
+        self.assertEqual(week["series"]["listing_views"][-2:], [2, 4])
+        self.assertEqual(week["series"]["site_visits"][-1], 2)
+
+        months = time_series(["listing_views"], self.today - timedelta(days=200), self.today)
+        self.assertEqual(months["bucket"], "week")
+        self.assertEqual(months["labels"][-1], "2026-03-16")  # the Monday
+        self.assertEqual(months["series"]["listing_views"][-1], 6)
+        self.assertEqual(sum(months["series"]["listing_views"]), 13)
+
+        years = time_series(["listing_views"], date(2024, 1, 1), self.today)
+        self.assertEqual(years["bucket"], "month")
+        self.assertEqual(years["labels"][:2], ["2024-01-01", "2024-02-01"])
+        self.assertEqual(years["series"]["listing_views"][-3:], [0, 7, 6])
+
+        with self.assertRaises(ValueError):
+            time_series(["nope"], self.today, self.today)
+
+    def test_endpoint(self):
+        rollup_daily_metrics(self.today - timedelta(days=60), self.today)
+        url = "/en/dashboard/series/"
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        staff = User.objects.create_user(username="staff", password="pass12345", is_staff=True)
+        self.client.force_login(staff)
+        resp = self.client.get(url, {"metrics": "listing_views,likes", "days": 30, "end": self.today.isoformat()})
+        data = resp.json()
+        self.assertEqual((data["start"], data["end"], data["bucket"]), ("2026-02-17", "2026-03-18", "day"))
+        self.assertEqual(len(data["labels"]), 30)
+        self.assertEqual(sum(data["series"]["listing_views"]), 6)
+        self.assertEqual(set(data["series"]["likes"]), {0})
+        self.assertIn("private", resp["Cache-Control"])
+
+        for params in ({"metrics": "nope"}, {"start": "2026-02-30"}, {"days": "x"}, {"bucket": "hour"}):
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
+
+
+@override_settings(DASHBOARD_LIVE_INTERVAL=60)
+class LiveDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        ContactMessage.objects.create(name="A", email="a@example.com", message="Hi")
+        SiteVisit.objects.create(session_key="a")
+        self.staff = User.objects.create_user(username="staff", password="pass12345", is_staff=True)
+
+    def test_one_computation_per_interval(self):
+        state = live.live_state()
+        self.assertEqual(state["seq"], 1)
+        self.assertEqual(state["metrics"]["site_visits"], 1)
+        self.assertEqual(state["metrics"]["contact_messages"], 1)
+        self.assertEqual(state["metrics"]["unread_messages"], 1)
+        self.assertEqual(state["metrics"]["signups"], 1)
+
+        # Every other dashboard within the interval reads the cached state
+        with self.assertNumQueries(0):
+            self.assertEqual(live.live_state(), state)
+
+        cache.set(live.LIVE_STATE_KEY, {**state, "at": state["at"] - 61})
+        cache.delete(live.LIVE_LOCK_KEY)
+        self.assertEqual(live.live_state()["seq"], 2)
+
+    def test_stream_sends_only_changes(self):
+        stream = live.LiveStream()
+        first = list(stream.chunks({"seq": 1, "metrics": {"likes": 0, "signups": 2}}))
+        self.assertEqual(first, ['id: 1\nevent: metrics\ndata: {"likes":0,"signups":2}\n\n'])
+        self.assertEqual(list(stream.chunks({"seq": 1, "metrics": {"likes": 5, "signups": 2}})), [])
+        self.assertEqual(
+            list(stream.chunks({"seq": 2, "metrics": {"likes": 1, "signups": 2}})),
+            ['id: 2\nevent: metrics\ndata: {"likes":1}\n\n'],
+        )
+
+    def test_endpoint(self):
+        url = "/en/dashboard/live/"
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(self.staff)
+        resp = self.client.get(url)
+        self.assertEqual(resp["Content-Type"], "text/event-stream")
+        self.assertEqual(resp["Cache-Control"], "no-cache")
+        body = b"".join(resp.streaming_content).decode()
+        # WSGI: the current values, then the browser reconnects after retry
+        self.assertTrue(body.startswith("retry: 60000\n\n"))
+        self.assertIn('"site_visits":1', body)
+
+    # The async test client sends request_finished synchronously; skip the expiry sweep
+    @override_settings(LISTING_EXPIRY_INTERVAL=0)
+    async def test_asgi_stream(self):
+        await self.async_client.aforce_login(self.staff)
+        with mock.patch.object(live, "LIVE_STREAM_MAX_AGE", 0):
+            resp = await self.async_client.get("/en/dashboard/live/")
+            chunks = [chunk async for chunk in resp.streaming_content]
+        self.assertEqual(chunks[0], b"retry: 60000\n\n")
+        self.assertIn(b"event: metrics", chunks[1])
+
+
 from django.test import TestCase
 
 # Create your tests here.
@@ -7,9 +7,13 @@ urlpatterns = [
     path("services/", views.services, name="services"),
     path("about/", views.about, name="about"),
     path("gallery/", views.gallery, name="gallery"),
+    path("gallery/more/", views.gallery_more, name="gallery-more"),
     path("contact/", views.contact, name="contact"),
     path("gallery/<int:pk>/like/", views.gallery_like, name="gallery-like"),
+    path("gallery/<int:pk>/view/", views.gallery_view, name="gallery-view"),
     path("dashboard/", views.dashboard, name="dashboard"),
+    path("dashboard/series/", views.dashboard_series, name="dashboard-series"),
+    path("dashboard/live/", views.dashboard_live, name="dashboard-live"),
     
     # Optional pages for future
     path("privacy/", views.privacy, name="privacy"),
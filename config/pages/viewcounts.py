@@ -0,0 +1,115 @@
+"""
+GalleryImage view counting.
+
+A view only bumps a per-image counter in the cache (``cache.incr`` is
+atomic on Redis and within a LocMemCache process). ``flush_gallery_views()``
+moves the pending counts into the table with one set-based UPDATE,
+``views = views + CASE id WHEN ... END``, so rows never go through a
+read-modify-write save() and a hot image costs one UPDATE per flush, not
+one per view. The first view after GALLERY_VIEW_FLUSH_INTERVAL runs the
+flush; the flush_gallery_views command does the same from cron or a
+deploy hook.
+
+A flush subtracts exactly what it read from each counter before adding it
+to the rows (skipping counters evicted in between, and adding back what
+it took if the UPDATE fails), so views that land while it runs stay in the
+counter for the next one. Only a worker killed between those two steps
+loses that flush's counts.
+
+A visitor counts once per image per day: each process remembers the
+(image, visitor, day) keys it has counted in a bounded set, the same
+per-worker dedupe the listing view and site visit buffers use.
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from config.visitors import visitor_key
+
+from .models import GalleryImage
+
+COUNTER_KEY = "pages:gallery:views:{}"
+FLUSH_DUE_KEY = "pages:gallery:views:flush-due"
+FLUSH_LOCK_KEY = "pages:gallery:views:flushing"
+FLUSH_LOCK_TTL = 60  # seconds; frees the lock if a flushing worker dies
+
+SEEN_LIMIT = 50_000
+
+_seen = OrderedDict()
+_seen_lock = threading.Lock()
+
+
+def _bump(key, n):
+    try:
+        cache.incr(key, n)
+    except ValueError:
+        # No counter yet; if another request creates it first, add to theirs
+        if not cache.add(key, n, None):
+            cache.incr(key, n)
+
+
+def record_gallery_view(request, image_id):
+    """Count a view of ``image_id`` unless this visitor was counted today. Returns whether it counted."""
+    key = (image_id, visitor_key(request), timezone.localdate())
+    with _seen_lock:
+        if key in _seen:
+            return False
+        _seen[key] = None
+        if len(_seen) > SEEN_LIMIT:
+            _seen.popitem(last=False)
+    _bump(COUNTER_KEY.format(image_id), 1)
+    if cache.add(FLUSH_DUE_KEY, True, settings.GALLERY_VIEW_FLUSH_INTERVAL):
+        flush_gallery_views()
+    return True
+
+
+def pending_views(image_ids):
+    """``{image id: views not yet flushed}`` for the given images."""
+    keys = {COUNTER_KEY.format(pk): pk for pk in image_ids}
+    return {keys[key]: n for key, n in cache.get_many(list(keys)).items() if n}
+
+
+def flush_gallery_views():
+    """Add the pending counts to GalleryImage.views; returns how many views were written."""
+    # One flush at a time; a view that finds one running leaves its count
+    # for the next.
+    if not cache.add(FLUSH_LOCK_KEY, True, FLUSH_LOCK_TTL):
+        return 0
+    try:
+        counts = pending_views(GalleryImage.objects.values_list("pk", flat=True))
+        taken = {}
+        try:
+            for pk, n in counts.items():
+                try:
+                    cache.decr(COUNTER_KEY.format(pk), n)
+                except ValueError:
+                    continue  # evicted since it was read: nothing left to move
+                taken[pk] = n
+            if not taken:
+                return 0
+            GalleryImage.objects.filter(pk__in=taken).update(
+                views=F("views") + Case(
+                    *[When(pk=pk, then=Value(n)) for pk, n in taken.items()],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+            )
+        except Exception:
+            # Put back exactly what was taken out of the counters
+            for pk, n in taken.items():
+                _bump(COUNTER_KEY.format(pk), n)
+            raise
+        return sum(taken.values())
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+
+def clear():
+    """Forget remembered visitors (tests)."""
+    with _seen_lock:
+        _seen.clear()
@@ -1,12 +1,20 @@
 from datetime import timedelta
 
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
-from django.db.models import Count
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_date
 from django.utils.translation import gettext as _
+from django.utils.translation import gettext_lazy as _lazy
 from django.views.decorators.http import require_POST
 try:
     from ratelimit.decorators import ratelimit
@@ -16,9 +24,14 @@ except ImportError:
             return fn
         return decorator
 
+from listings.models import Listing
+
+from .dashboard import dashboard_snapshot
+from .gallery import gallery_page, gallery_stats, liked_image_ids, lightbox_data, next_page_url
+from .live import LiveStream, live_events, live_state
+from .metrics import time_series
 from .models import ContactMessage, GalleryImage, GalleryLike
-from listings.models import Listing, ListingView
-from accounts.models import Profile
+from .viewcounts import record_gallery_view
 
 
 def services(request):
@@ -108,51 +121,40 @@ def contact(request):
 
 
 def gallery(request):
-    """Gallery page view showing all published images."""
-    images = GalleryImage.objects.filter(is_published=True).order_by("-created_at")
-
-    # Create session if doesn't exist
-    if not request.session.session_key:
-        request.session.save()
-    session_key = request.session.session_key
-
-    # Get likes count for all images
-    likes_count = dict(
-        GalleryLike.objects.filter(image__in=images)
-        .values("image_id")
-        .annotate(c=Count("id"))
-        .values_list("image_id", "c")
-    )
-
-    # Get images liked by current user/session
-    liked_ids = set()
-    if request.user.is_authenticated:
-        liked_ids.update(
-            GalleryLike.objects.filter(image__in=images, user=request.user)
-            .values_list("image_id", flat=True)
-        )
-    else:
-        liked_ids.update(
-            GalleryLike.objects.filter(image__in=images, session_key=session_key)
-            .values_list("image_id", flat=True)
-        )
-
-    # Calculate total likes and views - NOW THIS WILL WORK
-    total_likes = sum(likes_count.values())
-    total_views = sum(img.views for img in images)
+    """Gallery page: the first page of images (the rest come from gallery_more)."""
+    page = gallery_page(request)
+    liked_ids = liked_image_ids(request, [g.pk for g in page])
+    stats = gallery_stats()
 
     context = {
         "page_title": _("Gallery"),
         "description": _("View our success stories and events"),
-        "images": images,
-        "likes_count": likes_count,
+        "images": page.object_list,
+        "page_obj": page,
         "liked_ids": liked_ids,
-        "total_likes": total_likes,
-        "total_views": total_views,  # Now this will work with the views field
+        "lightbox": lightbox_data(page, liked_ids),
+        "next_url": next_page_url(page, "pages:gallery-more"),
+        "total_images": stats["images"],
+        "total_likes": stats["likes"],
+        "total_views": stats["views"],
     }
     return render(request, "pages/gallery.html", context)
 
 
+def gallery_more(request):
+    """Next page of the gallery as JSON: card markup, lightbox entries and the following page's URL."""
+    page = gallery_page(request)
+    liked_ids = liked_image_ids(request, [g.pk for g in page])
+    html = render_to_string(
+        "pages/gallery_cards.html", {"images": page.object_list, "liked_ids": liked_ids}, request=request,
+    )
+    return JsonResponse({
+        "html": html,
+        "images": lightbox_data(page, liked_ids),
+        "next": next_page_url(page, "pages:gallery-more"),
+    })
+
+
 @require_POST
 def gallery_like(request, pk):
     """Handle gallery image likes (AJAX)."""
@@ -168,148 +170,114 @@ def gallery_like(request, pk):
     else:
         like_kwargs["session_key"] = session_key
 
-    # Check if already liked
-    existing = GalleryLike.objects.filter(**like_kwargs)
-    if existing.exists():
-        existing.delete()
-        liked = False
-    else:
-        GalleryLike.objects.create(**like_kwargs)
-        liked = True
-
-    # Get updated likes count
-    likes = GalleryLike.objects.filter(image=image).count()
-    
+    # Toggle: the DELETE doubles as the existence check; INSERT if nothing
+    # was deleted, then an F() update of the denormalized count
+    with transaction.atomic():
+        deleted, _ = GalleryLike.objects.filter(**like_kwargs).delete()
+        if deleted:
+            GalleryImage.objects.filter(pk=image.pk).update(likes_count=Greatest(F("likes_count") - 1, 0))
+            liked, delta = False, -1
+        else:
+            try:
+                with transaction.atomic():
+                    GalleryLike.objects.create(**like_kwargs)
+            except IntegrityError:
+                # A concurrent request liked it first and counted it
+                liked, delta = True, 0
+            else:
+                GalleryImage.objects.filter(pk=image.pk).update(likes_count=F("likes_count") + 1)
+                liked, delta = True, 1
+
+    # Count as read above, adjusted by this toggle (no extra query)
+    likes = max(0, image.likes_count + delta)
     return JsonResponse({"liked": liked, "likes": likes})
 
 
-@staff_member_required
-def dashboard(request):
-    """Admin dashboard view (staff only)."""
-    today = timezone.localdate()
-    start_7 = today - timedelta(days=6)
-    soon = today + timedelta(days=7)
-
-    qs = Listing.objects.all()
-
-    # Basic stats
-    total_listings = qs.count()
-    jobs = qs.filter(type="JOB").count()
-    scholarships = qs.filter(type="SCHOLARSHIP").count()
-    courses = qs.filter(type="COURSE").count()
-
-    # Feature stats
-    featured = qs.filter(is_featured=True).count()
-    remote = qs.filter(remote=True).count()
-    remote_pct = round((remote / total_listings) * 100, 1) if total_listings else 0
-
-    # Deadline stats
-    closing_soon = qs.filter(deadline__isnull=False, deadline__range=(today, soon)).count()
-    expired = qs.filter(deadline__isnull=False, deadline__lt=today).count()
-
-    # View stats
-    total_listing_views = ListingView.objects.count()
-    views_last_7_days = ListingView.objects.filter(date__gte=start_7).count()
-
-    # Views by day (last 7 days)
-    views_by_day_qs = (
-        ListingView.objects.filter(date__gte=start_7)
-        .values("date")
-        .annotate(c=Count("id"))
-        .order_by("date")
-    )
-    views_map = {row["date"]: row["c"] for row in views_by_day_qs}
-    last7_dates = [start_7 + timedelta(days=i) for i in range(7)]
-    views_labels = [d.strftime("%Y-%m-%d") for d in last7_dates]
-    views_data = [views_map.get(d, 0) for d in last7_dates]
-
-    # User gender stats
-    male = Profile.objects.filter(gender="M").count()
-    female = Profile.objects.filter(gender="F").count()
-    na = Profile.objects.filter(gender="N").count()
-
-    # Top countries
-    top_countries = (
-        qs.exclude(country__isnull=True)
-        .exclude(country__exact="")
-        .values("country")
-        .annotate(c=Count("id"))
-        .order_by("-c")[:8]
-    )
+@require_POST
+def gallery_view(request, pk):
+    """Count an opened gallery image (AJAX); the row is updated by the next flush."""
+    if not GalleryImage.objects.filter(pk=pk, is_published=True).exists():
+        raise Http404
+    record_gallery_view(request, pk)
+    return HttpResponse(status=204)
 
-    # Top viewed listings
-    top_viewed_listings = (
-        ListingView.objects.values("listing")
-        .annotate(views=Count("id"))
-        .order_by("-views")[:8]
-    )
-    
-    # Convert listing IDs to objects
-    listing_map = {l.id: l for l in Listing.objects.filter(id__in=[x["listing"] for x in top_viewed_listings])}
-    top_viewed_listings = [
-        {"listing": listing_map.get(x["listing"]), "views": x["views"]}
-        for x in top_viewed_listings
-        if listing_map.get(x["listing"]) is not None
-    ]
-
-    # Latest listings
-    latest_listings = qs.order_by("-created_at")[:8] if hasattr(Listing, "created_at") else qs.order_by("-id")[:8]
-
-    # Gallery stats
-    gallery_images = GalleryImage.objects.filter(is_published=True).count()
-    gallery_likes = GalleryLike.objects.count()
-    gallery_views = sum(img.views for img in GalleryImage.objects.filter(is_published=True))
-    
-    # Contact messages stats
-    contact_messages = ContactMessage.objects.count()
-    unread_messages = ContactMessage.objects.filter(is_read=False).count()
 
+# (metric, label) tiles in the dashboard's live strip
+LIVE_METRICS = (
+    ("site_visits", _lazy("Visitors")),
+    ("listing_views", _lazy("Listing views")),
+    ("signups", _lazy("Signups")),
+    ("likes", _lazy("Likes")),
+    ("contact_messages", _lazy("Messages")),
+    ("unread_messages", _lazy("Unread")),
+)
+
+# (days, label) zoom buttons on the dashboard's traffic chart
+SERIES_RANGES = ((7, "7d"), (30, "30d"), (90, "90d"), (365, "1y"), (365 * 5, "5y"))
+
+
+@staff_member_required
+def dashboard(request):
+    """Admin dashboard view (staff only), from the cached metrics snapshot."""
+    snapshot = dashboard_snapshot()
     context = {
         "page_title": _("Dashboard"),
         "description": _("Admin dashboard for site management"),
-        "today": today,
-        "soon": soon,
-
-        # Listing stats
-        "total_listings": total_listings,
-        "jobs": jobs,
-        "scholarships": scholarships,
-        "courses": courses,
-
-        "featured": featured,
-        "remote": remote,
-        "remote_pct": remote_pct,
-
-        "closing_soon": closing_soon,
-        "expired": expired,
-
-        # View stats
-        "total_listing_views": total_listing_views,
-        "views_last_7_days": views_last_7_days,
-        "views_labels": views_labels,
-        "views_data": views_data,
-
-        # User stats
-        "male": male,
-        "female": female,
-        "na": na,
-
-        # Top content
-        "top_countries": list(top_countries),
-        "top_viewed_listings": top_viewed_listings,
-        "latest_listings": latest_listings,
-
-        # Other pages stats
-        "gallery_images": gallery_images,
-        "gallery_likes": gallery_likes,
-        "gallery_views": gallery_views,  # Added gallery views
-        "contact_messages": contact_messages,
-        "unread_messages": unread_messages,
+        "snapshot_taken_at": snapshot.taken_at,
+        "series_ranges": SERIES_RANGES,
+        "live_metrics": LIVE_METRICS,
+        "listing_types": dict(Listing.ListingType.choices),
+        **snapshot.metrics,
     }
-
     return render(request, "pages/dashboard.html", context)
 
 
+def _date_param(request, name, default):
+    value = request.GET.get(name)
+    if not value:
+        return default
+    day = parse_date(value)  # ValueError for impossible dates
+    if day is None:
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD)")
+    return day
+
+
+@staff_member_required
+def dashboard_series(request):
+    """
+    Dashboard time series as JSON, from the DailyMetric rollup:
+    ``?metrics=listing_views,site_visits&days=90`` (or ``start``/``end``),
+    with ``bucket=auto|day|week|month``.
+    """
+    try:
+        end = _date_param(request, "end", timezone.localdate())
+        if request.GET.get("days"):
+            start = end - timedelta(days=int(request.GET["days"]) - 1)
+        else:
+            start = _date_param(request, "start", end - timedelta(days=29))
+        metrics = [name for name in request.GET.get("metrics", "listing_views").split(",") if name]
+        data = time_series(metrics, start, end, request.GET.get("bucket", "auto"))
+    except (ValueError, OverflowError) as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    response = JsonResponse({"start": start.isoformat(), "end": end.isoformat(), **data})
+    patch_cache_control(response, private=True, max_age=60)
+    return response
+
+
+@staff_member_required
+async def dashboard_live(request):
+    """Live dashboard metrics as Server-Sent Events (see pages/live.py)."""
+    if isinstance(request, ASGIRequest):
+        events = live_events()
+    else:
+        stream = LiveStream(max_age=0)
+        events = [stream.opening(), *stream.chunks(await sync_to_async(live_state)())]
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: pass events through unbuffered
+    return response
+
+
 # Additional optional views for future pages
 def privacy(request):
     """Privacy policy page."""
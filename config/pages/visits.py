@@ -0,0 +1,104 @@
+"""
+SiteVisit recording.
+
+One row per (visitor, day). SiteVisitMiddleware queues the visitor's key
+in a per-process WriteBehindBuffer (config/buffering.py), which merges
+repeats and remembers keys it has already written, so a returning visitor
+costs no queries for the rest of the day on that worker. Writes go out in
+batches with ``bulk_create(ignore_conflicts=True)``; the unique
+(session_key, date) constraint absorbs rows other workers wrote first.
+The date is part of the key, so the "seen" set rolls over at midnight on
+its own (yesterday's keys just age out of the bounded memory).
+
+``visit_total()`` is the site-wide count for templates: a cached number
+that each flush bumps by the rows it actually added, recounted (or
+estimated, on PostgreSQL) when the entry expires.
+
+With VISITOR_ANALYTICS = "sketch" visits go into one HyperLogLog sketch
+per day (VisitorSketch, see listings/sketches.py) instead of rows.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from config.buffering import WriteBehindBuffer
+from config.visitors import visitor_key
+from listings.sketches import merge_visitors
+
+from .models import SiteVisit, VisitorSketch
+
+WRITE_BATCH_SIZE = 500
+
+
+VISIT_TOTAL_KEY = "pages:visits:total"
+
+
+def _estimated_total():
+    """PostgreSQL's row estimate for SiteVisit (None elsewhere or before the first ANALYZE)."""
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [SiteVisit._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+def visit_total():
+    """Total visits (distinct visitors summed per day), from the cache when possible."""
+    total = cache.get(VISIT_TOTAL_KEY)
+    if total is None:
+        if settings.VISITOR_ANALYTICS == "sketch":
+            total = VisitorSketch.objects.aggregate(total=Sum("visitors"))["total"] or 0
+        else:
+            total = _estimated_total() if settings.SITE_VISIT_TOTAL_ESTIMATE else None
+            if total is None:
+                total = SiteVisit.objects.count()
+        cache.set(VISIT_TOTAL_KEY, total, settings.SITE_VISIT_TOTAL_TTL)
+    return total
+
+
+def write_site_visits(events):
+    """Insert buffered ``(visitor_key, date)`` events and bump the cached total."""
+    if settings.VISITOR_ANALYTICS == "sketch":
+        merge_visitors(VisitorSketch, ("date",), (((date,), key) for key, date in events))
+        cache.delete(VISIT_TOTAL_KEY)
+        return
+
+    # Leave out rows other workers already wrote, so the total only counts
+    # real inserts (one indexed lookup per flush).
+    existing = set()
+    for start in range(0, len(events), WRITE_BATCH_SIZE):
+        chunk = events[start:start + WRITE_BATCH_SIZE]
+        existing.update(
+            SiteVisit.objects.filter(
+                session_key__in={key for key, _ in chunk}, date__in={date for _, date in chunk}
+            ).values_list("session_key", "date")
+        )
+    new = [event for event in events if event not in existing]
+
+    SiteVisit.objects.bulk_create(
+        [SiteVisit(session_key=key, date=date) for key, date in new],
+        batch_size=WRITE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    if new:
+        try:
+            cache.incr(VISIT_TOTAL_KEY, len(new))
+        except ValueError:
+            pass  # not cached; the next visit_total() counts
+
+
+site_visit_buffer = WriteBehindBuffer(
+    write_site_visits,
+    flush_size=settings.VIEW_BUFFER_FLUSH_SIZE,
+    flush_interval=settings.VIEW_BUFFER_FLUSH_INTERVAL,
+    max_pending=settings.VIEW_BUFFER_MAX_PENDING,
+    name="site visits",
+)
+
+
+def record_site_visit(request):
+    site_visit_buffer.add((visitor_key(request), timezone.localdate()))